@@ -14,6 +14,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from negotiator_agent import NegotiatorAgent
 from sentiment_agent import SentimentAnalyzer
 from graphrag_engine import KnowledgeGraph, format_graph_context
+from keyword_engine import chatbot_matcher
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CHROMA_PATH = os.path.join(BASE_DIR, "chroma")
@@ -58,21 +59,19 @@ class AdvancedHotelChatbot:
     
     def detect_intent(self, user_input: str) -> str:
         """Detect what the user is trying to do"""
-        user_lower = user_input.lower()
+        found = chatbot_matcher.scan(user_input)
         
         # Negotiation intent
-        if any(word in user_lower for word in ["price", "cost", "expensive", "negotiate", "discount", "$", "how much"]):
-            if any(word in user_lower for word in ["room", "suite", "standard", "deluxe", "presidential"]):
-                return "negotiation"
+        if "price" in found and "room" in found:
+            return "negotiation"
         
         # Complaint intent
         if self.sentiment_analyzer.is_complaint(user_input):
             return "complaint"
         
         # Recommendation intent
-        if any(word in user_lower for word in ["restaurant", "dinner", "lunch", "eat", "food", "itinerary", "where to go", "recommend", "activity"]):
-            if any(word in user_lower for word in ["near", "close", "nearby", "romantic", "vegan"]):
-                return "recommendation"
+        if "recommendation" in found and "recommendation_context" in found:
+            return "recommendation"
         
         return "general_info"
     
@@ -136,9 +135,9 @@ Room Type: {room_type}
         """Handle guest complaints with emotional intelligence"""
         
         # Analyze sentiment and issue
-        sentiment, sentiment_score = self.sentiment_analyzer.analyze_sentiment(user_input)
-        is_complaint = self.sentiment_analyzer.is_complaint(user_input)
-        severity = self.sentiment_analyzer.detect_issue_severity(user_input)
+        report = self.sentiment_analyzer.analyze(user_input)
+        sentiment, sentiment_score = report.sentiment, report.score
+        is_complaint, severity = report.is_complaint, report.severity
         
         # Get context-specific system prompt
         system_prompt = self.sentiment_analyzer.generate_system_prompt(sentiment, is_complaint, severity)
@@ -10,9 +10,14 @@ Architecture:
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from datetime import date
+import asyncio
+import json
 import os
+import time
 import uvicorn
 
 from langchain_community.vectorstores import Chroma
@@ -20,15 +25,25 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.llms import Ollama
 
 from negotiator_agent import NegotiatorAgent
+from inventory_holds import check_hold_store, get_hold_manager
+from pricing_grid import LOYALTY_STATUSES, grid_to_json, offer_range, price_grid
+from stay_quote import MAX_QUOTE_NIGHTS, quote_stay
 from sentiment_agent import SentimentAnalyzer
+from sentiment_batch import BatchSentimentScorer
+from sentiment_model import create_sentiment_model
 from graphrag_engine import KnowledgeGraph, format_graph_context
+from intent_classifier import IntentClassifier, classifier_enabled
+import fast_path
 
 # Import LangGraph workflow
 from langgraph_workflow import (
     hotel_workflow,
     initialize_workflow_agents,
     create_initial_state,
-    process_message
+    process_message,
+    stream_message,
+    session_store_stats,
+    configure_turn_pool
 )
 
 # Initialize FastAPI app
@@ -50,12 +65,34 @@ app.add_middleware(
 # Global instances
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CHROMA_PATH = os.path.join(BASE_DIR, "chroma")
+MAX_SENTIMENT_BATCH = int(os.environ.get("AI_SENTIMENT_BATCH_MAX", 5000))
+MAX_PRICE_GRID_CELLS = int(os.environ.get("AI_PRICE_GRID_MAX_CELLS", 200000))
+# Workflow turns (and their RAG prefetches) in flight per worker process
+MAX_CONCURRENT_TURNS = int(os.environ.get("AI_MAX_CONCURRENT_TURNS", 4))
 
 db = None
 model = None
 negotiator = None
 sentiment_analyzer = None
+batch_scorer = None
 knowledge_graph = None
+intent_classifier = None
+
+# Readiness: each component flips to True once it is warm (see /ready)
+readiness = {
+    "embeddings": False,
+    "vector_db": False,
+    "llm": False,
+    "agents": False
+}
+startup_timings: Dict[str, float] = {}
+startup_errors: Dict[str, str] = {}
+_startup_task: Optional[asyncio.Task] = None
+
+
+def is_ready() -> bool:
+    """True once embeddings, vector store, LLM and agents are all warm"""
+    return all(readiness.values())
 
 
 # ============================================================================
@@ -84,12 +121,36 @@ class NegotiationRequest(BaseModel):
     room_type: str
     guest_offer: float
     loyalty_status: Optional[str] = "none"
+    check_in: Optional[date] = None   # price for these nights (calendar occupancy)
+    check_out: Optional[date] = None
+    hotel_id: Optional[str] = None    # price a catalog property (AI_ROOMS_FILE) instead of the cottage
+
+
+class QuoteRequest(BaseModel):
+    room_type: str
+    check_in: date
+    check_out: Optional[date] = None  # default: one night
+    loyalty_status: Optional[str] = "none"  # stay-length statuses come from the dates
+    hotel_id: Optional[str] = None
+
+
+class PriceGridRequest(BaseModel):
+    room_types: Optional[List[str]] = None        # default: every priced room type
+    offer_min: float = 15
+    offer_max: float = 130
+    offer_step: float = 5
+    loyalty_statuses: Optional[List[str]] = None  # default: none + every discount status
+    tiers: List[int] = [1, 2, 3, 4]
 
 
 class SentimentRequest(BaseModel):
     text: str
 
 
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
+
 class RecommendationRequest(BaseModel):
     query: str
     preferences: Optional[Dict] = None
@@ -99,68 +160,157 @@ class RecommendationRequest(BaseModel):
 # INITIALIZATION
 # ============================================================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize AI components on startup"""
-    global db, model, negotiator, sentiment_analyzer, knowledge_graph
-    
-    print("=" * 60)
-    print("[STARTING] SmartStay AI System v2.0 (LangGraph)")
-    print("=" * 60)
-    
-    # Initialize embeddings and vector store
-    print("[1/5] Initializing embeddings...")
+def _load_embeddings():
     embedding_function = HuggingFaceEmbeddings(
         model_name="sentence-transformers/all-MiniLM-L6-v2"
     )
+    # First encode pays for lazy model setup; do it now, not on a guest's turn
+    embedding_function.embed_query("warm up")
+    return embedding_function
+
+
+def _open_vector_db(embedding_function):
+    return Chroma(persist_directory=CHROMA_PATH, embedding_function=embedding_function)
+
+
+def _connect_llm():
+    llm = Ollama(model="llama2")
+    # Test connection (also loads the model weights into Ollama)
+    llm.invoke("Hello")
+    return llm
+
+
+async def _run_phase(name: str, func, *args):
+    """Run a blocking startup phase in a thread and record how long it took"""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(func, *args)
+    except Exception as e:
+        startup_errors[name] = str(e)
+        raise
+    finally:
+        startup_timings[name] = round(time.perf_counter() - start, 3)
+    readiness[name] = True
+    print(f"[OK] {name} ready in {startup_timings[name]:.2f}s")
+    return result
+
+
+async def _warm_up():
+    """
+    Bring the AI components up concurrently:
+    
+        embeddings -> vector_db --------+
+                   -> intent_classifier +
+        llm ----------------------------+--> agents -> workflow
+        knowledge_graph ----------------+
+        sentiment_model ----------------+
+    """
+    global db, model, negotiator, sentiment_analyzer, batch_scorer, knowledge_graph, intent_classifier
+    start = time.perf_counter()
+    
+    async def classifier_phase(embedding_function):
+        # Optional (AI_INTENT_CLASSIFIER=1): keyword routing works without it
+        if not classifier_enabled():
+            return None
+        try:
+            return await _run_phase("intent_classifier", IntentClassifier, embedding_function)
+        except Exception as e:
+            print(f"[WARNING] Intent classifier disabled: {e}")
+            return None
+    
+    async def vector_chain():
+        global intent_classifier
+        embedding_function = await _run_phase("embeddings", _load_embeddings)
+        vector_db, intent_classifier = await asyncio.gather(
+            _run_phase("vector_db", _open_vector_db, embedding_function),
+            classifier_phase(embedding_function)
+        )
+        return vector_db
     
-    print("[2/5] Loading vector database...")
-    db = Chroma(persist_directory=CHROMA_PATH, embedding_function=embedding_function)
+    async def llm_phase():
+        try:
+            return await _run_phase("llm", _connect_llm)
+        except Exception as e:
+            print(f"[WARNING] LLM initialization failed: {e}")
+            print("         Make sure Ollama is running: `ollama serve`")
+            return None
+    
+    async def sentiment_model_phase():
+        # Optional (AI_SENTIMENT_BACKEND): the lexicon works without it
+        if os.environ.get("AI_SENTIMENT_BACKEND", "lexicon") == "lexicon":
+            return None
+        try:
+            return await _run_phase("sentiment_model", create_sentiment_model)
+        except Exception as e:
+            print(f"[WARNING] Sentiment model disabled, using the lexicon: {e}")
+            return None
+    
+    async def graph_phase():
+        graph_start = time.perf_counter()
+        graph = await asyncio.to_thread(KnowledgeGraph)
+        startup_timings["knowledge_graph"] = round(time.perf_counter() - graph_start, 3)
+        return graph
     
-    # Initialize LLM (Ollama with llama2)
-    print("[3/5] Connecting to Ollama LLM...")
     try:
-        model = Ollama(model="llama2")
-        # Test connection
-        test_response = model.invoke("Hello")
-        print("[OK] LLM (Ollama/llama2) connected and responding")
+        db, model, knowledge_graph, sentiment_model = await asyncio.gather(
+            vector_chain(), llm_phase(), graph_phase(), sentiment_model_phase()
+        )
     except Exception as e:
-        print(f"[WARNING] LLM initialization failed: {e}")
-        print("         Make sure Ollama is running: `ollama serve`")
-        model = None
+        print(f"[ERROR] Startup failed: {e}")
+        startup_timings["total"] = round(time.perf_counter() - start, 3)
+        return
     
-    # Initialize agents
-    print("[4/5] Initializing AI agents...")
+    # Agents are cheap but need the vector store
+    agents_start = time.perf_counter()
     negotiator = NegotiatorAgent(db)
-    sentiment_analyzer = SentimentAnalyzer(db)
-    knowledge_graph = KnowledgeGraph()
-    
-    # Initialize LangGraph workflow with agents
-    print("[5/5] Initializing LangGraph workflow...")
+    sentiment_analyzer = SentimentAnalyzer(db, model=sentiment_model)
+    batch_scorer = BatchSentimentScorer(sentiment_analyzer)
     initialize_workflow_agents(
         vector_db=db,
         llm=model,
         neg_agent=negotiator,
         sent_analyzer=sentiment_analyzer,
-        kg=knowledge_graph
+        kg=knowledge_graph,
+        intent_clf=intent_classifier
     )
+    startup_timings["agents"] = round(time.perf_counter() - agents_start, 3)
+    readiness["agents"] = True
+    startup_timings["total"] = round(time.perf_counter() - start, 3)
     
     print("=" * 60)
-    print("[OK] SmartStay AI System ready!")
+    print(f"[{'OK' if is_ready() else 'DEGRADED'}] SmartStay AI System warm in {startup_timings['total']:.2f}s")
+    for phase, seconds in startup_timings.items():
+        print(f"  {phase:<16} {seconds:7.2f}s")
     print("")
     print("Workflow Architecture:")
     print("  User Input -> Sentiment Analysis -> Intent Detection")
     print("             -> [Negotiation | Complaint | Recommend | Info]")
     print("             -> Format Response -> Output")
-    print("")
-    print("Features:")
-    print("  - Multi-turn stateful negotiations (Game Theory)")
-    print("  - Emotion-adaptive responses (Affective Computing)")
-    print("  - Knowledge Graph recommendations (GraphRAG)")
-    print("  - Crisis detection & escalation (HCI)")
     print("=" * 60)
 
 
+@app.on_event("startup")
+async def startup_event():
+    """
+    Start warming AI components in the background
+    
+    The server accepts connections immediately (liveness: /health) while
+    the embeddings, vector store and LLM load concurrently; /ready reports
+    when the service can actually answer guests.
+    """
+    global _startup_task
+    
+    print("=" * 60)
+    print("[STARTING] SmartStay AI System v2.0 (LangGraph)")
+    print("=" * 60)
+    configure_turn_pool(MAX_CONCURRENT_TURNS)
+    print(f"[STARTING] Workflow turn pool: {MAX_CONCURRENT_TURNS} concurrent turns (AI_MAX_CONCURRENT_TURNS)")
+    hold_warning = check_hold_store(get_hold_manager())
+    if hold_warning:
+        print(f"[WARNING] {hold_warning}")
+    _startup_task = asyncio.create_task(_warm_up())
+
+
 # ============================================================================
 # MAIN CHAT ENDPOINT (LangGraph Powered)
 # ============================================================================
@@ -175,7 +325,12 @@ async def chat(request: ChatRequest):
     2. Detects intent to route appropriately
     3. Processes through specialized handler (negotiation/complaint/recommendation/general)
     4. Returns formatted response with metadata for UI adaptation
+    
+    The turn itself runs on the workflow's bounded worker pool
+    (AI_MAX_CONCURRENT_TURNS), so slow LLM calls never block the event loop.
     """
+    if not readiness["agents"]:
+        raise HTTPException(status_code=503, detail="AI service is still warming up. Check /ready.")
     if not model:
         raise HTTPException(
             status_code=503, 
@@ -217,6 +372,40 @@ async def chat(request: ChatRequest):
         )
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Same workflow as /api/chat, but the reply is streamed:
+    - event: metadata  -> sentiment/intent as soon as routing is decided
+    - event: token     -> LLM tokens as Ollama produces them
+    - event: done      -> full ChatResponse payload incl. negotiation state
+    """
+    if not readiness["agents"]:
+        raise HTTPException(status_code=503, detail="AI service is still warming up. Check /ready.")
+    if not model:
+        raise HTTPException(
+            status_code=503, 
+            detail="LLM not available. Ensure Ollama is running with: ollama serve"
+        )
+    
+    async def event_stream():
+        async for event, data in stream_message(
+            user_input=request.message,
+            user_id=request.user_id,
+            loyalty_status=request.loyalty_status,
+            session_id=request.session_id
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ============================================================================
 # HEALTH & STATUS ENDPOINTS
 # ============================================================================
@@ -226,6 +415,7 @@ async def root():
     """Health check endpoint with system status"""
     return {
         "status": "online",
+        "ready": is_ready(),
         "service": "SmartStay AI API",
         "version": "2.0.0",
         "architecture": "LangGraph",
@@ -238,26 +428,52 @@ async def root():
         },
         "workflow": {
             "nodes": ["analyze_sentiment", "detect_intent", "negotiation", "complaint", "recommendation", "general_info", "format_response"],
-            "features": ["multi-turn-negotiation", "crisis-detection", "graphrag", "emotion-adaptive"]
+            "features": ["multi-turn-negotiation", "crisis-detection", "graphrag", "emotion-adaptive", "sse-streaming"]
         }
     }
 
 
 @app.get("/health")
 async def health_check():
-    """Simple health check"""
+    """Simple health check (liveness)"""
     return {"status": "healthy", "llm_available": model is not None}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once embeddings, vector store, LLM and agents are
+    warm, 503 until then. Includes per-phase startup timings (seconds) and
+    the LLM latency estimate the fast-path tier uses.
+    """
+    body = {
+        "ready": is_ready(),
+        "components": readiness,
+        "startup_timings": startup_timings,
+        "errors": startup_errors,
+        "llm_latency": fast_path.llm_latency.stats(),
+        "sentiment_model": sentiment_analyzer.model.stats()
+        if sentiment_analyzer is not None and sentiment_analyzer.model is not None else None,
+        "pricing_rules": negotiator.rules.stats() if negotiator is not None else None,
+        "hotel_catalog": negotiator.catalog.stats() if negotiator is not None else None,
+        "inventory_holds": get_hold_manager().stats(),
+        "occupancy_forecast": negotiator.forecast.stats() if negotiator is not None else None,
+        "occupancy_calendar": negotiator.calendar.stats() if negotiator is not None else None
+    }
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+
 # ============================================================================
 # INDIVIDUAL AGENT ENDPOINTS (Direct Access)
 # ============================================================================
 
 @app.post("/api/negotiate")
-async def negotiate(request: NegotiationRequest):
+def negotiate(request: NegotiationRequest):
     """
     Direct negotiation endpoint (bypasses workflow)
     Use this for single-turn price negotiations
+    (sync handler: without the occupancy file the rate comes from a blocking
+    vector search, so FastAPI runs it in its threadpool)
     """
     if negotiator is None:
         raise HTTPException(status_code=503, detail="Negotiator not available")
@@ -265,11 +481,57 @@ async def negotiate(request: NegotiationRequest):
     result = negotiator.negotiate_price(
         request.room_type,
         request.guest_offer,
-        request.loyalty_status
+        request.loyalty_status,
+        check_in=request.check_in,
+        check_out=request.check_out,
+        hotel_id=request.hotel_id
     )
     return result
 
 
+@app.post("/api/quote")
+def quote(request: QuoteRequest):
+    """
+    Night-by-night quote for a stay: each night priced at its own occupancy
+    tier and weekend/season rate, with the length-of-stay discount the
+    nights earn. Columnar "nightly" breakdown plus the total.
+    """
+    if negotiator is None:
+        raise HTTPException(status_code=503, detail="Negotiator not available")
+    if request.check_out is not None and (request.check_out - request.check_in).days > MAX_QUOTE_NIGHTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_QUOTE_NIGHTS} nights per quote")
+    
+    try:
+        return quote_stay(negotiator, request.room_type, request.check_in, request.check_out,
+                          request.loyalty_status or "none", request.hotel_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/api/negotiate/grid")
+def negotiate_grid(request: PriceGridRequest):
+    """
+    Pricing dashboard grid: negotiate_price decisions for every
+    room type x offer x loyalty status x occupancy tier in one call
+    Columnar response: decision codes (index into "decisions"), price
+    (final or counter price, null for reject) and add-on value, each
+    nested [room_type][offer][loyalty_status][tier].
+    """
+    if negotiator is None:
+        raise HTTPException(status_code=503, detail="Negotiator not available")
+    if request.offer_step <= 0 or request.offer_max < request.offer_min:
+        raise HTTPException(status_code=422, detail="Need offer_step > 0 and offer_max >= offer_min")
+    
+    offers = offer_range(request.offer_min, request.offer_max, request.offer_step)
+    cells = (len(request.room_types or negotiator.base_prices) * len(offers)
+             * len(request.loyalty_statuses or LOYALTY_STATUSES) * len(request.tiers))
+    if cells > MAX_PRICE_GRID_CELLS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_PRICE_GRID_CELLS} cells per grid")
+    
+    grid = price_grid(negotiator, request.room_types, offers, request.loyalty_statuses, request.tiers)
+    return grid_to_json(grid)
+
+
 @app.post("/api/sentiment")
 async def analyze_sentiment_endpoint(request: SentimentRequest):
     """
@@ -279,18 +541,37 @@ async def analyze_sentiment_endpoint(request: SentimentRequest):
     if sentiment_analyzer is None:
         raise HTTPException(status_code=503, detail="Sentiment analyzer not available")
     
-    sentiment, score = sentiment_analyzer.analyze_sentiment(request.text)
-    is_complaint = sentiment_analyzer.is_complaint(request.text)
-    severity = sentiment_analyzer.detect_issue_severity(request.text)
+    # May wait on the model's micro-batch, so keep it off the event loop
+    report = await asyncio.to_thread(sentiment_analyzer.analyze, request.text)
     
     return {
-        "sentiment": sentiment,
-        "score": score,
-        "is_complaint": is_complaint,
-        "severity": severity
+        "sentiment": report.sentiment,
+        "score": report.score,
+        "is_complaint": report.is_complaint,
+        "severity": report.severity,
+        "backend": report.backend
     }
 
 
+@app.post("/api/sentiment/batch")
+async def analyze_sentiment_batch(request: SentimentBatchRequest):
+    """
+    Batch sentiment endpoint
+    Scores up to MAX_SENTIMENT_BATCH texts per call; results are in input
+    order and match /api/sentiment. Use sentiment_batch.py for full backfills.
+    """
+    if batch_scorer is None:
+        raise HTTPException(status_code=503, detail="Sentiment analyzer not available")
+    if len(request.texts) > MAX_SENTIMENT_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_SENTIMENT_BATCH} texts per batch"
+        )
+    
+    results = await asyncio.to_thread(batch_scorer.score, request.texts)
+    return {"count": len(results), "results": results}
+
+
 @app.post("/api/recommend")
 async def get_recommendations(request: RecommendationRequest):
     """
@@ -310,11 +591,15 @@ async def get_recommendations(request: RecommendationRequest):
 
 
 @app.get("/api/occupancy")
-async def get_occupancy():
-    """Get current occupancy data for pricing decisions"""
+def get_occupancy():
+    """
+    Get current occupancy data for pricing decisions
+    (sync: without the occupancy file it falls back to a vector search)
+    """
     if negotiator is None:
         raise HTTPException(status_code=503, detail="Negotiator not available")
     
+    snapshot = negotiator.get_occupancy_snapshot()
     rate = negotiator.get_occupancy_rate()
     tier = negotiator.get_occupancy_tier(rate)
     
@@ -329,10 +614,28 @@ async def get_occupancy():
         "occupancy_rate": rate,
         "occupancy_tier": tier,
         "status": tier_names.get(tier, "Unknown"),
-        "pricing_flexibility": ["Very High", "High", "Limited", "None"][tier - 1]
+        "pricing_flexibility": ["Very High", "High", "Limited", "None"][tier - 1],
+        "rooms": {
+            room_type: {"label": room.label, "total": room.total,
+                        "occupied": room.occupied, "available": room.available}
+            for room_type, room in snapshot.rooms.items()
+        } if snapshot else None,
+        "total_rooms": snapshot.total_rooms if snapshot else None,
+        "available_rooms": snapshot.available if snapshot else None,
+        "snapshot_version": snapshot.version if snapshot else None
     }
 
 
+# ============================================================================
+# ADMIN ENDPOINTS
+# ============================================================================
+
+@app.get("/api/admin/sessions")
+async def admin_sessions():
+    """Live session-store usage: session count, stored bytes, limits, evictions"""
+    return session_store_stats()
+
+
 # ============================================================================
 # DEBUG ENDPOINTS (Development Only)
 # ============================================================================
@@ -365,7 +668,7 @@ async def debug_workflow():
         ],
         "state_fields": [
             "messages", "user_input", "sentiment", "sentiment_score", 
-            "is_complaint", "severity", "intent", "negotiation", 
+            "is_complaint", "severity", "mood", "intent", "slots", "negotiation", 
             "response", "is_crisis_mode", "needs_human_escalation"
         ]
     }
@@ -378,30 +681,25 @@ async def debug_test_sentiment(request: SentimentRequest):
         raise HTTPException(status_code=503, detail="Sentiment analyzer not available")
     
     text = request.text
-    sentiment, score = sentiment_analyzer.analyze_sentiment(text)
-    is_complaint = sentiment_analyzer.is_complaint(text)
-    severity = sentiment_analyzer.detect_issue_severity(text)
-    
-    # Get matched keywords
-    text_lower = text.lower()
-    matched_positive = [w for w in sentiment_analyzer.positive_words if w in text_lower]
-    matched_negative = [w for w in sentiment_analyzer.negative_words if w in text_lower]
-    matched_negations = [p for p in sentiment_analyzer.negation_phrases if p in text_lower]
+    report = await asyncio.to_thread(sentiment_analyzer.analyze, text)
     
     return {
         "input": text,
         "result": {
-            "sentiment": sentiment,
-            "score": score,
-            "is_complaint": is_complaint,
-            "severity": severity
+            "sentiment": report.sentiment,
+            "score": report.score,
+            "is_complaint": report.is_complaint,
+            "severity": report.severity,
+            "backend": report.backend
         },
         "analysis": {
-            "matched_positive_words": matched_positive,
-            "matched_negative_words": matched_negative,
-            "matched_negation_phrases": matched_negations,
-            "exclamation_count": text.count("!"),
-            "question_marks": text.count("?")
+            "matched_positive_words": report.matched_positive,
+            "matched_negative_words": report.matched_negative,
+            "matched_negation_phrases": report.matched_negations,
+            "matched_complaint_phrases": report.matched_complaint,
+            "matched_severity_keywords": report.matched_severity,
+            "exclamation_count": report.exclamation_count,
+            "question_marks": report.question_marks
         }
     }
 
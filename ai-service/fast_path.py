@@ -0,0 +1,201 @@
+"""
+Fast Path - LLM-free response tier with per-intent latency budgets
+Several handlers already have a complete deterministic answer before the
+LLM runs (the negotiator's message, the GraphRAG itinerary, the top RAG
+snippet); the LLM only rephrases it. This module decides, per turn,
+whether that rephrasing is worth the wait:
+
+- always: intents or intent:decision pairs that never go to the LLM
+  (AI_FAST_PATH_ALWAYS="negotiation:accept,recommendation")
+- budget: skip the LLM when the estimated time for a new LLM call exceeds
+  the intent's latency budget (AI_FAST_PATH_BUDGETS="negotiation=3,...")
+
+The estimate comes from LatencyTracker: an EWMA of recent LLM call times
+scaled by how many calls are already queued on the model server.
+A skipped LLM is never timed, so one slow call (e.g. Ollama reloading an
+idle model) would otherwise keep an intent on templates for good. The
+EWMA therefore halves every AI_LLM_LATENCY_HALF_LIFE_S without a sample,
+and once AI_FAST_PATH_PROBE_S passes without one, a single over-budget
+turn is let through to the LLM as a probe to re-measure it.
+Responses record the tier that answered in response_metadata.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Set, Tuple
+
+TIER_LLM = "llm"
+TIER_FAST_PATH = "fast_path"
+TIER_TEMPLATE = "template"      # handler has no LLM step for this answer
+TIER_FALLBACK = "llm_fallback"  # LLM was tried and failed
+
+DEFAULT_BUDGETS_S = {
+    "negotiation": 3.0,
+    "recommendation": 5.0,
+    "general_info": 6.0,
+    "booking": 6.0,
+    "complaint": 10.0,
+}
+
+
+class LatencyTracker:
+    """
+    EWMA of LLM call durations plus the number of calls in flight
+
+    estimated_wait() is the expected time for a call started now: each
+    batch of `parallel` calls ahead of it (Ollama serves OLLAMA_NUM_PARALLEL
+    requests at once) costs one average call.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        parallel: Optional[int] = None,
+        half_life_s: Optional[float] = None,
+        probe_interval_s: Optional[float] = None
+    ):
+        self.alpha = alpha
+        self.parallel = max(1, int(parallel if parallel is not None
+                                   else os.environ.get("AI_LLM_PARALLEL", 1)))
+        # How fast an old estimate fades, and how often a skipped LLM is re-measured
+        self.half_life_s = float(half_life_s if half_life_s is not None
+                                 else os.environ.get("AI_LLM_LATENCY_HALF_LIFE_S", 120))
+        self.probe_interval_s = float(probe_interval_s if probe_interval_s is not None
+                                      else os.environ.get("AI_FAST_PATH_PROBE_S", 30))
+        self.ewma_s: Optional[float] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.probes = 0
+        self._last_sample = 0.0
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - start)
+            with self._lock:
+                self.in_flight -= 1
+
+    def _estimate(self, now: float) -> Optional[float]:
+        """EWMA decayed by the time since the last sample (caller holds the lock)"""
+        if self.ewma_s is None or self.half_life_s <= 0:
+            return self.ewma_s
+        return self.ewma_s * 0.5 ** ((now - self._last_sample) / self.half_life_s)
+
+    def record(self, duration_s: float):
+        with self._lock:
+            now = time.monotonic()
+            estimate = self._estimate(now)
+            self.calls += 1
+            if estimate is None:
+                self.ewma_s = duration_s
+            else:
+                self.ewma_s = estimate + self.alpha * (duration_s - estimate)
+            self._last_sample = now
+
+    def estimated_wait(self) -> float:
+        with self._lock:
+            estimate = self._estimate(time.monotonic())
+            if estimate is None:
+                return 0.0
+            return estimate * math.ceil((self.in_flight + 1) / self.parallel)
+
+    def claim_probe(self) -> bool:
+        """True for one caller once probe_interval_s has passed without a sample or probe"""
+        with self._lock:
+            now = time.monotonic()
+            if now - max(self._last_sample, self._last_probe) < self.probe_interval_s:
+                return False
+            self._last_probe = now
+            self.probes += 1
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            estimate = self._estimate(time.monotonic())
+            return {
+                "ewma_s": round(self.ewma_s, 3) if self.ewma_s is not None else None,
+                "estimate_s": round(estimate, 3) if estimate is not None else None,
+                "in_flight": self.in_flight,
+                "parallel": self.parallel,
+                "calls": self.calls,
+                "probes": self.probes
+            }
+
+
+def _parse_budgets(spec: str) -> Dict[str, float]:
+    """'negotiation=3,complaint=inf' -> {'negotiation': 3.0, 'complaint': inf}"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        intent, _, seconds = item.partition("=")
+        budgets[intent.strip()] = float(seconds)
+    return budgets
+
+
+class FastPathPolicy:
+    """Which turns skip the LLM; read from the environment by from_env()"""
+
+    def __init__(
+        self,
+        budgets_s: Optional[Dict[str, float]] = None,
+        always: Optional[Set[str]] = None,
+        enabled: bool = True
+    ):
+        self.budgets_s = dict(DEFAULT_BUDGETS_S if budgets_s is None else budgets_s)
+        self.always = set(always or ())
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> "FastPathPolicy":
+        budgets = dict(DEFAULT_BUDGETS_S)
+        budgets.update(_parse_budgets(os.environ.get("AI_FAST_PATH_BUDGETS", "")))
+        always = {item.strip() for item in os.environ.get("AI_FAST_PATH_ALWAYS", "").split(",") if item.strip()}
+        return cls(budgets, always, enabled=os.environ.get("AI_FAST_PATH", "1") != "0")
+
+    def reason_to_skip(self, intent: str, decision: Optional[str], estimated_wait_s: float) -> Optional[str]:
+        """'always' or 'budget' if this turn should use the template, else None"""
+        if not self.enabled:
+            return None
+        if intent in self.always or (decision and f"{intent}:{decision}" in self.always):
+            return "always"
+        if estimated_wait_s > self.budgets_s.get(intent, math.inf):
+            return "budget"
+        return None
+
+
+llm_latency = LatencyTracker()
+fast_path_policy = FastPathPolicy.from_env()
+
+
+def answer(
+    intent: str,
+    template: str,
+    generate: Callable[[], str],
+    decision: Optional[str] = None
+) -> Tuple[str, Dict]:
+    """
+    The handler's reply and the metadata saying which tier produced it.
+    generate() runs the LLM; it is only called when the fast path declines.
+    """
+    estimated_wait_s = llm_latency.estimated_wait()
+    reason = fast_path_policy.reason_to_skip(intent, decision, estimated_wait_s)
+    probe = reason == "budget" and llm_latency.claim_probe()
+    if reason and not probe:
+        return template, {
+            "response_tier": TIER_FAST_PATH,
+            "fast_path_reason": reason,
+            "estimated_llm_wait_s": round(estimated_wait_s, 2)
+        }
+    try:
+        return generate(), {"response_tier": TIER_LLM, **({"fast_path_probe": True} if probe else {})}
+    except Exception:
+        return template, {"response_tier": TIER_FALLBACK}
@@ -0,0 +1,319 @@
+"""
+Hotel Catalog - per-property room prices from the server's Hotel/Room documents
+NegotiatorAgent's pricing rules describe one cottage (three room types),
+while the Express side lists many Hotel documents, each with Room
+documents carrying roomType, pricePerNight and isAvailable. This module
+loads a catalog snapshot (mongoexport JSONL of rooms, optionally hotels)
+so the negotiator can price any listed property by hotel id.
+
+Layout: hotel ids and room types are each mapped to a row/column index
+once; prices and room counts live in dense (hotels x room types) arrays.
+A lookup is two dict hits and an array read, O(1) however many properties
+are listed, and memory per property is a fixed number of array cells.
+
+Room types are normalized with room_key() ("Luxury Room" -> "luxury");
+the negotiator's names are aliases ("deluxe" -> "luxury"). A property's
+base price for a type is its cheapest room of that type; the minimum is
+AI_CATALOG_MIN_RATIO of it. Loyalty discounts and occupancy-tier caps still
+come from pricing_rules.json.
+
+Occupancy (for the tier) comes from the bookings export, AI_BOOKINGS_FILE:
+a per-hotel OccupancyCalendar counting active bookings against the
+hotel's listed rooms, for the stay's nights (tonight without dates).
+Room.isAvailable is the owner's listing toggle, not a booking, so it
+never counts. Without a bookings export, or for nights outside it,
+occupancy() returns None and the negotiator uses the current hotel-wide
+rate (occupancy_basis "current" instead of "hotel_bookings").
+
+Enable with AI_ROOMS_FILE (and AI_HOTELS_FILE for names and cities).
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from occupancy_calendar import DateLike, OccupancyCalendar, stay_dates
+from occupancy_snapshot import CATALOG_ROOM_ALIASES, room_key
+
+MIN_PRICE_RATIO = float(os.environ.get("AI_CATALOG_MIN_RATIO", "0.75"))
+
+# Negotiator room names -> catalog room types (shared with occupancy_calendar)
+ROOM_ALIASES = CATALOG_ROOM_ALIASES
+
+
+def _oid(value) -> Optional[str]:
+    """mongoexport {"$oid": ...} or plain string id"""
+    if isinstance(value, dict):
+        value = value.get("$oid")
+    return str(value) if value is not None else None
+
+
+def _price(value) -> float:
+    """Price as given (120 stays an int, so messages read "$120/night")"""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class HotelCatalog:
+    """
+    Base and minimum prices and room counts per (hotel, room type)
+
+    Cells a property has no room for hold NaN prices and zero counts.
+    bookings is the per-hotel booking calendar, None until attach_bookings().
+    """
+
+    def __init__(
+        self,
+        hotel_ids: List[str],
+        room_types: List[str],
+        base: np.ndarray,
+        rooms: np.ndarray,
+        available: np.ndarray,
+        names: Optional[List[str]] = None,
+        cities: Optional[List[str]] = None,
+        min_ratio: float = MIN_PRICE_RATIO
+    ):
+        """
+        Args:
+            hotel_ids, room_types: row and column labels
+            base: (hotels, room types) cheapest pricePerNight, NaN where none
+            rooms, available: (hotels, room types) room counts
+            names, cities: per hotel, "" where unknown
+        """
+        self.hotel_ids = hotel_ids
+        self.room_types = room_types
+        self._hotel_index = {hotel_id: i for i, hotel_id in enumerate(hotel_ids)}
+        self._type_index = {room_type: j for j, room_type in enumerate(room_types)}
+        self.base = base
+        self.minimum = np.round(base * min_ratio, 2)
+        self.rooms = rooms
+        self.available = available
+        self.names = names or [""] * len(hotel_ids)
+        self.cities = cities or [""] * len(hotel_ids)
+        self.bookings: Optional[OccupancyCalendar] = None
+        self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.hotel_ids)
+
+    def _column(self, room_type: str) -> Optional[int]:
+        key = room_key(room_type)
+        return self._type_index.get(ROOM_ALIASES.get(key, key))
+
+    def has_hotel(self, hotel_id: str) -> bool:
+        return hotel_id in self._hotel_index
+
+    def lookup(self, hotel_id: str, room_type: str) -> Optional[Tuple[float, float]]:
+        """(base price, minimum price), None if the hotel has no such room"""
+        i = self._hotel_index.get(hotel_id)
+        j = self._column(room_type)
+        if i is None or j is None:
+            return None
+        base = self.base.item(i, j)
+        if base != base:  # NaN: no room of this type
+            return None
+        return _price(base), _price(self.minimum.item(i, j))
+
+    def occupancy(
+        self,
+        hotel_id: str,
+        check_in: Optional[DateLike] = None,
+        check_out: Optional[DateLike] = None
+    ) -> Optional[float]:
+        """
+        Share of the hotel's room-nights booked for the stay (tonight without
+        dates); None without a bookings calendar, for a hotel without rooms
+        or for nights outside the calendar
+        """
+        if self.bookings is None:
+            return None
+        stay = stay_dates(check_in if check_in is not None else date.today(), check_out)
+        if stay is None or not self.bookings.covers(*stay):
+            return None
+        return self.bookings.occupancy(*stay, hotel_id)
+
+    def nightly_occupancy(self, hotel_id: str, check_in: DateLike, check_out: DateLike) -> Optional[np.ndarray]:
+        """occupancy() of each night in the range (NaN outside the calendar), None without one"""
+        if self.bookings is None:
+            return None
+        return self.bookings.nightly(check_in, check_out, hotel_id)
+
+    def attach_bookings(self, path: str):
+        """Build the per-hotel booking calendar from a bookings JSONL export"""
+        capacity = {hotel_id: rooms for hotel_id, rooms in zip(self.hotel_ids, self.rooms.sum(axis=1).tolist())
+                    if rooms}
+        self.bookings = OccupancyCalendar.from_jsonl(path, capacity, by_hotel=True)
+
+    def room_types_for(self, hotel_id: str) -> List[str]:
+        """Room types the hotel has at least one room of"""
+        i = self._hotel_index.get(hotel_id)
+        if i is None:
+            return []
+        return [self.room_types[j] for j in np.flatnonzero(self.rooms[i])]
+
+    def hotel(self, hotel_id: str) -> Optional[Dict]:
+        i = self._hotel_index.get(hotel_id)
+        if i is None:
+            return None
+        return {"hotel_id": hotel_id, "name": self.names[i], "city": self.cities[i]}
+
+    def nbytes(self) -> int:
+        """Bytes held by the price and count arrays"""
+        return self.base.nbytes + self.minimum.nbytes + self.rooms.nbytes + self.available.nbytes
+
+    # --- Loading --------------------------------------------------------------
+
+    @classmethod
+    def from_records(
+        cls,
+        rooms: Iterable[Dict],
+        hotels: Optional[Iterable[Dict]] = None,
+        min_ratio: float = MIN_PRICE_RATIO
+    ) -> "HotelCatalog":
+        """
+        Catalog from Room documents (hotel, roomType, pricePerNight,
+        isAvailable) and optionally Hotel documents (_id, name, city).
+        Rooms without a hotel, type or price are skipped.
+        """
+        hotel_index: Dict[str, int] = {}
+        names: List[str] = []
+        cities: List[str] = []
+
+        def hotel_row(hotel_id: str) -> int:
+            if hotel_id not in hotel_index:
+                hotel_index[hotel_id] = len(hotel_index)
+                names.append("")
+                cities.append("")
+            return hotel_index[hotel_id]
+
+        for hotel in hotels or ():
+            hotel_id = _oid(hotel.get("_id"))
+            if hotel_id is None:
+                continue
+            i = hotel_row(hotel_id)
+            names[i], cities[i] = hotel.get("name", ""), hotel.get("city", "")
+
+        type_index: Dict[str, int] = {}
+        rows, columns, prices, free = [], [], [], []
+        for room in rooms:
+            hotel_id = _oid(room.get("hotel"))
+            key = room_key(room.get("roomType") or "")
+            price = room.get("pricePerNight")
+            if hotel_id is None or not key or not isinstance(price, (int, float)) or isinstance(price, bool):
+                continue
+            rows.append(hotel_row(hotel_id))
+            columns.append(type_index.setdefault(key, len(type_index)))
+            prices.append(price)
+            free.append(bool(room.get("isAvailable", True)))
+
+        shape = (len(hotel_index), len(type_index))
+        rows_a, columns_a = np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)
+        base = np.full(shape, np.inf)
+        np.minimum.at(base, (rows_a, columns_a), np.array(prices, dtype=np.float64))
+        base[np.isinf(base)] = np.nan
+        counts = np.zeros(shape, dtype=np.int32)
+        np.add.at(counts, (rows_a, columns_a), 1)
+        available = np.zeros(shape, dtype=np.int32)
+        np.add.at(available, (rows_a, columns_a), np.array(free, dtype=np.int32))
+
+        return cls(list(hotel_index), list(type_index), base, counts, available, names, cities, min_ratio)
+
+    @classmethod
+    def from_jsonl(cls, rooms_path: str, hotels_path: Optional[str] = None) -> "HotelCatalog":
+        """Catalog from a rooms JSONL export (and optionally a hotels export)"""
+        hotels = _read_jsonl(hotels_path) if hotels_path else None
+        return cls.from_records(_read_jsonl(rooms_path), hotels)
+
+
+def _read_jsonl(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class CatalogSource:
+    """
+    HotelCatalog for AI_ROOMS_FILE (+ AI_HOTELS_FILE), rebuilt when an export changes
+
+    Like CalendarSource, the files are stat'ed at most every
+    check_interval_s; without a rooms file get() returns None and the
+    negotiator only prices the cottage. The bookings export
+    (AI_BOOKINGS_FILE) is optional: if it is missing or unreadable the
+    catalog loads without occupancy.
+    """
+
+    def __init__(
+        self,
+        rooms_path: Optional[str] = None,
+        hotels_path: Optional[str] = None,
+        check_interval_s: Optional[float] = None,
+        bookings_path: Optional[str] = None
+    ):
+        self.rooms_path = rooms_path or os.environ.get("AI_ROOMS_FILE")
+        self.hotels_path = hotels_path or os.environ.get("AI_HOTELS_FILE")
+        self.bookings_path = bookings_path or os.environ.get("AI_BOOKINGS_FILE")
+        self.check_interval_s = float(check_interval_s if check_interval_s is not None
+                                      else os.environ.get("AI_OCCUPANCY_CHECK_S", 1.0))
+        self.reloads = 0
+        self._catalog: Optional[HotelCatalog] = None
+        self._signature: Optional[Tuple] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[HotelCatalog]:
+        if self.rooms_path and time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._catalog
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval_s
+            try:
+                signature = tuple((stat.st_mtime_ns, stat.st_size) for stat in
+                                  map(os.stat, filter(None, (self.rooms_path, self.hotels_path))))
+                signature += (_file_signature(self.bookings_path),)
+                if signature == self._signature:
+                    return
+                catalog = HotelCatalog.from_jsonl(self.rooms_path, self.hotels_path)
+            except (OSError, ValueError):
+                return
+            if self.bookings_path:
+                try:
+                    catalog.attach_bookings(self.bookings_path)
+                except (OSError, ValueError, TypeError) as e:
+                    print(f"[WARNING] Hotel catalog without occupancy, bookings export unreadable: {e!r}")
+            self._catalog, self._signature = catalog, signature
+            self.reloads += 1
+
+    def stats(self) -> Optional[Dict]:
+        catalog = self._catalog
+        if catalog is None:
+            return None
+        return {
+            "rooms_path": self.rooms_path,
+            "hotels_path": self.hotels_path,
+            "hotels": len(catalog),
+            "room_types": catalog.room_types,
+            "bookings_path": self.bookings_path,
+            "occupancy": "hotel_bookings" if catalog.bookings is not None else "current",
+            "loaded_at": catalog.loaded_at,
+            "reloads": self.reloads
+        }
+
+
+def _file_signature(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(mtime, size) of an optional file, None if unset or missing"""
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+
+catalog_source = CatalogSource()
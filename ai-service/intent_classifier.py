@@ -0,0 +1,130 @@
+"""
+Intent Classifier - embedding nearest-centroid routing
+Catches paraphrases the keyword router misses ("what would it set me back
+for two nights") by comparing the message embedding with one centroid per
+intent, built from labelled example phrases at startup.
+
+Reuses the MiniLM HuggingFaceEmbeddings already loaded for Chroma, so it
+adds one embed_query per turn and no new model. Enable with
+AI_INTENT_CLASSIFIER=1; below AI_INTENT_THRESHOLD the caller falls back to
+keyword routing.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Labelled examples per intent; each class centroid is their mean embedding
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "negotiation": [
+        "How much is a room per night?",
+        "What would it set me back for two nights?",
+        "Can you do a better price on the deluxe room?",
+        "Is there any discount if we stay longer?",
+        "That's a bit over our budget, can you come down?",
+        "What's the rate for the family suite?",
+        "Could I get the standard room for 40 dollars?",
+        "How expensive is the cottage?",
+        "Any chance of a cheaper deal for the weekend?",
+        "What do you charge for a double room?",
+    ],
+    "recommendation": [
+        "Where should we eat dinner tonight?",
+        "Any good restaurants near the hotel?",
+        "What is there to do around Ella?",
+        "Can you suggest a hike for tomorrow morning?",
+        "Which sights are worth visiting nearby?",
+        "Where can I get a vegan lunch?",
+        "Plan a day out for us in the hills",
+        "Is Little Adam's Peak worth the walk?",
+    ],
+    "booking": [
+        "I'd like to reserve a room for next Friday",
+        "Do you have availability on the 12th?",
+        "Can I book two nights starting tomorrow?",
+        "Is the family suite free next weekend?",
+        "What time is check-in?",
+        "Can we check out late on Sunday?",
+        "Please hold a room for us for three nights",
+    ],
+    "general_info": [
+        "What time is breakfast served?",
+        "Do you have wifi in the rooms?",
+        "How do I get to the hotel from the train station?",
+        "Is parking available at the property?",
+        "Are pets allowed?",
+        "Do you offer airport transfers?",
+        "Is there hot water in the bathroom?",
+        "Can you tell me about the hotel?",
+    ],
+}
+
+DEFAULT_THRESHOLD = 0.45
+DEFAULT_MARGIN = 0.03
+
+
+def classifier_enabled() -> bool:
+    return os.environ.get("AI_INTENT_CLASSIFIER", "0") == "1"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid intent classifier over sentence embeddings
+
+    Centroids are L2-normalized, so classifying a message is one embed_query
+    plus a single (n_intents x dim) matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        examples: Dict[str, List[str]] = None,
+        threshold: Optional[float] = None,
+        margin: Optional[float] = None
+    ):
+        self.embeddings = embeddings
+        examples = examples or INTENT_EXAMPLES
+        self.threshold = float(threshold if threshold is not None
+                               else os.environ.get("AI_INTENT_THRESHOLD", DEFAULT_THRESHOLD))
+        self.margin = float(margin if margin is not None else DEFAULT_MARGIN)
+        self.labels: List[str] = list(examples)
+
+        # One batched embedding call for every example phrase
+        phrases = [phrase for label in self.labels for phrase in examples[label]]
+        vectors = _normalize(np.asarray(embeddings.embed_documents(phrases), dtype=np.float32))
+
+        centroids = []
+        start = 0
+        for label in self.labels:
+            count = len(examples[label])
+            centroids.append(vectors[start:start + count].mean(axis=0))
+            start += count
+        self.centroids = _normalize(np.stack(centroids))
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Cosine similarity of text to every intent centroid"""
+        similarities = self._similarities(text)
+        return {label: round(float(score), 4) for label, score in zip(self.labels, similarities)}
+
+    def _similarities(self, text: str) -> np.ndarray:
+        vector = _normalize(np.asarray(self.embeddings.embed_query(text), dtype=np.float32))
+        return self.centroids @ vector
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Best intent and its cosine score. The intent is None when the score
+        is below the threshold or too close to the runner-up to trust.
+        """
+        similarities = self._similarities(text)
+        order = np.argsort(similarities)[::-1]
+        best = float(similarities[order[0]])
+        runner_up = float(similarities[order[1]]) if len(order) > 1 else -1.0
+        if best < self.threshold or best - runner_up < self.margin:
+            return None, best
+        return self.labels[order[0]], best
@@ -0,0 +1,542 @@
+"""
+Inventory Holds - short-lived leases on rooms while a negotiation closes
+occupancy_current.md lists one Family Suite; two guests negotiating it at
+the same time could both be told "confirmed" by negotiation_node. Now an
+accepted price first places a hold: a lease on one unit of the room type
+for each night of the stay, expiring after AI_HOLD_TTL_S seconds unless
+released (abandoned negotiation) or renewed (the guest accepts again).
+A guest whose hold cannot be placed is told the room was just taken.
+
+Concurrency: held units are counted per (room type, night) and each
+counter is guarded by one of a fixed set of striped locks, so holds on
+different rooms or nights never contend and there is no global lock. A
+stay takes the locks of its nights in index order (no deadlocks), checks
+every night, then increments: O(nights) with O(1) work per night.
+
+Expiry: leases sit in a hashed timer wheel (one slot per AI_HOLD_TICK_S
+tick). A daemon reaper advances the wheel every tick and releases the
+leases of the slot it reaches, so reclaiming costs O(expiring) and an
+expired lease frees its unit within about a tick.
+
+Units per room type default to the "available" column of the occupancy
+snapshot (the same for every night).
+
+Stores (AI_HOLD_STORE):
+- "memory" (default): HoldManager above. Holds live in one process, so
+  with several workers each one would hand out the last room on its own;
+  api_server warns at startup when AI_WORKERS or WEB_CONCURRENCY is
+  above 1.
+- "sqlite": SqliteHoldManager, rows in the session SQLite file
+  (AI_HOLD_DB, else AI_SESSION_DB), for multi-worker deployments. Every
+  worker on the host sees the same holds, at the cost of one database
+  write transaction per hold (serialized by SQLite's write lock).
+Neither store is shared across hosts. get_hold_manager() builds the
+configured store on first use, so importing this module has no side
+effects.
+"""
+
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from occupancy_calendar import DateLike, default_capacity, stay_dates
+from occupancy_snapshot import occupancy_source
+
+HOLD_TTL_S = float(os.environ.get("AI_HOLD_TTL_S", "600"))
+HOLD_TICK_S = float(os.environ.get("AI_HOLD_TICK_S", "1.0"))
+
+
+class Hold(NamedTuple):
+    """One lease: a unit of room_type for each night, until expires_at"""
+    hold_id: str
+    holder: str                # session id of the guest
+    room_type: str
+    nights: Tuple[int, ...]    # date ordinals
+    price: Optional[float]     # agreed price per night
+    expires_at: float          # time.monotonic()
+
+
+def stay_nights(check_in: Optional[DateLike], check_out: Optional[DateLike]) -> Tuple[int, ...]:
+    """Date ordinals of the stay's nights; tonight without dates"""
+    if check_in is None:
+        first = date.today().toordinal()
+        return (first,)
+    if isinstance(check_in, (date, str)) and isinstance(check_out, (date, str, type(None))):
+        # Dates and ISO strings without a numpy round-trip (the hold path is hot)
+        first = (date.fromisoformat(check_in[:10]) if isinstance(check_in, str) else check_in).toordinal()
+        last = (date.fromisoformat(check_out[:10]) if isinstance(check_out, str) else check_out).toordinal() \
+            if check_out is not None else first + 1
+        return tuple(range(first, last)) if last > first else (first,)
+    stay = stay_dates(check_in, check_out)
+    return tuple(range(stay[0].toordinal(), stay[1].toordinal())) if stay else stay_nights(check_in, None)
+
+
+def snapshot_units(room_type: str, night: int) -> int:
+    """Units of room_type that can be held, from the occupancy snapshot"""
+    snapshot = occupancy_source.get()
+    if snapshot is not None and room_type in snapshot.rooms:
+        return snapshot.rooms[room_type].available
+    return default_capacity().get(room_type, 0)
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: a key due at time t sits in slot (t // tick_s) % slots
+
+    advance(now) walks the slots of every tick up to now and returns the
+    keys that are due; keys due in a later rotation, or later in the tick
+    now falls in, stay in their slot. That last tick is walked again on
+    the next advance().
+    Each slot has its own lock, so schedule() from many threads only
+    contends with the reaper on the same slot.
+    """
+
+    def __init__(self, tick_s: float = HOLD_TICK_S, slots: int = 512):
+        self.tick_s = tick_s
+        self._slots: List[Dict[str, float]] = [{} for _ in range(slots)]
+        self._locks = [threading.Lock() for _ in range(slots)]
+        self._current = int(time.monotonic() // tick_s)  # first tick the next advance() walks
+        self._advance_lock = threading.Lock()
+
+    def schedule(self, key: str, due: float):
+        # Never into a tick already walked, so a key is not skipped for a rotation
+        tick = max(int(due // self.tick_s), self._current)
+        slot = tick % len(self._slots)
+        with self._locks[slot]:
+            self._slots[slot][key] = due
+
+    def cancel(self, key: str, due: float):
+        """Best effort: an entry it misses is dropped by advance() once due"""
+        tick = max(int(due // self.tick_s), 0)
+        for slot in {tick % len(self._slots), (tick + 1) % len(self._slots)}:
+            with self._locks[slot]:
+                if self._slots[slot].pop(key, None) is not None:
+                    return
+
+    def advance(self, now: Optional[float] = None) -> List[str]:
+        """Keys due at or before now"""
+        now = time.monotonic() if now is None else now
+        due: List[str] = []
+        with self._advance_lock:
+            last = int(now // self.tick_s)
+            # More than a rotation behind: every slot once is enough
+            first = max(self._current, last - len(self._slots) + 1)
+            for tick in range(first, last + 1):
+                slot = tick % len(self._slots)
+                with self._locks[slot]:
+                    entries = self._slots[slot]
+                    expired = [key for key, when in entries.items() if when <= now]
+                    for key in expired:
+                        del entries[key]
+                due.extend(expired)
+            # now is inside tick last: keys due later in it are still to come
+            self._current = max(self._current, last)
+        return due
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self._slots)
+
+
+class HoldManager:
+    """
+    Room holds for live negotiations
+
+    hold() places or renews a guest's hold and returns it, or None when
+    some night has no unit left; release()/release_holder() free it early.
+    A guest has at most one hold: a new one replaces the previous.
+    """
+
+    def __init__(
+        self,
+        units: Optional[Callable[[str, int], int]] = None,
+        ttl_s: Optional[float] = None,
+        tick_s: Optional[float] = None,
+        stripes: int = 64,
+        wheel_slots: int = 512
+    ):
+        """
+        Args:
+            units: (room_type, night ordinal) -> units that can be held
+            ttl_s: lease length (AI_HOLD_TTL_S)
+            tick_s: timer wheel resolution (AI_HOLD_TICK_S)
+            stripes: number of locks the (room type, night) counters share
+        """
+        self.units = units or snapshot_units
+        self.ttl_s = HOLD_TTL_S if ttl_s is None else ttl_s
+        self.wheel = TimerWheel(HOLD_TICK_S if tick_s is None else tick_s, wheel_slots)
+        self._held: Dict[Tuple[str, int], int] = {}
+        self._holds: Dict[str, Hold] = {}
+        self._by_holder: Dict[str, str] = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Guard _by_holder; re-entrant as hold() releases the replaced hold under it
+        self._holder_locks = [threading.RLock() for _ in range(stripes)]
+        self.placed = self.rejected = self.expired = 0  # stats only, not exact under contention
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_lock = threading.Lock()
+
+    # --- Locking --------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, room_type: str, nights: Sequence[int]) -> Iterator[None]:
+        """Stripe locks of every night, taken in index order"""
+        locks = [self._locks[i] for i in sorted({hash((room_type, night)) % len(self._locks)
+                                                 for night in nights})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _holder_lock(self, holder: str) -> threading.RLock:
+        """Stripe lock of a guest's entry in _by_holder; taken before any night lock"""
+        return self._holder_locks[hash(holder) % len(self._holder_locks)]
+
+    # --- Holds ----------------------------------------------------------------
+
+    def hold(
+        self,
+        holder: str,
+        room_type: str,
+        check_in: Optional[DateLike] = None,
+        check_out: Optional[DateLike] = None,
+        price: Optional[float] = None
+    ) -> Optional[Hold]:
+        """
+        Hold one unit of room_type for the stay (tonight without dates)
+
+        The same guest asking again for the same room and nights renews the
+        lease; a different room or stay replaces their previous hold once
+        the new one is placed.
+        """
+        nights = stay_nights(check_in, check_out)
+
+        # One guest's accepts are serialized, so two can't each replace the same previous hold
+        with self._holder_lock(holder):
+            previous = self._holds.get(self._by_holder.get(holder, ""))
+            if previous is not None and previous.room_type == room_type and previous.nights == nights:
+                renewed = self._renew(previous, price)
+                if renewed is not None:
+                    return renewed
+
+            hold = Hold(uuid.uuid4().hex, holder, room_type, nights, price, time.monotonic() + self.ttl_s)
+            with self._locked(room_type, nights):
+                if any(self._held.get((room_type, night), 0) >= self.units(room_type, night)
+                       for night in nights):
+                    self.rejected += 1
+                    return None
+                for night in nights:
+                    self._held[(room_type, night)] = self._held.get((room_type, night), 0) + 1
+                self._holds[hold.hold_id] = hold
+            self._by_holder[holder] = hold.hold_id
+            self.wheel.schedule(hold.hold_id, hold.expires_at)
+            self.placed += 1
+            if previous is not None and previous.hold_id != hold.hold_id:
+                self.release(previous.hold_id)
+        self._start_reaper()
+        return hold
+
+    def _renew(self, hold: Hold, price: Optional[float]) -> Optional[Hold]:
+        """Extend a lease; None if it was released or expired meanwhile"""
+        renewed = hold._replace(price=price if price is not None else hold.price,
+                                expires_at=time.monotonic() + self.ttl_s)
+        # Under the hold's locks, like release(): never revives a freed hold
+        with self._locked(hold.room_type, hold.nights):
+            if hold.hold_id not in self._holds:
+                return None
+            self._holds[hold.hold_id] = renewed
+        self.wheel.cancel(hold.hold_id, hold.expires_at)
+        self.wheel.schedule(hold.hold_id, renewed.expires_at)
+        return renewed
+
+    def release(self, hold_id: str) -> bool:
+        """Free a hold; False if it was already released or expired"""
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return False
+        with self._locked(hold.room_type, hold.nights):
+            # Only the caller that removes the hold gives its units back
+            hold = self._holds.pop(hold_id, None)
+            if hold is None:
+                return False
+            for night in hold.nights:
+                key = (hold.room_type, night)
+                if self._held[key] > 1:
+                    self._held[key] -= 1
+                else:
+                    del self._held[key]
+        # After the night locks, never inside them (hold() takes the holder lock first)
+        with self._holder_lock(hold.holder):
+            if self._by_holder.get(hold.holder) == hold_id:
+                del self._by_holder[hold.holder]
+        self.wheel.cancel(hold_id, hold.expires_at)
+        return True
+
+    def release_holder(self, holder: str) -> bool:
+        """Free the guest's hold, if any"""
+        with self._holder_lock(holder):
+            hold_id = self._by_holder.get(holder)
+            return self.release(hold_id) if hold_id else False
+
+    def get(self, holder: str) -> Optional[Hold]:
+        hold_id = self._by_holder.get(holder)
+        return self._holds.get(hold_id) if hold_id else None
+
+    def available(self, room_type: str, check_in: Optional[DateLike] = None,
+                  check_out: Optional[DateLike] = None) -> int:
+        """Units of room_type that can still be held for every night of the stay"""
+        nights = stay_nights(check_in, check_out)
+        return min(self.units(room_type, night) - self._held.get((room_type, night), 0) for night in nights)
+
+    # --- Expiry ---------------------------------------------------------------
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Release the holds whose lease ran out; returns how many"""
+        now = time.monotonic() if now is None else now
+        released = 0
+        for hold_id in self.wheel.advance(now):
+            hold = self._holds.get(hold_id)
+            # A renewal may have moved the deadline after the key was taken off the wheel
+            if hold is not None and hold.expires_at <= now and self.release(hold_id):
+                released += 1
+        self.expired += released
+        return released
+
+    def _start_reaper(self):
+        if self._reaper is not None:
+            return
+        with self._reaper_lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="hold-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.wheel.tick_s)
+            try:
+                self.expire()
+            except Exception as e:
+                print(f"[WARNING] Hold reaper: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._holds),
+            "placed": self.placed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "ttl_s": self.ttl_s,
+            "tick_s": self.wheel.tick_s,
+            "store": "memory"
+        }
+
+
+
+class SqliteHoldManager:
+    """
+    Room holds shared by every worker process on the host
+
+    Same interface as HoldManager, with one row per held (room type,
+    night) in a SQLite file. hold() checks and inserts inside one
+    BEGIN IMMEDIATE transaction, so two workers placing holds on the last
+    unit are serialized by SQLite's write lock and only one succeeds.
+    Leases expire by their wall-clock deadline: expired rows are ignored
+    by every query and purged by the next hold(), so no reaper runs.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS room_holds (hold_id TEXT NOT NULL, holder TEXT NOT NULL,"
+        " room_type TEXT NOT NULL, night INTEGER NOT NULL, price REAL, expires_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS room_holds_night ON room_holds (room_type, night, expires_at)",
+        "CREATE INDEX IF NOT EXISTS room_holds_holder ON room_holds (holder)",
+        "CREATE INDEX IF NOT EXISTS room_holds_id ON room_holds (hold_id)",
+        "CREATE INDEX IF NOT EXISTS room_holds_expiry ON room_holds (expires_at)",
+    )
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        units: Optional[Callable[[str, int], int]] = None,
+        ttl_s: Optional[float] = None,
+        busy_timeout_ms: int = 30000
+    ):
+        """
+        Args:
+            path: SQLite file (AI_HOLD_DB, else the session file AI_SESSION_DB)
+            units: (room_type, night ordinal) -> units that can be held
+            ttl_s: lease length (AI_HOLD_TTL_S)
+        """
+        from session_checkpointer import DEFAULT_SQLITE_PATH, open_sqlite_connection
+
+        self.path = path or os.environ.get("AI_HOLD_DB") or os.environ.get("AI_SESSION_DB", DEFAULT_SQLITE_PATH)
+        self.units = units or snapshot_units
+        self.ttl_s = HOLD_TTL_S if ttl_s is None else ttl_s
+        self._conn = open_sqlite_connection(self.path, busy_timeout_ms)
+        self._conn.isolation_level = None  # transactions are explicit
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.Lock()  # one connection per process; SQLite serializes processes
+        self.placed = self.rejected = self.expired = 0  # this process only
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Write transaction; takes the database write lock up front"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _read(self, holder: str, now: float) -> Optional[Hold]:
+        rows = self._conn.execute(
+            "SELECT hold_id, room_type, night, price, expires_at FROM room_holds"
+            " WHERE holder = ? AND expires_at > ? ORDER BY night", (holder, now)).fetchall()
+        if not rows:
+            return None
+        hold_id, room_type, _, price, expires_at = rows[0]
+        return Hold(hold_id, holder, room_type, tuple(row[2] for row in rows), price, expires_at)
+
+    def hold(
+        self,
+        holder: str,
+        room_type: str,
+        check_in: Optional[DateLike] = None,
+        check_out: Optional[DateLike] = None,
+        price: Optional[float] = None
+    ) -> Optional[Hold]:
+        """Hold one unit of room_type for the stay; renews or replaces like HoldManager.hold()"""
+        nights = stay_nights(check_in, check_out)
+        now = time.time()
+        expires_at = now + self.ttl_s
+        with self._transaction():
+            self._conn.execute("DELETE FROM room_holds WHERE expires_at <= ?", (now,))
+            previous = self._read(holder, now)
+            if previous is not None and previous.room_type == room_type and previous.nights == nights:
+                price = price if price is not None else previous.price
+                self._conn.execute("UPDATE room_holds SET price = ?, expires_at = ? WHERE hold_id = ?",
+                                   (price, expires_at, previous.hold_id))
+                return previous._replace(price=price, expires_at=expires_at)
+
+            # The guest's own previous hold doesn't count: it is replaced in this transaction
+            held = dict(self._conn.execute(
+                "SELECT night, COUNT(*) FROM room_holds WHERE room_type = ? AND night BETWEEN ? AND ?"
+                " AND holder != ? GROUP BY night", (room_type, nights[0], nights[-1], holder)).fetchall())
+            if any(held.get(night, 0) >= self.units(room_type, night) for night in nights):
+                self.rejected += 1
+                return None
+            hold = Hold(uuid.uuid4().hex, holder, room_type, nights, price, expires_at)
+            self._conn.execute("DELETE FROM room_holds WHERE holder = ?", (holder,))
+            self._conn.executemany(
+                "INSERT INTO room_holds (hold_id, holder, room_type, night, price, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(hold.hold_id, holder, room_type, night, price, expires_at) for night in nights])
+        self.placed += 1
+        return hold
+
+    def release(self, hold_id: str) -> bool:
+        """Free a hold; False if it was already released or expired"""
+        with self._transaction():
+            cursor = self._conn.execute("DELETE FROM room_holds WHERE hold_id = ? AND expires_at > ?",
+                                        (hold_id, time.time()))
+        return cursor.rowcount > 0
+
+    def release_holder(self, holder: str) -> bool:
+        """Free the guest's hold, if any"""
+        with self._transaction():
+            cursor = self._conn.execute("DELETE FROM room_holds WHERE holder = ? AND expires_at > ?",
+                                        (holder, time.time()))
+        return cursor.rowcount > 0
+
+    def get(self, holder: str) -> Optional[Hold]:
+        with self._lock:
+            return self._read(holder, time.time())
+
+    def available(self, room_type: str, check_in: Optional[DateLike] = None,
+                  check_out: Optional[DateLike] = None) -> int:
+        """Units of room_type that can still be held for every night of the stay"""
+        nights = stay_nights(check_in, check_out)
+        with self._lock:
+            held = dict(self._conn.execute(
+                "SELECT night, COUNT(*) FROM room_holds WHERE room_type = ? AND night BETWEEN ? AND ?"
+                " AND expires_at > ? GROUP BY night", (room_type, nights[0], nights[-1], time.time())).fetchall())
+        return min(self.units(room_type, night) - held.get(night, 0) for night in nights)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Purge the holds whose lease ran out (time.time()); returns how many"""
+        now = time.time() if now is None else now
+        with self._transaction():
+            released = self._conn.execute(
+                "SELECT COUNT(DISTINCT hold_id) FROM room_holds WHERE expires_at <= ?", (now,)).fetchone()[0]
+            self._conn.execute("DELETE FROM room_holds WHERE expires_at <= ?", (now,))
+        self.expired += released
+        return released
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = self._conn.execute("SELECT COUNT(DISTINCT hold_id) FROM room_holds WHERE expires_at > ?",
+                                        (time.time(),)).fetchone()[0]
+        return {
+            "active": active,
+            "placed": self.placed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "ttl_s": self.ttl_s,
+            "store": "sqlite",
+            "path": self.path
+        }
+
+
+HOLD_STORES = ("sqlite", "memory")
+
+
+def create_hold_manager(store: Optional[str] = None):
+    """
+    Hold manager for AI_HOLD_STORE: "memory" (default, one worker; see
+    check_hold_store()) or "sqlite" (shared by every worker on the host)
+    """
+    store = (store or os.environ.get("AI_HOLD_STORE", "memory")).lower()
+    if store == "memory":
+        return HoldManager()
+    if store == "sqlite":
+        return SqliteHoldManager()
+    raise ValueError(f"Unknown AI_HOLD_STORE {store!r}; expected one of {', '.join(HOLD_STORES)}")
+
+
+def worker_count() -> int:
+    """Server worker processes, from WEB_CONCURRENCY (uvicorn/gunicorn) or AI_WORKERS"""
+    for name in ("AI_WORKERS", "WEB_CONCURRENCY"):
+        value = os.environ.get(name)
+        if value and value.strip().isdigit():
+            return int(value)
+    return 1
+
+
+def check_hold_store(manager=None) -> Optional[str]:
+    """Warning when in-process holds would be split across several workers, else None"""
+    manager = manager or get_hold_manager()
+    workers = worker_count()
+    if isinstance(manager, HoldManager) and workers > 1:
+        return (f"AI_HOLD_STORE=memory with {workers} workers: each worker holds rooms on its own, "
+                "so two guests can be confirmed the same last room. Use AI_HOLD_STORE=sqlite.")
+    return None
+
+
+_hold_manager = None
+_hold_manager_lock = threading.Lock()
+
+
+def get_hold_manager():
+    """The process's hold manager (AI_HOLD_STORE), created on first use"""
+    global _hold_manager
+    if _hold_manager is None:
+        with _hold_manager_lock:
+            if _hold_manager is None:
+                _hold_manager = create_hold_manager()
+    return _hold_manager
@@ -0,0 +1,226 @@
+"""
+Keyword Engine - compiled, word-boundary keyword matching for intent routing
+One pass over the message finds every keyword class it contains, replacing
+chains of any(word in text ...) substring scans (where "ok" matched "book"
+and "no" matched "know").
+
+Keyword syntax:
+- "room"       whole word only
+- "room*"      word stem: room, rooms, roomy...
+- "per night"  phrase: consecutive words
+- "$"          symbols match anywhere ("$50")
+"""
+
+from functools import reduce
+from itertools import compress, count
+from operator import or_
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Stripped from both ends of each whitespace-separated word
+_PUNCTUATION = "\"'`.,;:!?()[]{}<>/\\|*&^%$#@~=+_“”‘’"
+
+# Reserved low bit: "this word is part of a phrase keyword"
+_PHRASE_HEAD = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words with surrounding punctuation removed ("room," -> "room")"""
+    words = text.lower().replace("’", "'").split()
+    return [word.strip(_PUNCTUATION) for word in words]
+
+
+class _WordCache(dict):
+    """raw word -> bitmask; misses are resolved (and stored) by the matcher"""
+
+    def __init__(self, resolve):
+        super().__init__()
+        self._resolve = resolve
+
+    def __missing__(self, raw: str) -> int:
+        return self._resolve(raw)
+
+
+class KeywordMatcher:
+    """
+    Token hash table over a set of named keyword classes
+
+    Each class is one bit. A message is split on whitespace once and every
+    word is looked up in a cache of raw word -> bitmask (word and stem
+    matches, resolved on first sight), so the common case is a C-level
+    map/reduce over the words with no per-keyword work at all. Phrases are
+    only tried around words that belong to one, and symbol keywords are a
+    plain substring check.
+    """
+
+    def __init__(self, classes: Dict[str, Iterable[str]], cache_size: int = 20000):
+        self.classes = tuple(classes)
+        self._bits = {name: 1 << (i + 1) for i, name in enumerate(self.classes)}
+        self._words: Dict[str, int] = {}
+        self._stems: Dict[str, int] = {}
+        self._phrases: Dict[Tuple[str, ...], int] = {}
+        self._symbols: Dict[str, int] = {}
+
+        for name, keywords in classes.items():
+            for keyword in keywords:
+                self._add(self._bits[name], keyword)
+
+        self._stem_lengths = sorted({len(stem) for stem in self._stems})
+        # Each phrase is keyed on its longest (least common) word, so filler
+        # like "a" or "how" does not send every message down the phrase path
+        self._phrase_triggers: Dict[str, List[Tuple[int, Tuple[str, ...], int]]] = {}
+        for phrase, bit in self._phrases.items():
+            offset = max(range(len(phrase)), key=lambda i: len(phrase[i]))
+            self._phrase_triggers.setdefault(phrase[offset], []).append((offset, phrase, bit))
+        self._cache = _WordCache(self._resolve)
+        self._stripped: Dict[str, str] = {}
+        self._windows: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._cache_size = cache_size
+        self._by_bit = {bit: name for name, bit in self._bits.items()}
+        self._names: Dict[int, FrozenSet[str]] = {}
+
+    def _add(self, bit: int, keyword: str):
+        stem = keyword.endswith("*")
+        text = keyword.rstrip("*").lower()
+        if text and not any(char.isalnum() for char in text):
+            self._symbols[text] = self._symbols.get(text, 0) | bit
+            return
+
+        words = tokenize(text)
+        if not words or not all(words):
+            raise ValueError(f"Keyword {keyword!r} is not made of words")
+        if stem and len(words) > 1:
+            raise ValueError(f"Stem keyword {keyword!r} must be a single word")
+
+        if len(words) > 1:
+            self._phrases[tuple(words)] = self._phrases.get(tuple(words), 0) | bit
+        elif stem:
+            self._stems[words[0]] = self._stems.get(words[0], 0) | bit
+        else:
+            self._words[words[0]] = self._words.get(words[0], 0) | bit
+
+    def _resolve(self, raw: str) -> int:
+        """Bitmask for one whitespace-separated word, cached by its raw form"""
+        word = raw.strip(_PUNCTUATION)
+        mask = self._words.get(word, 0)
+        for length in self._stem_lengths:
+            if length > len(word):
+                break
+            mask |= self._stems.get(word[:length], 0)
+        if word in self._phrase_triggers:
+            mask |= _PHRASE_HEAD
+        if len(self._cache) < self._cache_size:
+            self._cache[raw] = mask
+            self._stripped[raw] = word
+        return mask
+
+    def _window(self, raw_window: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Stripped words of a phrase-sized window, cached by its raw form"""
+        words = self._windows.get(raw_window)
+        if words is None:
+            words = tuple(raw.strip(_PUNCTUATION) for raw in raw_window)
+            if len(self._windows) < self._cache_size:
+                self._windows[raw_window] = words
+        return words
+
+    def _phrase_mask(self, raw_words: List[str], masks: List[int]) -> int:
+        mask = 0
+        for i in compress(count(), map(_PHRASE_HEAD.__and__, masks)):
+            trigger = self._stripped.get(raw_words[i]) or raw_words[i].strip(_PUNCTUATION)
+            for offset, phrase, bit in self._phrase_triggers[trigger]:
+                start = i - offset
+                if start >= 0 and self._window(tuple(raw_words[start:start + len(phrase)])) == phrase:
+                    mask |= bit
+        return mask
+
+    def scan_mask(self, text: str) -> int:
+        """Bitmask of the keyword classes present in text (see bit())"""
+        raw_words = text.lower().replace("’", "'").split()
+        masks = list(map(self._cache.__getitem__, raw_words))
+        mask = reduce(or_, filter(None, masks), 0)
+        if mask & _PHRASE_HEAD:
+            mask |= self._phrase_mask(raw_words, masks)
+        for symbol, bit in self._symbols.items():
+            if symbol in text:
+                mask |= bit
+        return mask & ~_PHRASE_HEAD
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Names of every keyword class present in text"""
+        mask = self.scan_mask(text)
+        names = self._names.get(mask)
+        if names is None:
+            names = frozenset(self.names(mask))
+            if len(self._names) < self._cache_size:
+                self._names[mask] = names
+        return names
+
+    def names(self, mask: int) -> List[str]:
+        """Class names for a scan_mask() result, in declaration order"""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self._by_bit[low])
+            mask ^= low
+        return names
+
+    def bit(self, name: str) -> int:
+        return self._bits[name]
+
+
+# ============================================================================
+# SHARED INTENT VOCABULARY
+# ============================================================================
+
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "price": ["price*", "cost*", "expensive", "negotiat*", "discount*", "$", "deal*",
+              "offer*", "cheaper", "dollar*", "per night", "a night", "budget*",
+              "afford*", "how much", "rate", "rates"],
+    "room": ["room*", "suite*", "standard", "deluxe", "family", "cottage*", "stay*",
+             "night*", "book*", "accommodation*", "double", "triple", "presidential"],
+    "price_question": ["how much", "what's the price", "pricing"],
+    "offer_for": ["for"],
+    "recommendation": ["restaurant*", "dinner*", "lunch*", "eat", "eating", "food*",
+                       "activit*", "hike", "hikes", "hiking", "visit*", "recommend*",
+                       "things to do", "attraction*", "where can", "where to go",
+                       "itinerar*"],
+    "recommendation_context": ["near", "nearby", "close", "romantic", "vegan"],
+    "booking": ["book*", "reserv*", "availability", "available", "check-in",
+                "check-out", "check in", "check out"],
+    # Replies while a negotiation is active
+    "negotiation_reply": ["$", "deal", "ok", "okay", "fine", "accept*", "agree*", "yes",
+                          "dollar*", "no", "too high", "expensive", "forget it",
+                          "nevermind", "never mind"],
+    "accept": ["ok", "okay", "fine", "deal", "accept", "agree", "yes", "book it",
+               "i'll take"],
+    "abandon": ["forget it", "nevermind", "never mind", "cancel", "stop"],
+}
+
+intent_matcher = KeywordMatcher(INTENT_KEYWORDS)
+
+
+# ============================================================================
+# ENTRY-POINT VOCABULARIES
+# ============================================================================
+# AdvancedHotelChatbot and the Streamlit app keep the narrower lists they
+# always routed on. Each old substring keyword is a stem here, so "rooms"
+# and "discounted" still match; the only routing change is that a keyword
+# no longer matches inside another word ("eat" in "great", "room" in
+# "mushroom", "cost" in "accost").
+
+CHATBOT_INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "price": ["price*", "cost*", "expensive*", "negotiate*", "discount*", "$", "how much"],
+    "room": ["room*", "suite*", "standard*", "deluxe*", "presidential*"],
+    "recommendation": ["restaurant*", "dinner*", "lunch*", "eat*", "food*", "itinerary*",
+                       "where to go", "recommend*", "activity*"],
+    "recommendation_context": ["near*", "close*", "nearby*", "romantic*", "vegan*"],
+}
+
+STREAMLIT_INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "price": ["price*", "cost*", "expensive*", "negotiate*", "discount*", "$"],
+    "room": ["room*", "suite*", "standard*", "deluxe*", "presidential*"],
+    "recommendation": ["restaurant*", "dinner*", "lunch*", "eat*", "itinerary*", "recommend*"],
+    "recommendation_context": ["near*", "romantic*", "vegan*"],
+}
+
+chatbot_matcher = KeywordMatcher(CHATBOT_INTENT_KEYWORDS)
+streamlit_matcher = KeywordMatcher(STREAMLIT_INTENT_KEYWORDS)
@@ -10,16 +10,29 @@ Theoretical Foundations:
 - Human-Computer Interaction (HCI): Adaptive UI feedback via sentiment signals
 """
 
-from typing import TypedDict, Literal, Annotated, Optional, List, Dict, Any
+from typing import TypedDict, Literal, Annotated, Optional, List, Dict, Any, Callable, AsyncIterator, Tuple
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-import operator
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import functools
+import os
 import re
+import uuid
 
 # Import existing agents
 from negotiator_agent import NegotiatorAgent
 from sentiment_agent import SentimentAnalyzer
 from graphrag_engine import KnowledgeGraph, format_graph_context
+from session_checkpointer import BoundedCheckpointer, create_checkpointer
+from keyword_engine import intent_matcher
+from intent_classifier import IntentClassifier
+from mood_tracker import MoodState, mood_escalated, update_mood
+from slot_extractor import Slots, booking_summary, extract_slots
+from inventory_holds import Hold, get_hold_manager
+import fast_path
 
 
 # ============================================================================
@@ -34,6 +47,54 @@ class Message(TypedDict):
     timestamp: Optional[str]
 
 
+class HistorySummary(Message):
+    """Rolling summary record that stands in for turns folded out of the window"""
+    folded_count: int
+
+
+# History compaction: keep the last HISTORY_WINDOW messages verbatim and fold
+# anything older into one bounded summary record (0 disables compaction)
+HISTORY_WINDOW = int(os.environ.get("AI_HISTORY_WINDOW", "12"))
+SUMMARY_MAX_CHARS = int(os.environ.get("AI_HISTORY_SUMMARY_CHARS", "600"))
+SUMMARY_SNIPPET_CHARS = 80
+
+
+def compact_messages(existing: List[Message], new: List[Message]) -> List[Message]:
+    """
+    Reducer for ConversationState.messages
+    
+    Appends like operator.add, then keeps the history at no more than one
+    summary record plus HISTORY_WINDOW messages, so each checkpoint stores a
+    bounded transcript no matter how long the guest keeps chatting.
+    """
+    messages = (existing or []) + (new or [])
+    if HISTORY_WINDOW <= 0:
+        return messages
+    
+    summary = messages[0] if messages and messages[0]["role"] == "summary" else None
+    recent = messages[1:] if summary else messages
+    if len(recent) <= HISTORY_WINDOW:
+        return messages
+    
+    overflow = recent[:-HISTORY_WINDOW]
+    snippets = [
+        f"{m['role']}: {m['content'][:SUMMARY_SNIPPET_CHARS]}"
+        for m in overflow if m["role"] != "summary"
+    ]
+    text = " | ".join(([summary["content"]] if summary else []) + snippets)
+    if len(text) > SUMMARY_MAX_CHARS:
+        text = "..." + text[-(SUMMARY_MAX_CHARS - 3):]
+    
+    folded: HistorySummary = {
+        "role": "summary",
+        "content": text,
+        "sentiment": overflow[-1].get("sentiment"),
+        "timestamp": overflow[-1].get("timestamp"),
+        "folded_count": (summary["folded_count"] if summary else 0) + len(overflow)
+    }
+    return [folded] + recent[-HISTORY_WINDOW:]
+
+
 class NegotiationState(TypedDict):
     """Tracks multi-turn negotiation progress"""
     round: int
@@ -43,7 +104,9 @@ class NegotiationState(TypedDict):
     counter_offers: List[Dict]
     final_price: Optional[float]
     add_ons: List[str]
-    status: str  # "active", "accepted", "rejected", "abandoned"
+    status: str  # "active", "accepted", "rejected", "abandoned", "sold_out"
+    check_in: Optional[str]  # stay being negotiated (ISO dates), priced by its nights
+    check_out: Optional[str]
 
 
 class ConversationState(TypedDict):
@@ -52,7 +115,7 @@ class ConversationState(TypedDict):
     This is the 'memory' of the conversation.
     """
     # === Input ===
-    messages: Annotated[List[Message], operator.add]  # Conversation history
+    messages: Annotated[List[Message], compact_messages]  # Conversation history (windowed)
     user_input: str
     user_id: Optional[str]
     loyalty_status: str
@@ -63,9 +126,11 @@ class ConversationState(TypedDict):
     sentiment_score: float
     is_complaint: bool
     severity: str  # "critical", "severe", "moderate", "minor"
+    mood: MoodState  # Session mood across turns (persists across turns!)
     
     # === Intent Detection ===
     intent: str  # "negotiation", "complaint", "recommendation", "booking", "general_info"
+    slots: Optional[Slots]  # Room, price, dates, party size from this message (one scan)
     
     # === Negotiation State (persists across turns!) ===
     negotiation: NegotiationState
@@ -87,6 +152,7 @@ model = None
 negotiator: Optional[NegotiatorAgent] = None
 sentiment_analyzer: Optional[SentimentAnalyzer] = None
 knowledge_graph: Optional[KnowledgeGraph] = None
+intent_classifier: Optional[IntentClassifier] = None  # optional, see intent_classifier.py
 
 
 def initialize_workflow_agents(
@@ -94,15 +160,80 @@ def initialize_workflow_agents(
     llm,
     neg_agent: NegotiatorAgent,
     sent_analyzer: SentimentAnalyzer,
-    kg: KnowledgeGraph
+    kg: KnowledgeGraph,
+    intent_clf: Optional[IntentClassifier] = None
 ):
     """Initialize agents for the workflow - called by api_server.py"""
-    global db, model, negotiator, sentiment_analyzer, knowledge_graph
+    global db, model, negotiator, sentiment_analyzer, knowledge_graph, intent_classifier
     db = vector_db
     model = llm
     negotiator = neg_agent
     sentiment_analyzer = sent_analyzer
     knowledge_graph = kg
+    intent_classifier = intent_clf
+
+
+# Per-turn event sink, set only while a streaming turn runs: emit(event, data)
+_event_sink: ContextVar[Optional[Callable[[str, Dict], None]]] = ContextVar(
+    "workflow_event_sink", default=None
+)
+
+
+def generate_text(prompt: str) -> str:
+    """
+    Run the LLM on a prompt. During a streaming turn the tokens are forwarded
+    to the event sink as they arrive; otherwise this is a plain invoke.
+    """
+    emit = _event_sink.get()
+    with fast_path.llm_latency.track():
+        if emit is None or not hasattr(model, "stream"):
+            return model.invoke(prompt)
+        
+        chunks = []
+        for chunk in model.stream(prompt):
+            text = getattr(chunk, "content", chunk)  # chat models yield message chunks
+            if text:
+                chunks.append(text)
+                emit("token", {"text": text})
+        return "".join(chunks)
+
+
+# Speculative retrieval for the turn, started before sentiment/intent run
+_prefetch: ContextVar[Optional[Dict[str, Any]]] = ContextVar("rag_prefetch", default=None)
+
+# Set AI_SPECULATIVE_RETRIEVAL=0 to only search once a handler asks for it
+SPECULATIVE_RETRIEVAL = os.environ.get("AI_SPECULATIVE_RETRIEVAL", "1") != "0"
+
+
+@contextmanager
+def speculative_retrieval(user_input: str):
+    """
+    Start db.similarity_search(user_input) on the retrieval pool while the
+    turn runs sentiment analysis and intent routing. general_info_node picks
+    the result up through search_documents(); if the router sends the turn
+    anywhere else the search is cancelled or its result simply dropped.
+    """
+    future: Optional[Future] = None
+    if SPECULATIVE_RETRIEVAL and db is not None:
+        future = _retrieval_executor.submit(db.similarity_search, user_input, k=3)
+    token = _prefetch.set({"query": user_input, "k": 3, "future": future} if future else None)
+    try:
+        yield
+    finally:
+        _prefetch.reset(token)
+        if future is not None:
+            future.cancel()
+
+
+def search_documents(query: str, k: int = 3) -> List:
+    """db.similarity_search, reusing this turn's speculative search if it matches"""
+    prefetch = _prefetch.get()
+    if prefetch and prefetch["query"] == query and prefetch["k"] == k:
+        try:
+            return prefetch["future"].result()
+        except Exception:
+            pass  # fall through to a direct search
+    return db.similarity_search(query, k=k)
 
 
 # ============================================================================
@@ -124,15 +255,19 @@ def analyze_sentiment_node(state: ConversationState) -> Dict:
             "severity": "minor"
         }
     
-    # Analyze sentiment
-    sentiment, score = sentiment_analyzer.analyze_sentiment(user_input)
-    is_complaint = sentiment_analyzer.is_complaint(user_input)
-    severity = sentiment_analyzer.detect_issue_severity(user_input)
+    # Sentiment, complaint flag and severity in one pass over the text
+    report = sentiment_analyzer.analyze(user_input)
+    sentiment, score = report.sentiment, report.score
+    is_complaint, severity = report.is_complaint, report.severity
     
-    # Determine if crisis mode
+    # Fold this turn into the session mood (O(1), no transcript replay)
+    mood = update_mood(state.get("mood"), sentiment, score)
+    
+    # Determine if crisis mode: this message, or the conversation so far
     is_crisis = (
         sentiment == "angry" or 
-        (is_complaint and severity in ["critical", "severe"])
+        (is_complaint and severity in ["critical", "severe"]) or
+        mood_escalated(mood)
     )
     
     return {
@@ -140,67 +275,115 @@ def analyze_sentiment_node(state: ConversationState) -> Dict:
         "sentiment_score": score,
         "is_complaint": is_complaint,
         "severity": severity,
+        "mood": mood,
         "is_crisis_mode": is_crisis
     }
 
 
+_DIGIT = re.compile(r"\d")
+_ROOM_WORD = re.compile(r"\brooms?\b", re.IGNORECASE)
+
+
 def detect_intent_node(state: ConversationState) -> Dict:
     """
     Node 2: Detect user intent for routing
     Uses keywords and context to determine what the user wants
     """
-    user_input = state["user_input"].lower()
+    user_input = state["user_input"]
     is_complaint = state.get("is_complaint", False)
     
+    # Every keyword class in the message, found in one pass, and the slots
+    # (shared with the handlers through the state)
+    found = intent_matcher.scan(user_input)
+    slots = extract_slots(user_input)
+    
+    def routed(intent: str) -> Dict:
+        return {"intent": intent, "slots": slots}
+    
     # Check if this is a continuation of negotiation
     negotiation_state = state.get("negotiation", {})
     if negotiation_state.get("status") == "active":
         # Look for price mentions or acceptance/rejection
-        if any(word in user_input for word in ["$", "deal", "ok", "fine", "accept", "agree", "yes", "dollars"]):
-            return {"intent": "negotiation"}
-        if any(word in user_input for word in ["no", "too high", "expensive", "forget it", "nevermind"]):
-            return {"intent": "negotiation"}
-    
-    # Negotiation intent - check for price-related words with room context
-    price_words = ["price", "cost", "expensive", "negotiate", "discount", "$", "deal", 
-                   "offer", "cheaper", "dollars", "per night", "a night", "budget", 
-                   "afford", "how much", "rate", "rates"]
-    room_words = ["room", "suite", "standard", "deluxe", "family", "cottage", "stay", 
-                  "night", "book", "accommodation", "double", "triple"]
-    
-    has_price_context = any(word in user_input for word in price_words)
-    has_room_context = any(word in user_input for word in room_words)
+        if "negotiation_reply" in found or slots["price"] is not None:
+            return routed("negotiation")
     
-    # Also check for patterns like "can I get ... for ..."
-    has_offer_pattern = ("for" in user_input and any(c.isdigit() for c in user_input))
-    
-    if has_price_context and (has_room_context or has_offer_pattern):
-        return {"intent": "negotiation"}
+    # Embedding classifier, when enabled; keywords below its threshold
+    if intent_classifier is not None:
+        try:
+            predicted, _ = intent_classifier.classify(user_input)
+        except Exception:
+            predicted = None  # keyword routing below
+        if predicted is not None:
+            if is_complaint and (predicted == "general_info"
+                                 or state.get("severity") in ["critical", "severe"]):
+                return routed("complaint")
+            return routed(predicted)
+    
+    # Negotiation intent - price-related words with room context,
+    # or patterns like "can I get ... for ..."
+    has_offer_pattern = "offer_for" in found and _DIGIT.search(user_input) is not None
+    
+    if "price" in found and ("room" in found or has_offer_pattern):
+        return routed("negotiation")
+    
+    # An offer for a specific room ("deluxe, 80 USD?")
+    if slots["price"] is not None and slots["room_type"] is not None:
+        return routed("negotiation")
     
     # Direct price questions
-    if "how much" in user_input or "what's the price" in user_input or "pricing" in user_input:
-        return {"intent": "negotiation"}
+    if "price_question" in found:
+        return routed("negotiation")
     
     # Complaint takes priority if flagged
     if is_complaint and state.get("severity") in ["critical", "severe"]:
-        return {"intent": "complaint"}
+        return routed("complaint")
     
     # Recommendation intent
-    if any(word in user_input for word in ["restaurant", "dinner", "lunch", "eat", "food", 
-                                            "activity", "hike", "visit", "recommend", 
-                                            "things to do", "attractions", "where can"]):
-        return {"intent": "recommendation"}
+    if "recommendation" in found:
+        return routed("recommendation")
     
     # Booking intent
-    if any(word in user_input for word in ["book", "reserve", "availability", "check-in", 
-                                            "check-out", "available"]):
-        return {"intent": "booking"}
+    if "booking" in found:
+        return routed("booking")
     
     # Complaint (lower priority)
     if is_complaint:
-        return {"intent": "complaint"}
+        return routed("complaint")
     
-    return {"intent": "general_info"}
+    return routed("general_info")
+
+
+def _holder(state: ConversationState) -> Optional[str]:
+    """Whose room hold this is: the session, else the user; None for an anonymous guest"""
+    return state.get("session_id") or state.get("user_id")
+
+
+def _hold_room(state: ConversationState, room_type: str, stay: Dict,
+               price: Optional[float]) -> Tuple[bool, Optional[Hold]]:
+    """
+    Hold a unit for the stay before confirming a price: (available, hold)
+
+    An anonymous guest's turn runs on a throwaway thread, so nothing could
+    ever renew or release their hold; they only get an availability check.
+    """
+    holder = _holder(state)
+    if holder is None:
+        return get_hold_manager().available(room_type, stay.get("check_in"), stay.get("check_out")) > 0, None
+    hold = get_hold_manager().hold(holder, room_type, stay.get("check_in"), stay.get("check_out"), price)
+    return hold is not None, hold
+
+
+def _hold_metadata(hold: Hold) -> Dict:
+    return {"hold_id": hold.hold_id, "hold_expires_in_s": get_hold_manager().ttl_s}
+
+
+def _sold_out(neg_state: Dict, room_type: str, current_round: int) -> Dict:
+    """Another guest holds the last unit: don't confirm"""
+    return {
+        "response": f"I'm so sorry, another guest has just taken the last {room_type} room for those dates. Would you like me to check another room type or different dates?",
+        "negotiation": {**neg_state, "room_type": room_type, "status": "sold_out", "round": current_round},
+        "response_metadata": {"negotiation_ended": True, "reason": "sold_out"}
+    }
 
 
 def negotiation_node(state: ConversationState) -> Dict:
@@ -227,8 +410,13 @@ def negotiation_node(state: ConversationState) -> Dict:
     current_round = neg_state.get("round", 0) + 1
     counter_offers = neg_state.get("counter_offers", []).copy()
     
+    found = intent_matcher.scan(user_input)
+    
     # Check for abandonment signals
-    if any(word in user_input.lower() for word in ["forget it", "nevermind", "cancel", "stop"]):
+    if "abandon" in found:
+        holder = _holder(state)
+        if holder is not None:
+            get_hold_manager().release_holder(holder)
         return {
             "response": "No problem! If you change your mind about the room, just let me know. Is there anything else I can help you with?",
             "negotiation": {
@@ -240,10 +428,14 @@ def negotiation_node(state: ConversationState) -> Dict:
         }
     
     # Check for acceptance
-    if any(word in user_input.lower() for word in ["ok", "fine", "deal", "accept", "agree", "yes", "book it", "i'll take"]):
+    if "accept" in found:
         last_offer = counter_offers[-1] if counter_offers else None
         if last_offer and last_offer.get("counter_offer"):
             final_price = last_offer["counter_offer"]
+            held_room = neg_state.get("room_type") or "standard"
+            available, hold = _hold_room(state, held_room, neg_state, final_price)
+            if not available:
+                return _sold_out(neg_state, held_room, current_round)
             return {
                 "response": f"Wonderful! The {neg_state.get('room_type', 'room')} at ${final_price}/night is confirmed! Renu and Nalaka are excited to welcome you. Please let us know your check-in date!",
                 "negotiation": {
@@ -252,7 +444,8 @@ def negotiation_node(state: ConversationState) -> Dict:
                     "final_price": final_price,
                     "round": current_round
                 },
-                "response_metadata": {"negotiation_ended": True, "final_price": final_price}
+                "response_metadata": {"negotiation_ended": True, "final_price": final_price,
+                                      **(_hold_metadata(hold) if hold else {})}
             }
     
     # Extract room type and price from user input
@@ -263,25 +456,34 @@ def negotiation_node(state: ConversationState) -> Dict:
             "response_metadata": {"error": "negotiator_unavailable"}
         }
     
-    extracted = negotiator.extract_room_type_and_price(user_input)
-    
-    if not extracted or extracted[1] is None:
-        # No price found - prompt for details
-        room_type = neg_state.get("room_type")
+    # Slots from detect_intent_node; a room or stay named in an earlier
+    # round still applies when this message only has the price
+    slots = state.get("slots")
+    if slots is None:
+        slots = extract_slots(user_input)
+    room_type = slots["room_type"] or neg_state.get("room_type")
+    if room_type is None and _ROOM_WORD.search(user_input):
+        room_type = "standard"  # "a room" without a type
+    check_in = slots["check_in"] or neg_state.get("check_in")
+    check_out = slots["check_out"] if slots["check_in"] else neg_state.get("check_out")
+    stay = {"check_in": check_in, "check_out": check_out}
+    guest_offer = slots["price"]
+    
+    if guest_offer is None or room_type is None:
+        # No offer yet - keep what we learned and prompt for the rest
         if room_type:
             return {
                 "response": f"For the {room_type} room, what price per night did you have in mind?",
-                "negotiation": {**neg_state, "round": current_round, "status": "active"},
+                "negotiation": {**neg_state, **stay, "room_type": room_type,
+                                "round": current_round, "status": "active"},
                 "response_metadata": {"awaiting": "price_offer"}
             }
         return {
             "response": "I'd be happy to discuss room pricing! We have:\n\n• **Standard Room** - from $50/night (mountain view)\n• **Deluxe Room** - from $80/night (sunrise view + balcony)\n• **Family Suite** - from $115/night (extra space)\n\nWhich room interests you, and what's your budget?",
-            "negotiation": {**neg_state, "round": current_round, "status": "active"},
+            "negotiation": {**neg_state, **stay, "round": current_round, "status": "active"},
             "response_metadata": {"awaiting": "room_and_price"}
         }
     
-    room_type, guest_offer = extracted
-    
     # Update negotiation state
     if neg_state.get("initial_offer") is None:
         neg_state["initial_offer"] = guest_offer
@@ -289,8 +491,15 @@ def negotiation_node(state: ConversationState) -> Dict:
     neg_state["room_type"] = room_type
     neg_state["status"] = "active"
     
-    # Get negotiation result from agent
-    result = negotiator.negotiate_price(room_type, guest_offer, loyalty_status)
+    # Get negotiation result from agent (priced for the stay's nights when known)
+    result = negotiator.negotiate_price(room_type, guest_offer, loyalty_status, check_in, check_out)
+    
+    # An accepted price holds the room first, so two guests can't both get the last unit
+    hold = None
+    if result["decision"] == "accept":
+        available, hold = _hold_room(state, room_type, stay, result.get("final_price"))
+        if not available:
+            return _sold_out({**neg_state, **stay}, room_type, current_round)
     
     # Track this round
     counter_offers.append({
@@ -301,20 +510,20 @@ def negotiation_node(state: ConversationState) -> Dict:
         "add_ons": result.get("add_ons", [])
     })
     
-    # Generate response using LLM if available
+    # Rephrase the negotiator's message with the LLM unless the fast path answers
     response_text = result["message"]
+    tier = {"response_tier": fast_path.TIER_TEMPLATE}
     
-    if model is not None:
-        try:
-            system_prompt = negotiator.generate_system_prompt({
-                "room_type": room_type,
-                "base_price": negotiator.base_prices.get(room_type),
-                "minimum_price": negotiator.minimum_prices.get(room_type),
-                "occupancy_tier": result.get("occupancy_tier", 1),
-                "occupancy_rate": result.get("occupancy_rate", 0.25)
-            })
-            
-            prompt = f"""{system_prompt}
+    def rephrase() -> str:
+        system_prompt = negotiator.generate_system_prompt({
+            "room_type": room_type,
+            "base_price": negotiator.base_prices.get(room_type),
+            "minimum_price": negotiator.minimum_prices.get(room_type),
+            "occupancy_tier": result.get("occupancy_tier", 1),
+            "occupancy_rate": result.get("occupancy_rate", 0.25)
+        })
+        
+        prompt = f"""{system_prompt}
 
 NEGOTIATION ROUND: {current_round}
 DECISION: {result['decision'].upper()}
@@ -324,11 +533,13 @@ Room: {room_type}
 Negotiation Result: {result['message']}
 
 Respond naturally as if talking to a guest. Be warm and personable. Keep it conversational - 2-3 sentences max."""
-            
-            response_text = model.invoke(prompt)
-        except Exception as e:
-            # Fall back to template response
-            response_text = result["message"]
+        
+        return generate_text(prompt)
+    
+    if model is not None:
+        response_text, tier = fast_path.answer(
+            "negotiation", result["message"], rephrase, decision=result["decision"]
+        )
     
     # Determine final state
     final_status = "active"
@@ -338,7 +549,7 @@ Respond naturally as if talking to a guest. Be warm and personable. Keep it conv
     if result["decision"] == "accept":
         final_status = "accepted"
         final_price = result.get("final_price")
-    elif result["decision"] == "reject" and current_round >= 3:
+    elif result["decision"] == "reject" and current_round >= negotiator.FINAL_REJECT_ROUND:
         final_status = "rejected"
     
     return {
@@ -351,12 +562,15 @@ Respond naturally as if talking to a guest. Be warm and personable. Keep it conv
             "counter_offers": counter_offers,
             "final_price": final_price,
             "add_ons": add_ons,
-            "status": final_status
+            "status": final_status,
+            **stay
         },
         "response_metadata": {
             "decision": result["decision"],
             "occupancy_rate": result.get("occupancy_rate"),
-            "loyalty_applied": loyalty_status != "none"
+            "loyalty_applied": loyalty_status != "none",
+            **(_hold_metadata(hold) if hold else {}),
+            **tier
         }
     }
 
@@ -427,17 +641,19 @@ AVAILABLE POLICIES:
 
 Respond with empathy and offer concrete solutions. Remember this is Cloudy Hill Cottage in Ella, Sri Lanka, run by Renu & Nalaka. Keep response concise but caring - 3-4 sentences."""
 
-    try:
-        response_text = model.invoke(prompt)
-    except:
-        response_text = f"I'm truly sorry about this. Let me help make this right. Please speak with Renu or Nalaka at +94 77 123 4567 - they'll take care of you personally."
+    response_text, tier = fast_path.answer(
+        "complaint",
+        "I'm truly sorry about this. Let me help make this right. Please speak with Renu or Nalaka at +94 77 123 4567 - they'll take care of you personally.",
+        lambda: generate_text(prompt)
+    )
     
     return {
         "response": response_text,
         "needs_human_escalation": False,
         "response_metadata": {
             "complaint_severity": severity,
-            "sentiment": sentiment
+            "sentiment": sentiment,
+            **tier
         }
     }
 
@@ -505,16 +721,14 @@ Provide personalized recommendations. Include:
 
 Be warm and conversational, like advice from a friend. Keep it concise - no more than 4-5 sentences."""
 
-    try:
-        response_text = model.invoke(prompt)
-    except:
-        response_text = graph_context
+    response_text, tier = fast_path.answer("recommendation", graph_context, lambda: generate_text(prompt))
     
     return {
         "response": response_text,
         "response_metadata": {
             "source": "graphrag",
-            "recommendations_count": len(recommendations)
+            "recommendations_count": len(recommendations),
+            **tier
         }
     }
 
@@ -527,15 +741,18 @@ def general_info_node(state: ConversationState) -> Dict:
     user_input = state["user_input"]
     sentiment = state.get("sentiment", "neutral")
     
+    # Booking requests: what the guest already told us (dates, room, party size)
+    stay = booking_summary(state.get("slots")) if state.get("intent") == "booking" else ""
+    
     if db is None or model is None:
         return {
             "response": "Feel free to ask Renu or Nalaka directly - they're always happy to help! Reach them at +94 77 123 4567.",
             "response_metadata": {"fallback": True}
         }
     
-    # Search RAG database
+    # Search RAG database (usually already in flight, see speculative_retrieval)
     try:
-        results = db.similarity_search(user_input, k=3)
+        results = search_documents(user_input, k=3)
     except:
         results = []
     
@@ -554,6 +771,8 @@ def general_info_node(state: ConversationState) -> Dict:
     elif sentiment in ["negative", "angry"]:
         tone_instruction = "The guest seems frustrated - be extra helpful and understanding."
     
+    stay_instruction = f"The guest wants to book: {stay}. Don't ask again for details they already gave." if stay else ""
+    
     prompt = f"""You are a friendly staff member at Cloudy Hill Cottage, a cozy homestay in Ella, Sri Lanka run by Renu and Nalaka.
 
 Hotel Information:
@@ -562,17 +781,19 @@ Hotel Information:
 Guest Question: {user_input}
 
 {tone_instruction}
+{stay_instruction}
 
 Respond naturally and warmly, as if you're chatting with a guest over tea. Don't mention "context" or "information provided". Keep it brief - 2-3 sentences unless they asked for details."""
 
-    try:
-        response_text = model.invoke(prompt)
-    except:
-        response_text = f"Based on what I know: {results[0].page_content[:200]}... Feel free to ask Renu for more details!"
+    response_text, tier = fast_path.answer(
+        state.get("intent", "general_info"),
+        f"Based on what I know: {results[0].page_content[:200]}... Feel free to ask Renu for more details!",
+        lambda: generate_text(prompt)
+    )
     
     return {
         "response": response_text,
-        "response_metadata": {"source": "rag", "docs_used": len(results)}
+        "response_metadata": {"source": "rag", "docs_used": len(results), **tier}
     }
 
 
@@ -612,6 +833,12 @@ def route_by_intent(state: ConversationState) -> Literal["negotiation", "complai
     if is_crisis and is_complaint:
         return "complaint"
     
+    # A guest whose mood is escalated and not improving keeps talking to the
+    # complaint handler, even when this message alone reads as small talk
+    mood = state.get("mood")
+    if intent == "general_info" and mood_escalated(mood) and mood["trend"] <= 0:
+        return "complaint"
+    
     # Map intent to node
     intent_map = {
         "negotiation": "negotiation",
@@ -710,12 +937,14 @@ def create_hotel_workflow() -> StateGraph:
     return workflow
 
 
-def compile_workflow(use_memory: bool = True):
+def compile_workflow(use_memory: bool = True, checkpointer: Optional[BaseCheckpointSaver] = None):
     """
     Compile the workflow with optional memory checkpoint
     
     Args:
         use_memory: If True, enables conversation persistence across turns
+        checkpointer: Checkpoint backend to use; defaults to the one selected
+                      by $AI_CHECKPOINTER (see session_checkpointer.py)
     
     Returns:
         Compiled LangGraph workflow
@@ -723,9 +952,8 @@ def compile_workflow(use_memory: bool = True):
     workflow = create_hotel_workflow()
     
     if use_memory:
-        # MemorySaver enables multi-turn conversations
-        memory = MemorySaver()
-        return workflow.compile(checkpointer=memory)
+        # The checkpointer enables multi-turn conversations
+        return workflow.compile(checkpointer=checkpointer or create_checkpointer())
     else:
         return workflow.compile()
 
@@ -733,6 +961,24 @@ def compile_workflow(use_memory: bool = True):
 # Create the compiled workflow (with memory by default)
 hotel_workflow = compile_workflow(use_memory=True)
 
+# Same graph without a checkpointer, for requests that carry no session id
+stateless_workflow = compile_workflow(use_memory=False)
+
+# Checkpoint durability. The graph is a fixed pipeline, so per-node
+# checkpoints buy nothing: "end_of_turn" keeps intermediate state in memory
+# and commits one checkpoint when format_response finishes (a worker that dies
+# mid-turn leaves the session as it was, and the retried turn simply replays).
+# "per_node" is LangGraph's default of persisting after every superstep.
+CHECKPOINT_MODE = os.environ.get("AI_CHECKPOINT_MODE", "end_of_turn")
+_DURABILITY = {"end_of_turn": "exit", "per_node": "async"}
+
+
+def _durability(workflow) -> Optional[str]:
+    """Durability for a run; None for the stateless graph, which has nothing to persist"""
+    if workflow.checkpointer is None:
+        return None
+    return _DURABILITY.get(CHECKPOINT_MODE, "exit")
+
 
 # ============================================================================
 # CONVENIENCE FUNCTIONS
@@ -747,8 +993,12 @@ def create_initial_state(
 ) -> ConversationState:
     """
     Create initial state for a new message
+    
+    Only per-turn fields are set here. Anything that must carry over between
+    turns (the negotiation, the mood) is left out unless given explicitly, because input
+    values overwrite what the checkpointer restored for this thread.
     """
-    return {
+    state = {
         "messages": [{"role": "user", "content": user_input, "sentiment": None, "timestamp": None}],
         "user_input": user_input,
         "user_id": user_id,
@@ -759,38 +1009,91 @@ def create_initial_state(
         "is_complaint": False,
         "severity": "minor",
         "intent": "general_info",
-        "negotiation": existing_negotiation or {
-            "round": 0,
-            "room_type": None,
-            "initial_offer": None,
-            "current_offer": None,
-            "counter_offers": [],
-            "final_price": None,
-            "add_ons": [],
-            "status": "inactive"
-        },
+        "slots": None,
         "response": "",
         "is_crisis_mode": False,
         "needs_human_escalation": False,
         "response_metadata": {}
     }
+    if existing_negotiation is not None:
+        state["negotiation"] = existing_negotiation
+    return state
 
 
-async def process_message(
+# ============================================================================
+# TURN EXECUTION (off the event loop)
+# ============================================================================
+
+# Every node calls blocking code (Ollama HTTP, Chroma search), so turns run on
+# a bounded worker pool instead of the uvicorn event loop. The pool size caps
+# how many turns are in flight; extra turns queue here, not on the loop.
+MAX_CONCURRENT_TURNS = int(os.environ.get("AI_MAX_CONCURRENT_TURNS", "4"))
+
+_turn_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_TURNS,
+    thread_name_prefix="workflow-turn"
+)
+
+# One speculative search per in-flight turn
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_TURNS,
+    thread_name_prefix="rag-prefetch"
+)
+
+
+def configure_turn_pool(max_workers: int):
+    """Resize the worker pools used by process_message; api_server calls it at startup"""
+    global _turn_executor, _retrieval_executor, MAX_CONCURRENT_TURNS
+    max_workers = max(1, int(max_workers))
+    if max_workers == MAX_CONCURRENT_TURNS:
+        return
+    old_executors = (_turn_executor, _retrieval_executor)
+    MAX_CONCURRENT_TURNS = max_workers
+    _turn_executor = ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_TURNS,
+        thread_name_prefix="workflow-turn"
+    )
+    _retrieval_executor = ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_TURNS,
+        thread_name_prefix="rag-prefetch"
+    )
+    for executor in old_executors:
+        executor.shutdown(wait=False)
+
+
+EPHEMERAL_PREFIX = "ephemeral-"
+
+
+def _workflow_for(config: Dict):
+    """
+    Anonymous requests run on the checkpoint-free workflow: nobody can resume
+    their thread, so persisting it would only fill the session store.
+    """
+    if config["configurable"]["thread_id"].startswith(EPHEMERAL_PREFIX):
+        return stateless_workflow
+    return hotel_workflow
+
+
+def session_store_stats() -> Dict:
+    """Live session counts and bytes for the admin endpoint"""
+    checkpointer = hotel_workflow.checkpointer
+    if isinstance(checkpointer, BoundedCheckpointer):
+        return {"bounded": True, **checkpointer.stats()}
+    return {"bounded": False, "backend": type(checkpointer).__name__ if checkpointer else None}
+
+
+def _turn_inputs(
     user_input: str,
     user_id: str = None,
     loyalty_status: str = "none",
     session_id: str = None
-) -> Dict:
-    """
-    Process a single message through the workflow
-    
-    This is the main entry point for the API server
-    """
-    # Create config for this conversation
+) -> Tuple[Dict, ConversationState]:
+    """Build the LangGraph config and initial state for one turn"""
+    # Create config for this conversation. Anonymous requests get a
+    # throwaway thread instead of all sharing one, see _workflow_for.
     config = {
         "configurable": {
-            "thread_id": session_id or user_id or "default"
+            "thread_id": session_id or user_id or f"{EPHEMERAL_PREFIX}{uuid.uuid4().hex}"
         }
     }
     
@@ -801,29 +1104,194 @@ async def process_message(
         loyalty_status=loyalty_status,
         session_id=session_id
     )
+    return config, initial_state
+
+
+def _turn_result(result: Dict) -> Dict:
+    """Shape the final workflow state into the API response payload"""
+    return {
+        "response": result.get("response", "I'm here to help!"),
+        "sentiment": result.get("sentiment", "neutral"),
+        "sentiment_score": result.get("sentiment_score", 0.0),
+        "intent": result.get("intent", "general_info"),
+        "is_crisis_mode": result.get("is_crisis_mode", False),
+        "needs_human_escalation": result.get("needs_human_escalation", False),
+        "negotiation_data": result.get("negotiation"),
+        # Handlers without an LLM step answer straight from a template
+        "metadata": {
+            "response_tier": fast_path.TIER_TEMPLATE,
+            **result.get("response_metadata", {}),
+            "mood": result.get("mood"),
+            "slots": result.get("slots")
+        }
+    }
+
+
+def _error_result(error: Exception) -> Dict:
+    """Fallback payload when the workflow raises"""
+    return {
+        "response": f"I apologize, but I encountered an issue. Please contact us directly at +94 77 123 4567.",
+        "sentiment": "neutral",
+        "sentiment_score": 0.0,
+        "intent": "error",
+        "is_crisis_mode": False,
+        "needs_human_escalation": False,
+        "negotiation_data": None,
+        "metadata": {"error": str(error)}
+    }
+
+
+def run_turn(
+    user_input: str,
+    user_id: str = None,
+    loyalty_status: str = "none",
+    session_id: str = None
+) -> Dict:
+    """
+    Process a single message through the workflow (blocking)
+    
+    Runs on a worker thread; use process_message from async code.
+    """
+    config, initial_state = _turn_inputs(user_input, user_id, loyalty_status, session_id)
     
     # Run the workflow
     try:
-        result = hotel_workflow.invoke(initial_state, config)
-        
-        return {
-            "response": result.get("response", "I'm here to help!"),
-            "sentiment": result.get("sentiment", "neutral"),
-            "sentiment_score": result.get("sentiment_score", 0.0),
-            "intent": result.get("intent", "general_info"),
-            "is_crisis_mode": result.get("is_crisis_mode", False),
-            "needs_human_escalation": result.get("needs_human_escalation", False),
-            "negotiation_data": result.get("negotiation"),
-            "metadata": result.get("response_metadata", {})
-        }
+        with speculative_retrieval(user_input):
+            workflow = _workflow_for(config)
+            result = workflow.invoke(initial_state, config, durability=_durability(workflow))
+        return _turn_result(result)
     except Exception as e:
-        return {
-            "response": f"I apologize, but I encountered an issue. Please contact us directly at +94 77 123 4567.",
-            "sentiment": "neutral",
-            "sentiment_score": 0.0,
-            "intent": "error",
-            "is_crisis_mode": False,
-            "needs_human_escalation": False,
-            "negotiation_data": None,
-            "metadata": {"error": str(e)}
-        }
+        return _error_result(e)
+
+
+def run_turn_streaming(
+    emit: Callable[[str, Dict], None],
+    user_input: str,
+    user_id: str = None,
+    loyalty_status: str = "none",
+    session_id: str = None
+):
+    """
+    Process a single message, reporting progress through emit(event, data)
+    
+    Events, in order:
+        metadata - sentiment and intent, as soon as detect_intent finishes
+        token    - LLM output chunks (one chunk with the whole reply if the
+                   handler answered without the LLM)
+        done     - the full response payload, including the negotiation state
+    
+    If the LLM fails mid-stream the handler falls back to a template reply;
+    the "done" payload always carries the authoritative response text.
+    """
+    config, initial_state = _turn_inputs(user_input, user_id, loyalty_status, session_id)
+    streamed = False
+    
+    def emit_token(event: str, data: Dict):
+        nonlocal streamed
+        streamed = True
+        emit(event, data)
+    
+    sink_token = _event_sink.set(emit_token)
+    try:
+        # Merge node updates as they arrive; message history is not echoed back
+        final_state = dict(initial_state)
+        workflow = _workflow_for(config)
+        with speculative_retrieval(user_input):
+            for update in workflow.stream(
+                initial_state, config, stream_mode="updates", durability=_durability(workflow)
+            ):
+                for node_name, node_update in update.items():
+                    if node_update:
+                        final_state.update({k: v for k, v in node_update.items() if k != "messages"})
+                    if node_name == "detect_intent":
+                        emit("metadata", {
+                            "sentiment": final_state.get("sentiment", "neutral"),
+                            "sentiment_score": final_state.get("sentiment_score", 0.0),
+                            "is_complaint": final_state.get("is_complaint", False),
+                            "severity": final_state.get("severity", "minor"),
+                            "is_crisis_mode": final_state.get("is_crisis_mode", False),
+                            "mood": final_state.get("mood"),
+                            "intent": final_state.get("intent", "general_info"),
+                            "slots": final_state.get("slots")
+                        })
+        if "negotiation" not in final_state and workflow.checkpointer:
+            # Not touched this turn: report what the session already holds
+            final_state["negotiation"] = workflow.get_state(config).values.get("negotiation")
+        result = _turn_result(final_state)
+    except Exception as e:
+        result = _error_result(e)
+    finally:
+        _event_sink.reset(sink_token)
+    
+    if not streamed:
+        emit("token", {"text": result["response"]})
+    emit("done", result)
+
+
+async def process_message(
+    user_input: str,
+    user_id: str = None,
+    loyalty_status: str = "none",
+    session_id: str = None
+) -> Dict:
+    """
+    Process a single message through the workflow
+    
+    This is the main entry point for the API server. The turn runs on the
+    bounded worker pool so the event loop stays free for other requests.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _turn_executor,
+        functools.partial(
+            run_turn,
+            user_input=user_input,
+            user_id=user_id,
+            loyalty_status=loyalty_status,
+            session_id=session_id
+        )
+    )
+
+
+async def stream_message(
+    user_input: str,
+    user_id: str = None,
+    loyalty_status: str = "none",
+    session_id: str = None
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Async generator over (event, data) pairs for one turn
+    
+    The turn runs on the same bounded worker pool as process_message; events
+    are handed back to the event loop through a queue as they are produced.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def emit(event: str, data: Dict):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+        except RuntimeError:
+            pass  # event loop already closed (client went away at shutdown)
+    
+    future = loop.run_in_executor(
+        _turn_executor,
+        functools.partial(
+            run_turn_streaming,
+            emit,
+            user_input=user_input,
+            user_id=user_id,
+            loyalty_status=loyalty_status,
+            session_id=session_id
+        )
+    )
+    # Guarantees the consumer wakes up even if the worker dies before "done"
+    future.add_done_callback(lambda _: queue.put_nowait(("closed", {})))
+    
+    while True:
+        event, data = await queue.get()
+        if event == "closed":
+            break
+        yield event, data
+        if event == "done":
+            break
@@ -0,0 +1,67 @@
+"""
+Mood Tracker - incremental per-session mood from turn sentiment
+A single calm message after several angry ones should not switch crisis
+mode off. The mood is carried in the conversation state and folded forward
+once per turn, so it costs the same on turn 50 as on turn 1 and never
+re-reads the transcript:
+
+- score: EWMA of sentiment_score (AI_MOOD_ALPHA, weight of the newest turn)
+- trend: EWMA of the per-turn change in score; below 0 means worsening
+- negative_history: bit i set when the turn i turns ago was negative/angry,
+  limited to the last AI_MOOD_WINDOW turns
+- negative_turns: how many of those bits are set
+
+The mood is escalated when its score is at or below AI_MOOD_CRISIS_SCORE or
+negative_turns reaches AI_MOOD_CRISIS_TURNS.
+"""
+
+import os
+from typing import Optional, TypedDict
+
+MOOD_ALPHA = float(os.environ.get("AI_MOOD_ALPHA", "0.5"))
+MOOD_WINDOW = int(os.environ.get("AI_MOOD_WINDOW", "5"))
+MOOD_CRISIS_SCORE = float(os.environ.get("AI_MOOD_CRISIS_SCORE", "-1.5"))
+MOOD_CRISIS_TURNS = int(os.environ.get("AI_MOOD_CRISIS_TURNS", "3"))
+
+NEGATIVE_SENTIMENTS = ("negative", "angry")
+
+
+class MoodState(TypedDict):
+    """Conversation-level mood, updated once per turn"""
+    score: float
+    trend: float
+    negative_history: int
+    negative_turns: int
+    turns: int
+
+
+def update_mood(mood: Optional[MoodState], sentiment: str, score: float) -> MoodState:
+    """Fold one turn's sentiment into the session mood (None starts a new one)"""
+    negative = int(sentiment in NEGATIVE_SENTIMENTS)
+    if not mood:
+        history = negative
+        return {
+            "score": round(score, 4),
+            "trend": 0.0,
+            "negative_history": history,
+            "negative_turns": history,
+            "turns": 1
+        }
+
+    new_score = mood["score"] + MOOD_ALPHA * (score - mood["score"])
+    change = new_score - mood["score"]
+    history = ((mood["negative_history"] << 1) | negative) & ((1 << MOOD_WINDOW) - 1)
+    return {
+        "score": round(new_score, 4),
+        "trend": round(mood["trend"] + MOOD_ALPHA * (change - mood["trend"]), 4),
+        "negative_history": history,
+        "negative_turns": bin(history).count("1"),
+        "turns": mood["turns"] + 1
+    }
+
+
+def mood_escalated(mood: Optional[MoodState]) -> bool:
+    """True when the conversation as a whole calls for crisis handling"""
+    if not mood:
+        return False
+    return mood["score"] <= MOOD_CRISIS_SCORE or mood["negative_turns"] >= MOOD_CRISIS_TURNS
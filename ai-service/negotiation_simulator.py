@@ -0,0 +1,266 @@
+"""
+Negotiation Simulator - Monte Carlo what-ifs for the negotiation rules
+Changing the counter-offer step in NegotiatorAgent.decide_price() or the
+round at which negotiation_node gives up on rejects moves revenue, but
+nobody can tell by how much from a few chats. This runs synthetic guest
+populations through the same multi-round negotiations, once per occupancy
+tier, and reports per tier: acceptance rate, average realized price,
+revenue per guest and the cost of the add-ons given away.
+
+    python negotiation_simulator.py --guests 200000
+    python negotiation_simulator.py --counter-step 10 --final-reject-round 4
+
+A guest has a room type, a loyalty status, a reservation price (the most
+they will pay per night), an opening offer and a concession rate (the
+share of the gap to their reservation price they close each round), and
+walks away after a number of rounds. Each round the guest offers a whole
+dollar amount; a price the negotiator names (final or counter) is taken
+if it is within the reservation price. A reject from FINAL_REJECT_ROUND on
+ends the negotiation, as in negotiation_node.
+
+Guests are simulated in chunks over a process pool (workers=1 runs in this
+process), which also makes this a CPU benchmark for decide_price(): the
+summary includes negotiations/sec.
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from negotiator_agent import NegotiatorAgent
+from pricing_rules import PricingRulesSource
+
+DEFAULT_CHUNK_SIZE = 5000
+TIERS = (1, 2, 3, 4)
+
+ROOM_MIX = {"standard": 0.5, "deluxe": 0.35, "family": 0.15}
+LOYALTY_MIX = {"none": 0.6, "returning": 0.2, "long_stay": 0.1, "referral": 0.1}
+
+# Columns of the per-tier totals
+_GUESTS, _DEALS, _REVENUE, _ADD_ON_COST, _ROUNDS, _REJECTED, _WALKED_AWAY = range(7)
+
+
+class Strategy(NamedTuple):
+    """The negotiation rules under test (defaults: what runs in production)"""
+    counter_step: float = NegotiatorAgent.COUNTER_STEP
+    final_reject_round: int = NegotiatorAgent.FINAL_REJECT_ROUND
+
+
+def guest_population(
+    count: int,
+    seed: int = 7,
+    room_mix: Optional[Dict[str, float]] = None,
+    loyalty_mix: Optional[Dict[str, float]] = None,
+    base_prices: Optional[Dict[str, float]] = None,
+    willingness: float = 0.9,
+    spread: float = 0.25
+) -> Dict[str, np.ndarray]:
+    """
+    Synthetic guests as columns
+
+    Reservation prices are lognormal around willingness x the room's base
+    price; opening offers are 50-90% of the reservation price; guests close
+    15-60% of the remaining gap per round and stay for 2-6 rounds.
+    """
+    rng = np.random.default_rng(seed)
+    room_mix = room_mix or ROOM_MIX
+    loyalty_mix = loyalty_mix or LOYALTY_MIX
+    base_prices = base_prices or NegotiatorAgent(None).base_prices
+
+    rooms = np.array(list(room_mix))
+    room = rng.choice(len(rooms), size=count, p=np.array(list(room_mix.values())) / sum(room_mix.values()))
+    statuses = np.array(list(loyalty_mix))
+    loyalty = rng.choice(len(statuses), size=count,
+                         p=np.array(list(loyalty_mix.values())) / sum(loyalty_mix.values()))
+    base = np.array([base_prices[name] for name in rooms], dtype=np.float64)[room]
+    reservation = base * willingness * rng.lognormal(0.0, spread, size=count)
+    return {
+        "room_type": rooms[room],
+        "loyalty_status": statuses[loyalty],
+        "reservation": np.round(reservation, 2),
+        "opening": np.round(reservation * rng.uniform(0.5, 0.9, size=count), 2),
+        "concession": rng.uniform(0.15, 0.6, size=count),
+        "patience": rng.integers(2, 7, size=count)
+    }
+
+
+def _chunks(guests: Dict[str, np.ndarray], size: int) -> Iterator[Dict[str, List]]:
+    """Guest columns in chunks of plain lists (cheap to pickle and to index)"""
+    count = len(guests["reservation"])
+    for start in range(0, count, size):
+        yield {name: column[start:start + size].tolist() for name, column in guests.items()}
+
+
+def _strategy_agent(rules_path: Optional[str], strategy: Strategy) -> NegotiatorAgent:
+    agent = NegotiatorAgent(None, rules=PricingRulesSource(rules_path) if rules_path else None)
+    agent.COUNTER_STEP = strategy.counter_step
+    agent.FINAL_REJECT_ROUND = strategy.final_reject_round
+    return agent
+
+
+def simulate_chunk(
+    agent: NegotiatorAgent,
+    guests: Dict[str, List],
+    tiers: Sequence[int] = TIERS
+) -> np.ndarray:
+    """
+    Negotiate every guest once per tier
+
+    Returns totals shaped (tiers, 7): guests, deals, revenue, add-on cost,
+    rounds, rejected, walked away.
+    """
+    rules = agent.rules.get()
+    value_adds = rules.value_adds
+    decide = agent.decide_price
+    final_reject_round = agent.FINAL_REJECT_ROUND
+    totals = np.zeros((len(tiers), 7))
+    for t, tier in enumerate(tiers):
+        deals = revenue = add_on_cost = rounds = rejected = walked = 0
+        for room, status, reservation, offer, concession, patience in zip(
+                guests["room_type"], guests["loyalty_status"], guests["reservation"],
+                guests["opening"], guests["concession"], guests["patience"]):
+            for current_round in range(1, patience + 1):
+                result = decide(room, int(offer), status, tier, rules)  # whole dollars, never above reservation
+                decision = result["decision"]
+                price = result.get("final_price", result.get("counter_price"))
+                if price is not None and price <= reservation:
+                    deals += 1
+                    revenue += price
+                    add_on_cost += sum(value_adds[name] for name in result["add_ons"])
+                    break
+                if decision == "reject" and current_round >= final_reject_round:
+                    rejected += 1
+                    break
+                offer += concession * (reservation - offer)
+            else:
+                walked += 1
+            rounds += current_round
+        totals[t] = (len(guests["reservation"]), deals, revenue, add_on_cost, rounds, rejected, walked)
+    return totals
+
+
+# ============================================================================
+# PROCESS POOL
+# ============================================================================
+
+_worker_agent: Optional[NegotiatorAgent] = None
+
+
+def _init_worker(rules_path: Optional[str], strategy: Strategy):
+    global _worker_agent
+    _worker_agent = _strategy_agent(rules_path, strategy)
+
+
+def _simulate_chunk(guests: Dict[str, List], tiers: Sequence[int]) -> np.ndarray:
+    return simulate_chunk(_worker_agent, guests, tiers)
+
+
+def simulate(
+    guests: Dict[str, np.ndarray],
+    strategy: Strategy = Strategy(),
+    tiers: Sequence[int] = TIERS,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rules_path: Optional[str] = None
+) -> Dict:
+    """
+    Run a guest population through the negotiator under one strategy
+
+    Returns per-tier outcomes and the throughput (negotiations/sec, one
+    negotiation being one guest at one tier). workers=1 runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    tiers = list(tiers)
+    totals = np.zeros((len(tiers), 7))
+    start = time.perf_counter()
+    if workers == 1:
+        agent = _strategy_agent(rules_path, strategy)
+        for chunk in _chunks(guests, chunk_size):
+            totals += simulate_chunk(agent, chunk, tiers)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rules_path, strategy)) as pool:
+            pending = deque()
+            for chunk in _chunks(guests, chunk_size):
+                pending.append(pool.submit(_simulate_chunk, chunk, tiers))
+                if len(pending) >= 2 * workers:
+                    totals += pending.popleft().result()
+            while pending:
+                totals += pending.popleft().result()
+    elapsed = time.perf_counter() - start
+
+    negotiations = int(totals[:, _GUESTS].sum())
+    return {
+        "strategy": strategy._asdict(),
+        "guests": len(guests["reservation"]),
+        "workers": workers,
+        "seconds": elapsed,
+        "negotiations": negotiations,
+        "negotiations_per_sec": negotiations / elapsed if elapsed else 0.0,
+        "rounds_per_sec": totals[:, _ROUNDS].sum() / elapsed if elapsed else 0.0,
+        "tiers": {tier: _tier_summary(row) for tier, row in zip(tiers, totals)}
+    }
+
+
+def _tier_summary(row: np.ndarray) -> Dict:
+    guests, deals = row[_GUESTS], row[_DEALS]
+    return {
+        "acceptance_rate": deals / guests if guests else 0.0,
+        "avg_price": row[_REVENUE] / deals if deals else None,
+        "revenue_per_guest": row[_REVENUE] / guests if guests else 0.0,
+        "avg_add_on_cost": row[_ADD_ON_COST] / deals if deals else 0.0,
+        "avg_rounds": row[_ROUNDS] / guests if guests else 0.0,
+        "rejected_rate": row[_REJECTED] / guests if guests else 0.0,
+        "walked_away_rate": row[_WALKED_AWAY] / guests if guests else 0.0
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Per-tier table plus throughput, for the CLI and benchmarks"""
+    strategy = report["strategy"]
+    lines = [
+        f"Strategy: counter step ${strategy['counter_step']:g}, "
+        f"reject ends the negotiation from round {strategy['final_reject_round']}",
+        f"  {'tier':>4} {'accepted':>9} {'avg price':>10} {'rev/guest':>10} {'add-ons':>8}"
+        f" {'rounds':>7} {'rejected':>9} {'walked':>7}"
+    ]
+    for tier, row in report["tiers"].items():
+        avg_price = f"${row['avg_price']:.2f}" if row["avg_price"] is not None else "-"
+        lines.append(
+            f"  {tier:>4} {row['acceptance_rate']:>9.1%} {avg_price:>10} ${row['revenue_per_guest']:>9.2f}"
+            f" ${row['avg_add_on_cost']:>7.2f} {row['avg_rounds']:>7.2f}"
+            f" {row['rejected_rate']:>9.1%} {row['walked_away_rate']:>7.1%}"
+        )
+    lines.append(
+        f"  {report['negotiations']:,} negotiations in {report['seconds']:.2f}s on {report['workers']} worker(s):"
+        f" {report['negotiations_per_sec']:,.0f}/sec ({report['rounds_per_sec']:,.0f} rounds/sec)"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of hotel price negotiations")
+    parser.add_argument("--guests", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--counter-step", type=float, default=NegotiatorAgent.COUNTER_STEP)
+    parser.add_argument("--final-reject-round", type=int, default=NegotiatorAgent.FINAL_REJECT_ROUND)
+    parser.add_argument("--willingness", type=float, default=0.9,
+                        help="Median reservation price as a share of the base price")
+    parser.add_argument("--rules", default=None, help="Pricing rules file (default: AI_PRICING_RULES_FILE)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    guests = guest_population(args.guests, args.seed, willingness=args.willingness)
+    report = simulate(guests, Strategy(args.counter_step, args.final_reject_round),
+                      workers=args.workers, chunk_size=args.chunk_size, rules_path=args.rules)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,69 +8,91 @@ import re
 from typing import Dict, Tuple, Optional
 from langchain_community.vectorstores import Chroma
 
+from occupancy_snapshot import OccupancySnapshot, OccupancySource, RoomAvailability, occupancy_source
+from occupancy_calendar import CalendarSource, DateLike, calendar_source, stay_dates
+from slot_extractor import extract_slots
+from pricing_rules import (LOW_OCCUPANCY_ADD_ONS, QUIET_SEASON_ADD_ONS, PriceRule, PricingRules,
+                           PricingRulesSource, price_rule, pricing_rules_source)
+from hotel_catalog import CatalogSource, catalog_source
+from occupancy_forecast import ForecastSource, forecast_source
+
 
 class NegotiatorAgent:
-    def __init__(self, db: Chroma):
+    # Add-ons bundled into counter_with_addons decisions (compile_rules checks they are priced)
+    LOW_OCCUPANCY_ADD_ONS = LOW_OCCUPANCY_ADD_ONS
+    QUIET_SEASON_ADD_ONS = QUIET_SEASON_ADD_ONS
+    # A counter offer is the guest's offer plus this much (capped at max_offer)
+    COUNTER_STEP = 15
+    # negotiation_node ends a negotiation on a reject from this round on
+    FINAL_REJECT_ROUND = 3
+    
+    def __init__(
+        self,
+        db: Chroma,
+        occupancy: Optional[OccupancySource] = None,
+        calendar: Optional[CalendarSource] = None,
+        rules: Optional[PricingRulesSource] = None,
+        catalog: Optional[CatalogSource] = None,
+        forecast: Optional[ForecastSource] = None
+    ):
         self.db = db
+        # Parsed occupancy_current.md, reloaded when the file changes
+        self.occupancy = occupancy or occupancy_source
+        # Per-night occupancy from the bookings export (AI_BOOKINGS_FILE), if any
+        self.calendar = calendar or calendar_source
+        # Per-date forecast written by the nightly occupancy_forecast.py job (AI_FORECAST_FILE)
+        self.forecast = forecast or forecast_source
         
-        # Minimum acceptable prices (hidden from guests) - in USD
-        self.minimum_prices = {
-            "standard": 35,
-            "deluxe": 60,
-            "family": 85,
-            "suite": 85  # alias for family
-        }
-        
-        # Base rates - in USD
-        self.base_prices = {
-            "standard": 50,
-            "deluxe": 80,
-            "family": 115,
-            "suite": 115  # alias for family
-        }
+        # Prices, minimums, value-adds and discounts from pricing_rules.json
+        # (AI_PRICING_RULES_FILE), re-compiled when the file changes
+        self.rules = rules or pricing_rules_source
         
-        # Value-add options available at Cloudy Hill Cottage
-        self.value_adds = {
-            "breakfast": 8,      # Full Sri Lankan breakfast
-            "cooking_class": 15, # Renu's cooking class
-            "late_checkout": 10,
-            "bicycle": 10,       # Day rental
-            "packed_lunch": 5,
-            "airport_pickup": 0  # From Ella station (normally included)
-        }
+        # Per-property prices from the server's Hotel/Room export
+        # (AI_ROOMS_FILE, AI_HOTELS_FILE), used when a hotel_id is given
+        self.catalog = catalog or catalog_source
+    
+    @property
+    def minimum_prices(self) -> Dict[str, float]:
+        """Minimum acceptable prices (hidden from guests) - in USD"""
+        return self.rules.get().minimum_prices
+    
+    @property
+    def base_prices(self) -> Dict[str, float]:
+        """Base rates - in USD ("suite" is an alias for "family")"""
+        return self.rules.get().base_prices
+    
+    @property
+    def value_adds(self) -> Dict[str, float]:
+        """Value-add options available at Cloudy Hill Cottage"""
+        return self.rules.get().value_adds
     
     def extract_room_type_and_price(self, user_input: str) -> Optional[Tuple[str, float]]:
-        """Extract room type and offered price from user input"""
-        user_lower = user_input.lower()
-        
-        # Find room type
-        room_type = None
-        if "family" in user_lower or "suite" in user_lower:
-            room_type = "family"
-        elif "deluxe" in user_lower:
-            room_type = "deluxe"
-        elif "standard" in user_lower or "basic" in user_lower or "room" in user_lower:
-            room_type = "standard"
-        
-        # Find price offer (look for $ or numbers)
-        price = None
-        price_match = re.search(r'\$(\d+)', user_input)
-        if price_match:
-            price = float(price_match.group(1))
-        else:
-            # Try to find just a number
-            num_match = re.search(r'(\d+)\s*(per|/|a)\s*night', user_lower)
-            if num_match:
-                price = float(num_match.group(1))
-            else:
-                num_match = re.search(r'for\s*(\d+)', user_lower)
-                if num_match:
-                    price = float(num_match.group(1))
+        """
+        Extract room type and offered price (USD per night) from user input
+        See slot_extractor.extract_slots() for dates and party size as well.
+        """
+        slots = extract_slots(user_input)
+        room_type = slots["room_type"]
+        if room_type is None and re.search(r"\brooms?\b", user_input, re.IGNORECASE):
+            room_type = "standard"  # "a room" without a type
+        price = slots["price"]
         
         return (room_type, price) if room_type and price else None
     
+    def get_occupancy_snapshot(self) -> Optional[OccupancySnapshot]:
+        """Structured occupancy (rate and room availability), None if unavailable"""
+        return self.occupancy.get()
+    
+    def get_room_availability(self, room_type: str) -> Optional[RoomAvailability]:
+        """Availability row for a room type, if the occupancy document lists it"""
+        snapshot = self.occupancy.get()
+        return snapshot.rooms.get(room_type) if snapshot else None
+    
     def get_occupancy_rate(self) -> float:
-        """Retrieve current occupancy rate from database"""
+        """Current occupancy rate from the snapshot (vector search if there is none)"""
+        snapshot = self.occupancy.get()
+        if snapshot is not None and snapshot.rate is not None:
+            return snapshot.rate
         try:
             results = self.db.similarity_search("current occupancy rate hotel", k=1)
             if results:
@@ -83,66 +105,147 @@ class NegotiatorAgent:
             pass
         return 0.247  # Default: Low occupancy (based on current data)
     
+    def get_stay_occupancy(self, room_type: str, check_in: DateLike, check_out: DateLike) -> Optional[float]:
+        """Occupancy of room_type for nights check_in..check_out-1, None without calendar data"""
+        calendar = self.calendar.get()
+        if calendar is None or not calendar.covers(check_in, check_out):
+            return None
+        return calendar.occupancy(check_in, check_out, room_type)
+    
+    def get_forecast_occupancy(self, room_type: str, check_in: DateLike, check_out: DateLike) -> Optional[float]:
+        """Forecast occupancy of room_type for the stay's nights, None without a forecast table"""
+        forecast = self.forecast.get()
+        if forecast is None:
+            return None
+        return forecast.occupancy(check_in, check_out, room_type)
+    
     def get_occupancy_tier(self, occupancy_rate: float) -> int:
-        """Determine occupancy tier (1-4)"""
-        if occupancy_rate <= 0.30:
-            return 1  # Very low - aggressive discounts
-        elif occupancy_rate <= 0.60:
-            return 2  # Low - flexible
-        elif occupancy_rate <= 0.85:
-            return 3  # Good - limited discounts
-        else:
-            return 4  # Full - no discounts
+        """Determine occupancy tier (1-4: very low, low, good, full)"""
+        return self.rules.get().occupancy_tier(occupancy_rate)
     
     def get_loyalty_discount(self, loyalty_status: str) -> float:
         """Get loyalty discount as decimal"""
-        discounts = {
-            "returning": 0.10,  # Returning guests
-            "extended": 0.10,  # 3+ nights
-            "long_stay": 0.15, # 7+ nights
-            "referral": 0.05   # Referred by previous guest
-        }
-        return discounts.get(loyalty_status.lower(), 0.0)
+        return self.rules.get().loyalty_discount(loyalty_status)
     
     def calculate_max_discount(self, occupancy_tier: int) -> float:
         """Calculate max negotiable discount based on occupancy"""
-        max_discounts = {
-            1: 0.30,  # Very low occupancy - up to 30% off
-            2: 0.20,  # Low - up to 20% off
-            3: 0.10,  # Good - loyalty only
-            4: 0.00   # Full - no discounts
-        }
-        return max_discounts.get(occupancy_tier, 0.0)
+        return self.rules.get().max_discount(occupancy_tier)
     
     def negotiate_price(self, 
                        room_type: str, 
                        guest_offer: float,
-                       loyalty_status: str = "none") -> Dict:
+                       loyalty_status: str = "none",
+                       check_in: Optional[DateLike] = None,
+                       check_out: Optional[DateLike] = None,
+                       hotel_id: Optional[str] = None) -> Dict:
         """
         Main negotiation logic
+        With stay dates, the tier comes from the occupancy of those nights
+        (check_out defaults to the night after check_in), or their forecast
+        if higher; otherwise from the current hotel-wide rate.
+        With a hotel_id, prices come from that property in the hotel catalog
+        instead of the cottage's pricing rules, and occupancy from its
+        bookings (see hotel_catalog.py), else the current hotel-wide rate.
         Returns: decision (accept/counter/reject), final_price, add_ons
         """
         
+        # One rules snapshot for the whole negotiation, even if the file reloads meanwhile
+        rules = self.rules.get()
+        if hotel_id is not None:
+            return self._negotiate_catalog_price(hotel_id, room_type, guest_offer, loyalty_status, rules,
+                                                 check_in, check_out)
+        
         # Get current conditions
-        occupancy_rate = self.get_occupancy_rate()
-        occupancy_tier = self.get_occupancy_tier(occupancy_rate)
-        base_price = self.base_prices.get(room_type)
-        min_price = self.minimum_prices.get(room_type)
-        loyalty_discount = self.get_loyalty_discount(loyalty_status)
-        max_negotiable_discount = self.calculate_max_discount(occupancy_tier)
-        
-        if not base_price:
+        stay = stay_dates(check_in, check_out)
+        occupancy_rate = self.get_stay_occupancy(room_type, *stay) if stay else None
+        occupancy_basis = "stay_dates" if occupancy_rate is not None else "current"
+        # Expected demand for the stay; the bookings on the calendar are a floor
+        forecast_rate = self.get_forecast_occupancy(room_type, *stay) if stay else None
+        if forecast_rate is not None and (occupancy_rate is None or forecast_rate > occupancy_rate):
+            occupancy_rate, occupancy_basis = forecast_rate, "forecast"
+        if occupancy_rate is None:
+            occupancy_rate = self.get_occupancy_rate()
+        occupancy_tier = rules.occupancy_tier(occupancy_rate)
+        
+        result = self.decide_price(room_type, guest_offer, loyalty_status, occupancy_tier, rules)
+        if result["decision"] == "error":
+            return result
+        
+        result["occupancy_rate"] = occupancy_rate
+        result["occupancy_basis"] = occupancy_basis
+        result["rules_version"] = rules.version
+        if forecast_rate is not None:
+            result["forecast_rate"] = forecast_rate
+        if stay:
+            result["check_in"], result["check_out"] = stay[0].isoformat(), stay[1].isoformat()
+        availability = self.get_room_availability(room_type)
+        if availability is not None:
+            result["rooms_available"] = availability.available
+        return result
+    
+    def _negotiate_catalog_price(self,
+                                 hotel_id: str,
+                                 room_type: str,
+                                 guest_offer: float,
+                                 loyalty_status: str,
+                                 rules: PricingRules,
+                                 check_in: Optional[DateLike] = None,
+                                 check_out: Optional[DateLike] = None) -> Dict:
+        """negotiate_price() for one property of the hotel catalog"""
+        catalog = self.catalog.get()
+        if catalog is None or not catalog.has_hotel(hotel_id):
+            return {"decision": "error", "hotel_id": hotel_id, "message": "Unknown hotel."}
+        prices = catalog.lookup(hotel_id, room_type)
+        if prices is None:
+            room_types = ", ".join(catalog.room_types_for(hotel_id)) or "no rooms listed"
+            return {"decision": "error", "hotel_id": hotel_id,
+                    "message": f"Invalid room type for this hotel. It has: {room_types}."}
+        
+        occupancy_rate = catalog.occupancy(hotel_id, check_in, check_out)
+        occupancy_basis = "hotel_bookings" if occupancy_rate is not None else "current"
+        if occupancy_rate is None:
+            occupancy_rate = self.get_occupancy_rate()
+        occupancy_tier = rules.occupancy_tier(occupancy_rate)
+        
+        base_price, minimum_price = prices
+        rule = price_rule(base_price, minimum_price,
+                          rules.loyalty_discount(loyalty_status), rules.max_discount(occupancy_tier))
+        result = self.decide_price(room_type, guest_offer, loyalty_status, occupancy_tier, rules, rule)
+        result["hotel_id"] = hotel_id
+        result["occupancy_rate"] = occupancy_rate
+        result["occupancy_basis"] = occupancy_basis
+        result["rules_version"] = rules.version
+        return result
+    
+    def decide_price(self,
+                     room_type: str,
+                     guest_offer: float,
+                     loyalty_status: str,
+                     occupancy_tier: int,
+                     rules: Optional[PricingRules] = None,
+                     rule: Optional[PriceRule] = None) -> Dict:
+        """
+        The pricing decision for a known occupancy tier (no lookups)
+        pricing_grid.price_grid() evaluates these same rules on arrays; a
+        change here must be mirrored there (test_advanced_features checks
+        that both agree on every cell).
+        rule replaces the decision-table row (catalog prices for a hotel).
+        """
+        rules = rules or self.rules.get()
+        # Base, minimum, discounts and the lowest we can offer: one decision-table row
+        if rule is None:
+            rule = rules.lookup(room_type, occupancy_tier, loyalty_status)
+        
+        if rule is None:
             return {"decision": "error", "message": "Invalid room type. We have Standard, Deluxe, and Family rooms."}
         
-        # Calculate the lowest we can offer
-        max_offer = base_price * (1 - max_negotiable_discount - loyalty_discount)
+        base_price, min_price, max_offer = rule.base_price, rule.minimum_price, rule.max_offer
         
         result = {
             "room_type": room_type,
             "base_price": base_price,
             "guest_offer": guest_offer,
             "loyalty_status": loyalty_status,
-            "occupancy_rate": occupancy_rate,
             "occupancy_tier": occupancy_tier
         }
         
@@ -165,13 +268,13 @@ class NegotiatorAgent:
             # Low occupancy: accept but add value
             result["decision"] = "counter_with_addons"
             result["final_price"] = guest_offer
-            result["add_ons"] = ["breakfast", "late_checkout"]
-            addon_value = sum(self.value_adds[addon] for addon in result["add_ons"])
+            result["add_ons"] = list(self.LOW_OCCUPANCY_ADD_ONS)
+            addon_value = sum(rules.value_adds[addon] for addon in result["add_ons"])
             result["message"] = f"I can do ${guest_offer}/night AND include our famous Sri Lankan breakfast plus late checkout (worth ${addon_value})! It's the quiet season, so we'd love to have you."
         
         elif guest_offer >= min_price:
             # Counter with slightly higher price
-            counter_offer = min(guest_offer + 15, max_offer)
+            counter_offer = min(guest_offer + self.COUNTER_STEP, max_offer)
             result["decision"] = "counter"
             result["counter_price"] = counter_offer
             result["message"] = f"The best I can do is ${counter_offer}/night for the {room_type} room. That includes our complimentary breakfast!"
@@ -181,8 +284,8 @@ class NegotiatorAgent:
             # Very low occupancy - be flexible!
             result["decision"] = "counter_with_addons"
             result["final_price"] = min_price
-            result["add_ons"] = ["breakfast", "cooking_class", "bicycle"]
-            addon_value = sum(self.value_adds[addon] for addon in result["add_ons"])
+            result["add_ons"] = list(self.QUIET_SEASON_ADD_ONS)
+            addon_value = sum(rules.value_adds[addon] for addon in result["add_ons"])
             result["message"] = f"It's our quiet season! How about ${min_price}/night with breakfast, a cooking class with Renu, AND a free bicycle for a day? That's ${addon_value} in extras included!"
         
         else:
@@ -0,0 +1,432 @@
+"""
+Occupancy Calendar - per-night occupancy by room type from booking intervals
+The hotel-wide percentage in occupancy_current.md says nothing about a
+specific stay: a peak-season weekend and a monsoon Tuesday get the same
+tier. This module builds a calendar from the Express server's Booking
+documents (mongoexport JSONL with room, checkInDate, checkOutDate, status)
+and answers "how full is room type T for nights X..Y" for any range.
+
+Build: every booking adds +1 on its check-in night and -1 on its check-out
+night of a per-room-type difference array (one bincount for all bookings);
+a cumulative sum turns that into rooms booked per night, and a second one
+into prefix sums. Query: booked room-nights for any range is the
+difference of two prefix entries, O(1) per range and vectorized over many
+ranges.
+
+Booking.room is a Room id; pass a rooms export (_id, roomType) to map ids
+to room types, or export bookings with the room type in the room field.
+Server roomTypes map to the cottage's room types through the inverse of
+CATALOG_ROOM_ALIASES ("Double Bed" -> standard, "Luxury Room" -> deluxe);
+types with no cottage room ("Single Bed") are skipped and counted.
+The export covers every listed hotel: set AI_HOTEL_ID to the cottage's
+Hotel _id so other properties' bookings don't count against its rooms.
+Dates may be ISO strings, epoch milliseconds or mongoexport {"$date": ...}
+(relaxed or canonical); a record that can't be read is skipped, not fatal.
+Enable for the negotiator with AI_BOOKINGS_FILE (and AI_ROOMS_FILE).
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from occupancy_snapshot import CATALOG_ROOM_ALIASES, occupancy_source, room_key
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+# Negotiator aliases (NegotiatorAgent.base_prices has "suite" for "family")
+ROOM_ALIASES = {"suite": "family"}
+
+# Server roomTypes -> negotiator room types: the inverse of CATALOG_ROOM_ALIASES
+SERVER_ROOM_TYPES = {catalog: room for room, catalog in CATALOG_ROOM_ALIASES.items() if room not in ROOM_ALIASES}
+
+DateLike = Union[date, str, np.datetime64]
+
+_EPOCH = date(1970, 1, 1)
+
+
+def cottage_room_type(label: str) -> str:
+    """Room label or server roomType -> negotiator room type ("Double Bed" -> "standard")"""
+    key = room_key(label)
+    key = SERVER_ROOM_TYPES.get(key, key)
+    return ROOM_ALIASES.get(key, key)
+
+
+def _iso_day(value) -> str:
+    """
+    Booking date -> "YYYY-MM-DD": ISO string, epoch milliseconds or
+    mongoexport {"$date": ...} (relaxed, or canonical {"$numberLong": ...}).
+    Raises ValueError for anything else.
+    """
+    if isinstance(value, dict):
+        value = value.get("$date")
+        if isinstance(value, dict):
+            value = int(value.get("$numberLong"))
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (_EPOCH + timedelta(milliseconds=value)).isoformat()  # date + timedelta keeps whole days
+    raise ValueError(f"Not a date: {value!r}")
+
+
+def _day(value: DateLike) -> np.datetime64:
+    """date, ISO string or mongoexport {"$date": ...} -> datetime64[D]"""
+    if isinstance(value, (dict, int, float)) and not isinstance(value, bool):
+        value = _iso_day(value)
+    if isinstance(value, str):
+        value = value[:10]
+    return np.datetime64(value, "D")
+
+
+def _days(values: Sequence[str]) -> np.ndarray:
+    """Vectorized _day for ISO strings ("2025-12-20T00:00:00.000Z" -> 2025-12-20)"""
+    return np.array([value[:10] for value in values], dtype="datetime64[D]")
+
+
+def _valid_day(value: str) -> bool:
+    try:
+        date.fromisoformat(value[:10])
+        return True
+    except ValueError:
+        return False
+
+
+def _day_array(values: Iterable[DateLike]) -> np.ndarray:
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[D]")
+    return np.array([_day(value) for value in values], dtype="datetime64[D]")
+
+
+class OccupancyCalendar:
+    """
+    Rooms booked per night for each room type, with O(1) range queries
+
+    capacity is the number of rooms of each type; occupancy for a range is
+    booked room-nights / (capacity x nights), capped at 1.0.
+    """
+
+    def __init__(
+        self,
+        room_types: np.ndarray,
+        check_ins: np.ndarray,
+        check_outs: np.ndarray,
+        capacity: Dict[str, int],
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None
+    ):
+        """
+        Args:
+            room_types: int index into list(capacity) per booking
+            check_ins, check_outs: datetime64[D] per booking (check-out night excluded)
+            capacity: rooms per room type
+            start, end: calendar horizon; defaults to the bookings' span
+        """
+        self.room_types: List[str] = list(capacity)
+        self.capacity = np.array([capacity[name] for name in self.room_types], dtype=np.int64)
+        self._index = {name: i for i, name in enumerate(self.room_types)}
+
+        check_ins = np.asarray(check_ins, dtype="datetime64[D]")
+        check_outs = np.asarray(check_outs, dtype="datetime64[D]")
+        if start is None:
+            start = check_ins.min() if len(check_ins) else np.datetime64(date.today(), "D")
+        if end is None:
+            end = check_outs.max() if len(check_outs) else _day(start) + 1
+        self.start, self.end = _day(start), _day(end)
+        self.nights = max(int((self.end - self.start).astype(np.int64)), 0)
+
+        # Clip stays to the horizon; drop empty ones
+        first = np.clip((check_ins - self.start).astype(np.int64), 0, self.nights)
+        last = np.clip((check_outs - self.start).astype(np.int64), 0, self.nights)
+        keep = last > first
+        types = np.asarray(room_types, dtype=np.int64)[keep]
+        first, last = first[keep], last[keep]
+
+        # +1 at check-in, -1 at check-out, per room type, in one bincount
+        width = self.nights + 1
+        size = len(self.room_types) * width
+        diff = (np.bincount(types * width + first, minlength=size)
+                - np.bincount(types * width + last, minlength=size))
+        self.booked = np.cumsum(diff.reshape(len(self.room_types), width), axis=1)[:, :self.nights]
+
+        # prefix[t, n] = room-nights booked for type t before night n; last row is all types
+        self._prefix = np.zeros((len(self.room_types) + 1, width), dtype=np.int64)
+        np.cumsum(self.booked, axis=1, out=self._prefix[:-1, 1:])
+        self._prefix[-1] = self._prefix[:-1].sum(axis=0)
+        self._capacity = np.append(self.capacity, self.capacity.sum())
+        self.bookings = int(keep.sum())
+        self.skipped: Dict[str, int] = {}  # from_records(): records left out, by reason
+        self.hotels = 0                    # from_records(): distinct hotels counted
+
+    def _row(self, room_type: Optional[str]) -> Optional[int]:
+        """Prefix row for a room type ("Deluxe Room", "suite"...), the total row for None"""
+        if room_type is None:
+            return len(self.room_types)
+        return self._index.get(room_type if room_type in self._index else cottage_room_type(room_type))
+
+    def covers(self, check_in: DateLike, check_out: DateLike) -> bool:
+        """True if the range overlaps the calendar horizon"""
+        return _day(check_in) < self.end and _day(check_out) > self.start
+
+    def occupancy(self, check_in: DateLike, check_out: DateLike, room_type: Optional[str] = None) -> Optional[float]:
+        """
+        Share of room-nights booked for nights check_in..check_out-1 (all
+        room types when room_type is None); None outside the horizon or for
+        an unknown room type
+        """
+        row = self._row(room_type)
+        if row is None:
+            return None
+        first = min(max(int((_day(check_in) - self.start).astype(np.int64)), 0), self.nights)
+        last = min(max(int((_day(check_out) - self.start).astype(np.int64)), 0), self.nights)
+        if last <= first:
+            return None
+        booked = int(self._prefix[row, last] - self._prefix[row, first])
+        return min(booked / (int(self._capacity[row]) * (last - first)), 1.0)
+
+    def occupancy_many(
+        self,
+        check_ins: Iterable[DateLike],
+        check_outs: Iterable[DateLike],
+        room_type: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Vectorized occupancy() for many ranges; NaN where a range is outside the horizon"""
+        row = self._row(room_type)
+        if row is None:
+            return None
+        starts, ends = _day_array(check_ins), _day_array(check_outs)
+        first = np.clip((starts - self.start).astype(np.int64), 0, self.nights)
+        last = np.clip((ends - self.start).astype(np.int64), 0, self.nights)
+        nights = last - first
+        prefix = self._prefix[row]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = (prefix[last] - prefix[first]) / (self._capacity[row] * nights)
+        return np.where(nights > 0, np.minimum(rates, 1.0), np.nan)
+
+    def nightly(self, check_in: DateLike, check_out: DateLike, room_type: Optional[str] = None) -> Optional[np.ndarray]:
+        """Occupancy of each night in the range (NaN for nights outside the horizon)"""
+        row = self._row(room_type)
+        if row is None:
+            return None
+        nights = np.arange(_day(check_in), _day(check_out), dtype="datetime64[D]")
+        offsets = (nights - self.start).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < self.nights)
+        booked = (self.booked.sum(axis=0) if row == len(self.room_types) else self.booked[row])
+        rates = np.full(len(nights), np.nan)
+        rates[inside] = np.minimum(booked[offsets[inside]] / self._capacity[row], 1.0)
+        return rates
+
+    # --- Loading --------------------------------------------------------------
+
+    @classmethod
+    def from_records(
+        cls,
+        bookings: Iterable[Optional[Dict]],
+        capacity: Dict[str, int],
+        room_types: Optional[Dict[str, str]] = None,
+        statuses: Sequence[str] = ACTIVE_STATUSES,
+        hotel_id: Optional[str] = None,
+        by_hotel: bool = False
+    ) -> "OccupancyCalendar":
+        """
+        Calendar from Booking documents. room is mapped through room_types
+        (Room _id -> roomType) when given, then through cottage_room_type();
+        with a hotel_id, other hotels' bookings are left out. by_hotel makes
+        the rows hotels instead (capacity keyed by Hotel _id; rooms of any
+        type count). Bookings of other statuses are ignored; unreadable
+        records (None, bad dates) and rows without capacity are skipped and
+        counted in .skipped.
+        """
+        index = {name: i for i, name in enumerate(capacity)}
+        skipped = {"invalid": 0, "room_type": 0, "other_hotel": 0}
+        hotels = set()
+        types, check_ins, check_outs = [], [], []
+        for booking in bookings:
+            if not isinstance(booking, dict):
+                skipped["invalid"] += 1
+                continue
+            if booking.get("status", "pending") not in statuses:
+                continue
+            hotel = _oid(booking.get("hotel"))
+            if (hotel_id is not None and hotel != hotel_id) or (by_hotel and hotel not in index):
+                skipped["other_hotel"] += 1
+                continue
+            hotels.add(hotel)
+            if by_hotel:
+                t = index[hotel]
+            else:
+                room = _oid(booking.get("room"))
+                room = (room_types or {}).get(room, room)
+                t = index.get(cottage_room_type(room)) if isinstance(room, str) else None
+            if t is None:
+                skipped["room_type"] += 1
+                continue
+            try:
+                check_in, check_out = _iso_day(booking["checkInDate"]), _iso_day(booking["checkOutDate"])
+            except (KeyError, TypeError, ValueError, OverflowError):
+                skipped["invalid"] += 1
+                continue
+            types.append(t)
+            check_ins.append(check_in)
+            check_outs.append(check_out)
+
+        try:
+            ins, outs = _days(check_ins), _days(check_outs)
+        except ValueError:
+            # Some string is not a date: drop those records, keep the vectorized parse for the rest
+            keep = [i for i in range(len(types)) if _valid_day(check_ins[i]) and _valid_day(check_outs[i])]
+            skipped["invalid"] += len(types) - len(keep)
+            types = [types[i] for i in keep]
+            ins, outs = _days([check_ins[i] for i in keep]), _days([check_outs[i] for i in keep])
+        calendar = cls(np.array(types, dtype=np.int64), ins, outs, capacity)
+        calendar.skipped = skipped
+        calendar.hotels = len(hotels)
+        return calendar
+
+    @classmethod
+    def from_jsonl(
+        cls,
+        path: str,
+        capacity: Dict[str, int],
+        rooms_path: Optional[str] = None,
+        statuses: Sequence[str] = ACTIVE_STATUSES,
+        hotel_id: Optional[str] = None,
+        by_hotel: bool = False
+    ) -> "OccupancyCalendar":
+        """Calendar from a bookings JSONL export (and optionally a rooms export)"""
+        room_types = load_room_types(rooms_path) if rooms_path else None
+        with open(path, encoding="utf-8") as f:
+            records = (_json_record(line) for line in f if line.strip())
+            return cls.from_records(records, capacity, room_types, statuses, hotel_id, by_hotel)
+
+
+def _oid(value) -> Optional[str]:
+    """mongoexport {"$oid": ...} or plain string id"""
+    if isinstance(value, dict):
+        value = value.get("$oid")
+    return value if isinstance(value, str) else None
+
+
+def _json_record(line: str) -> Optional[Dict]:
+    """One JSONL record, None if the line is not valid JSON"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def load_room_types(path: str) -> Dict[str, str]:
+    """Room _id -> roomType from a rooms JSONL export"""
+    room_types = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            room = _json_record(line) if line.strip() else None
+            if not isinstance(room, dict) or _oid(room.get("_id")) is None:
+                continue
+            room_types[_oid(room.get("_id"))] = str(room.get("roomType", ""))
+    return room_types
+
+
+def default_capacity() -> Dict[str, int]:
+    """Rooms per type from the occupancy snapshot's availability table"""
+    snapshot = occupancy_source.get()
+    if snapshot is None or not snapshot.rooms:
+        return {"standard": 3, "deluxe": 2, "family": 1}
+    return {room_type: room.total for room_type, room in snapshot.rooms.items()}
+
+
+class CalendarSource:
+    """
+    OccupancyCalendar for AI_BOOKINGS_FILE, rebuilt when the export changes
+
+    Like OccupancySource, the file is stat'ed at most every check_interval_s;
+    without a bookings file get() returns None and pricing uses the
+    hotel-wide snapshot. A reload that fails keeps the last good calendar.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        rooms_path: Optional[str] = None,
+        check_interval_s: Optional[float] = None,
+        hotel_id: Optional[str] = None
+    ):
+        self.path = path or os.environ.get("AI_BOOKINGS_FILE")
+        self.rooms_path = rooms_path or os.environ.get("AI_ROOMS_FILE")
+        self.hotel_id = hotel_id or os.environ.get("AI_HOTEL_ID")
+        self.check_interval_s = float(check_interval_s if check_interval_s is not None
+                                      else os.environ.get("AI_OCCUPANCY_CHECK_S", 1.0))
+        self.errors: List[str] = []  # last few reload failures
+        self._calendar: Optional[OccupancyCalendar] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[OccupancyCalendar]:
+        if self.path and time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._calendar
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval_s
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return
+                calendar = OccupancyCalendar.from_jsonl(self.path, default_capacity(), self.rooms_path,
+                                                        hotel_id=self.hotel_id)
+                if calendar.bookings == 0 and calendar.skipped["invalid"]:
+                    raise ValueError(f"No readable bookings ({calendar.skipped['invalid']} invalid records)")
+            except OSError:
+                return
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                self._signature = signature  # don't retry until the file changes again
+                self.errors = (self.errors + [f"{time.strftime('%H:%M:%S')} {e!r}"])[-5:]
+                return
+            if self.hotel_id is None and calendar.hotels > 1:
+                print(f"[WARNING] {self.path} has bookings of {calendar.hotels} hotels, all counted against "
+                      f"this property's rooms; set AI_HOTEL_ID")
+            self._calendar, self._signature = calendar, signature
+
+    def stats(self) -> Optional[Dict]:
+        calendar = self._calendar
+        if calendar is None and not self.errors:
+            return None
+        return {
+            "path": self.path,
+            "hotel_id": self.hotel_id,
+            "bookings": calendar.bookings if calendar is not None else None,
+            "skipped": calendar.skipped if calendar is not None else None,
+            "start": str(calendar.start) if calendar is not None else None,
+            "end": str(calendar.end) if calendar is not None else None,
+            "errors": list(self.errors)
+        }
+
+
+calendar_source = CalendarSource()
+
+
+def stay_dates(check_in: Optional[DateLike], check_out: Optional[DateLike]) -> Optional[Tuple[date, date]]:
+    """Normalize a requested stay: check_out defaults to the next day"""
+    if check_in is None:
+        return None
+    start = _as_date(check_in)
+    end = _as_date(check_out) if check_out is not None else start + timedelta(days=1)
+    return (start, end) if end > start else None
+
+
+def _as_date(value: DateLike) -> date:
+    """_day() as a date; dates and ISO strings skip numpy (negotiate_price calls this per round)"""
+    if type(value) is date:
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return _day(value).astype(date)
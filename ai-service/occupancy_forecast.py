@@ -0,0 +1,284 @@
+"""
+Occupancy Forecast - precomputed per-date occupancy forecast for pricing
+The negotiator's tier follows occupancy that is already known: the
+hotel-wide percentage, or the bookings on the calendar for a stay. A stay
+four months out looks empty today even in peak season, so it gets the
+deepest discount. This module fits a seasonal forecast per room type from
+the booking history and materializes it as a per-date table the
+negotiator reads when a stay's dates are known.
+
+Model (per room type, plus all types together), fitted with array
+operations over the history nights:
+    occupancy ~ week-of-year level (circularly smoothed)
+              + day-of-week effect
+              + recent level shift (mean residual of the last 28 nights,
+                decaying with the horizon)
+clipped to [0, 1] and floored by the bookings already on the books.
+
+Fitting is a batch job, not part of a request; run it nightly:
+
+    python occupancy_forecast.py $AI_BOOKINGS_FILE --rooms $AI_ROOMS_FILE
+    # cron: 15 2 * * *  cd /srv/ai-service && python occupancy_forecast.py ...
+
+It writes AI_FORECAST_FILE (data/occupancy_forecast.npz) atomically.
+ForecastSource reloads the table when the file changes, and a stay's
+forecast is two prefix-sum reads, O(1) for any stay length.
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from occupancy_calendar import DateLike, OccupancyCalendar, cottage_room_type, default_capacity
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FORECAST_FILE = os.path.join(BASE_DIR, "data", "occupancy_forecast.npz")
+
+FORECAST_DAYS = 365
+RECENT_NIGHTS = 28  # nights behind the recent level shift, also its decay scale
+WEEKS = 53
+
+
+def _day(value: DateLike) -> np.datetime64:
+    """date, ISO string or datetime64 -> datetime64[D]"""
+    return np.datetime64(str(value)[:10], "D")
+
+
+def _ordinal(value: DateLike) -> int:
+    """Proleptic ordinal of a date, without numpy for date objects (the request path)"""
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal()
+
+
+class OccupancyForecast:
+    """
+    Forecast occupancy per night for each room type (and all types), from start
+
+    rates[r, n] is the forecast for night start + n of row r; the last row
+    is all room types together.
+    """
+
+    def __init__(
+        self,
+        room_types: List[str],
+        start: DateLike,
+        rates: np.ndarray,
+        fitted_at: float = 0.0,
+        history_nights: int = 0
+    ):
+        self.room_types = list(room_types)
+        self.start = _day(start)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.days = self.rates.shape[1]
+        self.fitted_at = fitted_at
+        self.history_nights = history_nights
+        self._index = {name: i for i, name in enumerate(self.room_types)}
+        self._first = _ordinal(self.start.astype(date))
+        # prefix[r, n] = sum of forecasts before night n
+        self._prefix = np.zeros((len(self.rates), self.days + 1))
+        np.cumsum(self.rates, axis=1, out=self._prefix[:, 1:])
+
+    @property
+    def end(self) -> np.datetime64:
+        return self.start + self.days
+
+    def _row(self, room_type: Optional[str]) -> Optional[int]:
+        if room_type is None:
+            return len(self.room_types)
+        return self._index.get(room_type if room_type in self._index else cottage_room_type(room_type))
+
+    def occupancy(self, check_in: DateLike, check_out: DateLike, room_type: Optional[str] = None) -> Optional[float]:
+        """Mean forecast over the nights of the stay inside the table, None if none are"""
+        row = self._row(room_type)
+        if row is None:
+            return None
+        first = min(max(_ordinal(check_in) - self._first, 0), self.days)
+        last = min(max(_ordinal(check_out) - self._first, 0), self.days)
+        if last <= first:
+            return None
+        return (self._prefix.item(row, last) - self._prefix.item(row, first)) / (last - first)
+
+    def nightly(self, check_in: DateLike, check_out: DateLike, room_type: Optional[str] = None) -> Optional[np.ndarray]:
+        """Forecast of each night in the range (NaN outside the table)"""
+        row = self._row(room_type)
+        if row is None:
+            return None
+        offsets = (np.arange(_day(check_in), _day(check_out), dtype="datetime64[D]") - self.start).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < self.days)
+        rates = np.full(len(offsets), np.nan)
+        rates[inside] = self.rates[row, offsets[inside]]
+        return rates
+
+    # --- Persistence ----------------------------------------------------------
+
+    def save(self, path: str):
+        """Write the table atomically (readers see the old or the new file)"""
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, room_types=np.array(self.room_types), start=np.array(str(self.start)),
+                 rates=self.rates.astype(np.float32), fitted_at=np.array(self.fitted_at),
+                 history_nights=np.array(self.history_nights))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "OccupancyForecast":
+        with np.load(path, allow_pickle=False) as data:
+            return cls([str(name) for name in data["room_types"]], str(data["start"]), data["rates"],
+                       float(data["fitted_at"]), int(data["history_nights"]))
+
+
+def _week_and_weekday(nights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Week of year (0-52) and weekday (Monday 0) of datetime64[D] nights"""
+    day_of_year = (nights - nights.astype("datetime64[Y]")).astype(np.int64)
+    weekday = (nights.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    return np.minimum(day_of_year // 7, WEEKS - 1), weekday
+
+
+def _one_hot(index: np.ndarray, size: int) -> np.ndarray:
+    matrix = np.zeros((len(index), size))
+    matrix[np.arange(len(index)), index] = 1.0
+    return matrix
+
+
+def fit_forecast(
+    calendar: OccupancyCalendar,
+    as_of: Optional[DateLike] = None,
+    days: int = FORECAST_DAYS,
+    floor_booked: bool = True
+) -> OccupancyForecast:
+    """
+    Fit on the calendar's nights before as_of (default today) and forecast
+    days nights from as_of
+
+    With floor_booked, a night's forecast is never below the bookings the
+    calendar already has for it. Raises ValueError without history.
+    """
+    as_of = _day(as_of if as_of is not None else date.today())
+    history = min(max(int((as_of - calendar.start).astype(np.int64)), 0), calendar.nights)
+    if history == 0:
+        raise ValueError("No booking history before the forecast date")
+
+    # Occupancy per history night: one row per room type, then all types
+    capacity = np.append(calendar.capacity, calendar.capacity.sum()).astype(np.float64)[:, None]
+    booked = np.vstack([calendar.booked, calendar.booked.sum(axis=0)])
+    occupancy = np.minimum(booked[:, :history] / capacity, 1.0)
+
+    week, weekday = _week_and_weekday(calendar.start + np.arange(history))
+    weeks, weekdays = _one_hot(week, WEEKS), _one_hot(weekday, 7)
+
+    # Week-of-year level; weeks without history take the overall mean
+    week_nights = weeks.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        level = (occupancy @ weeks) / week_nights
+    level = np.where(week_nights > 0, level, occupancy.mean(axis=1, keepdims=True))
+    level = 0.25 * np.roll(level, 1, axis=1) + 0.5 * level + 0.25 * np.roll(level, -1, axis=1)
+
+    residual = occupancy - level[:, week]
+    weekday_effect = (residual @ weekdays) / np.maximum(weekdays.sum(axis=0), 1)
+    fitted = level[:, week] + weekday_effect[:, weekday]
+    shift = (occupancy - fitted)[:, -RECENT_NIGHTS:].mean(axis=1, keepdims=True)
+
+    nights = as_of + np.arange(days)
+    future_week, future_weekday = _week_and_weekday(nights)
+    decay = np.exp(-np.arange(days) / RECENT_NIGHTS)
+    rates = np.clip(level[:, future_week] + weekday_effect[:, future_weekday] + shift * decay, 0.0, 1.0)
+
+    if floor_booked:
+        offsets = (nights - calendar.start).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < calendar.nights)
+        on_books = np.minimum(booked[:, offsets[inside]] / capacity, 1.0)
+        rates[:, inside] = np.maximum(rates[:, inside], on_books)
+
+    return OccupancyForecast(calendar.room_types, as_of, rates, time.time(), history)
+
+
+class ForecastSource:
+    """
+    OccupancyForecast from AI_FORECAST_FILE, reloaded when the batch job rewrites it
+
+    Like CalendarSource: stat'ed at most every check_interval_s; get()
+    returns None until a forecast has been written.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval_s: Optional[float] = None):
+        self.path = path or os.environ.get("AI_FORECAST_FILE", DEFAULT_FORECAST_FILE)
+        self.check_interval_s = float(check_interval_s if check_interval_s is not None
+                                      else os.environ.get("AI_OCCUPANCY_CHECK_S", 1.0))
+        self._forecast: Optional[OccupancyForecast] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[OccupancyForecast]:
+        if time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._forecast
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval_s
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return
+                forecast = OccupancyForecast.load(self.path)
+            except (OSError, ValueError, KeyError):
+                return
+            self._forecast, self._signature = forecast, signature
+
+    def stats(self) -> Optional[Dict]:
+        forecast = self._forecast
+        if forecast is None:
+            return None
+        return {
+            "path": self.path,
+            "start": str(forecast.start),
+            "days": forecast.days,
+            "room_types": forecast.room_types,
+            "fitted_at": forecast.fitted_at,
+            "history_nights": forecast.history_nights
+        }
+
+
+forecast_source = ForecastSource()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and write the per-date occupancy forecast")
+    parser.add_argument("bookings", nargs="?", default=os.environ.get("AI_BOOKINGS_FILE"),
+                        help="Bookings JSONL export (default: AI_BOOKINGS_FILE)")
+    parser.add_argument("--rooms", default=os.environ.get("AI_ROOMS_FILE"),
+                        help="Rooms JSONL export mapping Booking.room ids to room types")
+    parser.add_argument("--hotel-id", default=os.environ.get("AI_HOTEL_ID"),
+                        help="Only this Hotel _id's bookings (default: AI_HOTEL_ID)")
+    parser.add_argument("-o", "--output", default=os.environ.get("AI_FORECAST_FILE", DEFAULT_FORECAST_FILE))
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS)
+    parser.add_argument("--as-of", default=None, help="First forecast night (default: today)")
+    args = parser.parse_args()
+    if not args.bookings:
+        parser.error("no bookings file (argument or AI_BOOKINGS_FILE)")
+
+    start = time.perf_counter()
+    calendar = OccupancyCalendar.from_jsonl(args.bookings, default_capacity(), args.rooms,
+                                           hotel_id=args.hotel_id)
+    forecast = fit_forecast(calendar, args.as_of, args.days)
+    forecast.save(args.output)
+    print(f"Forecast {forecast.start}..{forecast.end} for {', '.join(forecast.room_types)}"
+          f" from {forecast.history_nights} nights of history ({calendar.bookings} bookings)"
+          f" -> {args.output} in {time.perf_counter() - start:.2f}s")
+    months = (forecast.start + np.arange(forecast.days)).astype("datetime64[M]")
+    for month in np.unique(months)[:12]:
+        print(f"  {month}  {forecast.rates[-1, months == month].mean():6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Occupancy Snapshot - structured occupancy read from occupancy_current.md
+The negotiator used to embed a query, search Chroma and regex a percentage
+out of whichever chunk ranked first, on every negotiation round. The
+occupancy document is small and changes rarely, so it is parsed once into
+an OccupancySnapshot (rate plus the per-room availability table) and
+re-parsed only when the file changes.
+
+Reads are O(1): the cached snapshot is returned as long as the file's
+mtime and size are unchanged, and the file is stat'ed at most once every
+AI_OCCUPANCY_CHECK_S seconds. The file defaults to
+data/docs/occupancy_current.md (AI_OCCUPANCY_FILE).
+"""
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OCCUPANCY_FILE = os.path.join(BASE_DIR, "data", "docs", "occupancy_current.md")
+
+_RATE = re.compile(r"occupancy rate[^0-9]*(\d+(?:\.\d+)?)\s*%", re.IGNORECASE)
+_TOTAL = re.compile(r"\*\*(total rooms|occupied|available)\*\*\s*:\s*(\d+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RoomAvailability:
+    """One row of the Room Availability table"""
+    room_type: str  # negotiator key: "standard", "deluxe", "family"
+    label: str      # as written in the document: "Family Suite"
+    total: int
+    occupied: int
+    available: int
+
+
+@dataclass(frozen=True)
+class OccupancySnapshot:
+    """Parsed occupancy document; version increases with every reload"""
+    rate: Optional[float]  # 0.247 for 24.7%, None if the document has none
+    rooms: Dict[str, RoomAvailability] = field(default_factory=dict)
+    total_rooms: int = 0
+    occupied: int = 0
+    available: int = 0
+    version: int = 0
+    loaded_at: float = 0.0
+
+
+def room_key(label: str) -> str:
+    """Document room label -> negotiator room type ("Family Suite" -> "family")"""
+    words = label.lower().split()
+    return words[0] if words else ""
+
+
+# Negotiator room names -> room_key() of the server's roomTypes ("Single Bed",
+# "Double Bed", "Luxury Room", "Family Suite"); hotel_catalog reads it one way,
+# occupancy_calendar the other
+CATALOG_ROOM_ALIASES = {"suite": "family", "deluxe": "luxury", "standard": "double"}
+
+
+def parse_occupancy(text: str, version: int = 0) -> OccupancySnapshot:
+    """Occupancy rate, availability table and totals from the markdown document"""
+    match = _RATE.search(text)
+    rate = float(match.group(1)) / 100 if match else None
+
+    rooms: Dict[str, RoomAvailability] = {}
+    for line in text.splitlines():
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if len(cells) != 4 or not all(cell.isdigit() for cell in cells[1:]):
+            continue  # header, separator or prose
+        label = cells[0]
+        total, occupied, available = (int(cell) for cell in cells[1:])
+        rooms[room_key(label)] = RoomAvailability(room_key(label), label, total, occupied, available)
+
+    totals = {name.lower(): int(value) for name, value in _TOTAL.findall(text)}
+    return OccupancySnapshot(
+        rate=rate,
+        rooms=rooms,
+        total_rooms=totals.get("total rooms", sum(room.total for room in rooms.values())),
+        occupied=totals.get("occupied", sum(room.occupied for room in rooms.values())),
+        available=totals.get("available", sum(room.available for room in rooms.values())),
+        version=version,
+        loaded_at=time.time()
+    )
+
+
+class OccupancySource:
+    """
+    Cached OccupancySnapshot for one file, reloaded when the file changes
+
+    get() returns the cached snapshot without touching the disk until
+    check_interval_s has passed; then one stat() decides whether to
+    re-parse. A file that disappears or fails to parse keeps the last
+    good snapshot.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval_s: Optional[float] = None):
+        self.path = path or os.environ.get("AI_OCCUPANCY_FILE", DEFAULT_OCCUPANCY_FILE)
+        self.check_interval_s = float(check_interval_s if check_interval_s is not None
+                                      else os.environ.get("AI_OCCUPANCY_CHECK_S", 1.0))
+        self.reloads = 0
+        self._snapshot: Optional[OccupancySnapshot] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[OccupancySnapshot]:
+        """Current snapshot, or None if the file has never been readable"""
+        if time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._snapshot
+
+    def invalidate(self):
+        """Re-check the file on the next get(), e.g. right after editing it"""
+        self._next_check = 0.0
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return  # another thread just checked
+            self._next_check = now + self.check_interval_s
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return
+                with open(self.path, encoding="utf-8") as f:
+                    snapshot = parse_occupancy(f.read(), version=self.reloads + 1)
+            except (OSError, ValueError):
+                return
+            if snapshot.rate is None and not snapshot.rooms:
+                return  # empty or half-written file: keep the last good snapshot
+            self._snapshot, self._signature = snapshot, signature
+            self.reloads += 1
+
+
+occupancy_source = OccupancySource()
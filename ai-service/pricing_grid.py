@@ -0,0 +1,142 @@
+"""
+Pricing Grid - every negotiation outcome for the pricing dashboard at once
+The dashboard shows how NegotiatorAgent would answer any offer, for every
+room type, loyalty status and occupancy tier. Calling negotiate_price() per
+cell means an occupancy lookup and a dict per cell; here the same decision
+rules are evaluated as array operations over the whole
+(room_type x offer x loyalty_status x occupancy_tier) grid in one call.
+
+The result is columnar: a decision code, a price (final price, or the
+counter price for "counter"; NaN for "reject") and the add-on value per
+cell. Cells agree exactly with NegotiatorAgent.decide_price(): the same
+float arithmetic in the same order.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from negotiator_agent import NegotiatorAgent
+
+DECISIONS = ("accept", "counter", "counter_with_addons", "reject")
+ACCEPT, COUNTER, COUNTER_WITH_ADDONS, REJECT = range(len(DECISIONS))
+
+TIERS = (1, 2, 3, 4)
+LOYALTY_STATUSES = ("none", "returning", "extended", "long_stay", "referral")
+
+
+def offer_range(low: float, high: float, step: float) -> np.ndarray:
+    """Offers low, low + step, ... up to and including high"""
+    return low + step * np.arange(int(np.floor((high - low) / step + 1e-9)) + 1, dtype=np.float64)
+
+
+def default_offers(negotiator: NegotiatorAgent, step: float = 5.0) -> np.ndarray:
+    """Offers from half the lowest minimum price up to the highest base price"""
+    rules = negotiator.rules.get()
+    low = min(rules.minimum_prices.values()) // 2
+    high = max(rules.base_prices.values())
+    return offer_range(low, high, step)
+
+
+def price_grid(
+    negotiator: NegotiatorAgent,
+    room_types: Optional[Sequence[str]] = None,
+    offers: Optional[Sequence[float]] = None,
+    loyalty_statuses: Optional[Sequence[str]] = None,
+    tiers: Sequence[int] = TIERS
+) -> Dict:
+    """
+    Negotiation outcomes for every combination of the four axes
+
+    Args:
+        negotiator: source of prices, discounts and add-ons
+        room_types: defaults to every priced room type; unknown ones are dropped
+        offers: guest offers per night; defaults to default_offers()
+        loyalty_statuses: defaults to LOYALTY_STATUSES
+        tiers: occupancy tiers (1-4)
+
+    Returns the axes, "decision" (int8 codes into DECISIONS), "price" and
+    "add_on_value", each shaped (room_types, offers, loyalty_statuses, tiers),
+    and the tier of the current occupancy.
+    """
+    # One rules snapshot for the whole grid (see pricing_rules.py)
+    rules = negotiator.rules.get()
+    room_types = [room for room in (room_types or list(rules.base_prices))
+                  if rules.base_prices.get(room)]
+    offers = np.asarray(default_offers(negotiator) if offers is None else offers, dtype=np.float64)
+    loyalty_statuses = list(loyalty_statuses or LOYALTY_STATUSES)
+    tiers = list(tiers)
+
+    # Broadcast axes: (R, 1, 1, 1), (1, O, 1, 1), (1, 1, L, 1), (1, 1, 1, T)
+    base = np.array([rules.base_prices[room] for room in room_types],
+                    dtype=np.float64).reshape(-1, 1, 1, 1)
+    minimum = np.array([rules.minimum_prices[room] for room in room_types],
+                       dtype=np.float64).reshape(-1, 1, 1, 1)
+    offer = offers.reshape(1, -1, 1, 1)
+    loyalty = np.array([rules.loyalty_discount(status) for status in loyalty_statuses],
+                       dtype=np.float64).reshape(1, 1, -1, 1)
+    tier = np.array(tiers, dtype=np.int64).reshape(1, 1, 1, -1)
+    max_discount = np.array([rules.max_discount(t) for t in tiers],
+                            dtype=np.float64).reshape(1, 1, 1, -1)
+
+    # Same expression as decide_price(): base * (1 - max_discount - loyalty)
+    max_offer = base * (1 - max_discount - loyalty)
+
+    shape = (len(room_types), len(offers), len(loyalty_statuses), len(tiers))
+    full_price = offer >= base
+    acceptable = (offer >= minimum) & (offer >= max_offer)
+    low_occupancy = (offer > minimum) & (tier <= 2)
+    above_minimum = offer >= minimum
+    quiet_season = tier == 1
+    # decide_price() branches, first match wins
+    branches = [np.broadcast_to(branch, shape)
+                for branch in (full_price, acceptable, low_occupancy, above_minimum, quiet_season)]
+
+    decision = np.select(
+        branches, [ACCEPT, ACCEPT, COUNTER_WITH_ADDONS, COUNTER, COUNTER_WITH_ADDONS], REJECT
+    ).astype(np.int8)
+    price = np.select(
+        branches,
+        [base, offer, offer, np.minimum(offer + negotiator.COUNTER_STEP, max_offer), minimum],
+        np.nan
+    )
+    low_value = sum(rules.value_adds[a] for a in negotiator.LOW_OCCUPANCY_ADD_ONS)
+    quiet_value = sum(rules.value_adds[a] for a in negotiator.QUIET_SEASON_ADD_ONS)
+    # Float like the value_adds table (a $8.50 breakfast must not become $8)
+    add_on_value = np.select(branches, [0.0, 0.0, low_value, 0.0, quiet_value], 0.0).astype(np.float64)
+
+    return {
+        "room_types": room_types,
+        "offers": offers,
+        "loyalty_statuses": loyalty_statuses,
+        "tiers": tiers,
+        "decisions": list(DECISIONS),
+        "decision": decision,
+        "price": price,
+        "add_on_value": add_on_value,
+        "current_tier": rules.occupancy_tier(negotiator.get_occupancy_rate()),
+        "rules_version": rules.version
+    }
+
+
+def grid_cell(grid: Dict, r: int, o: int, l: int, t: int) -> Dict:
+    """One cell as (decision, price, add_on_value), e.g. to compare with decide_price()"""
+    return {
+        "decision": DECISIONS[int(grid["decision"][r, o, l, t])],
+        "price": float(grid["price"][r, o, l, t]),
+        "add_on_value": float(grid["add_on_value"][r, o, l, t])
+    }
+
+
+def grid_to_json(grid: Dict) -> Dict:
+    """Arrays as nested lists (NaN prices as null) for the API response"""
+    price = grid["price"].astype(object)
+    price[np.isnan(grid["price"])] = None
+    return {
+        **{key: value for key, value in grid.items()
+           if key not in ("offers", "decision", "price", "add_on_value")},
+        "offers": grid["offers"].tolist(),
+        "decision": grid["decision"].tolist(),
+        "price": price.tolist(),
+        "add_on_value": grid["add_on_value"].tolist()
+    }
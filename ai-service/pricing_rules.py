@@ -0,0 +1,267 @@
+"""
+Pricing Rules - negotiator prices and discounts from a data file, hot-reloaded
+Base prices, minimums, value-adds, loyalty discounts and occupancy-tier
+caps live in data/docs/pricing_rules.json (AI_PRICING_RULES_FILE) instead
+of dicts in NegotiatorAgent, so a rate change needs no redeploy.
+
+The file is compiled into PricingRules: the tables plus a decision table
+with one PriceRule per (room, tier, loyalty status) holding everything
+decide_price() needs, max_offer included. Negotiations look a row up in
+O(1) and never parse anything.
+
+The optional quote tables (tier/weekend/season rate multipliers and the
+length-of-stay statuses) are compiled to arrays stay_quote.py indexes per
+night; a file without them quotes the base price.
+
+PricingRulesSource re-compiles when the file changes (stat'ed at most every
+AI_PRICING_RULES_CHECK_S seconds) and swaps the whole PricingRules object
+in one assignment. A negotiation takes one snapshot and uses it throughout,
+so a reload never mixes old and new rules in one answer. A missing or
+invalid file keeps the last good rules (the built-in defaults at first).
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES_FILE = os.path.join(BASE_DIR, "data", "docs", "pricing_rules.json")
+
+TIERS = (1, 2, 3, 4)
+NO_LOYALTY = "none"
+
+# Add-ons bundled into counter_with_addons decisions; every rules file must price them
+LOW_OCCUPANCY_ADD_ONS = ("breakfast", "late_checkout")
+QUIET_SEASON_ADD_ONS = ("breakfast", "cooking_class", "bicycle")
+
+# Used until a rules file has been loaded (same values as pricing_rules.json)
+DEFAULT_RULES = {
+    "base_prices": {"standard": 50, "deluxe": 80, "family": 115},
+    "minimum_prices": {"standard": 35, "deluxe": 60, "family": 85},
+    "room_aliases": {"suite": "family"},
+    "value_adds": {"breakfast": 8, "cooking_class": 15, "late_checkout": 10,
+                   "bicycle": 10, "packed_lunch": 5, "airport_pickup": 0},
+    "loyalty_discounts": {"returning": 0.10, "extended": 0.10, "long_stay": 0.15, "referral": 0.05},
+    "tier_thresholds": [0.30, 0.60, 0.85],
+    "tier_max_discounts": {"1": 0.30, "2": 0.20, "3": 0.10, "4": 0.00},
+    "tier_rate_multipliers": {"1": 0.90, "2": 1.00, "3": 1.05, "4": 1.15},
+    "weekend_multiplier": 1.10,
+    "weekend_nights": [4, 5],
+    # Base prices are the peak-season (October-April) rates; May-September is low season
+    "season_multipliers": {"5": 0.85, "6": 0.85, "7": 0.85, "8": 0.85, "9": 0.85},
+    "length_of_stay_statuses": {"3": "extended", "7": "long_stay"},
+}
+
+
+class PriceRule(NamedTuple):
+    """Everything decide_price() needs for one (room, tier, loyalty status)"""
+    base_price: float
+    minimum_price: float
+    loyalty_discount: float
+    max_discount: float
+    max_offer: float  # lowest price the negotiator may go to
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    """Compiled pricing rules; replaced as a whole on reload, never mutated"""
+    base_prices: Dict[str, float]       # aliases included ("suite")
+    minimum_prices: Dict[str, float]
+    value_adds: Dict[str, float]
+    loyalty_discounts: Dict[str, float]
+    tier_thresholds: Tuple[float, ...]  # upper occupancy bound of tiers 1..3
+    tier_max_discounts: Dict[int, float]
+    table: Dict[Tuple[str, int, str], PriceRule] = field(repr=False)
+    # Stay quotes: index 0 is tier 1 / Monday / January
+    tier_multipliers: Tuple[float, ...] = (1.0,) * len(TIERS)
+    weekday_multipliers: Tuple[float, ...] = (1.0,) * 7
+    month_multipliers: Tuple[float, ...] = (1.0,) * 12
+    stay_length_statuses: Tuple[Tuple[int, str], ...] = ()  # (min nights, status), longest first
+    version: int = 0
+    loaded_at: float = 0.0
+
+    def lookup(self, room_type: str, occupancy_tier: int, loyalty_status: str) -> Optional[PriceRule]:
+        """Decision-table row, None for an unknown room type"""
+        rule = self.table.get((room_type, occupancy_tier, loyalty_status))
+        if rule is None and room_type in self.base_prices:
+            # Loyalty status (e.g. "Returning") or tier outside the table
+            rule = price_rule(self.base_prices[room_type], self.minimum_prices[room_type],
+                              self.loyalty_discount(loyalty_status), self.max_discount(occupancy_tier))
+        return rule
+
+    def loyalty_discount(self, loyalty_status: str) -> float:
+        return self.loyalty_discounts.get(loyalty_status.lower(), 0.0)
+
+    def max_discount(self, occupancy_tier: int) -> float:
+        return self.tier_max_discounts.get(occupancy_tier, 0.0)
+
+    def stay_length_status(self, nights: int) -> Optional[str]:
+        """Loyalty status a stay of this many nights earns ("extended", "long_stay")"""
+        for min_nights, status in self.stay_length_statuses:
+            if nights >= min_nights:
+                return status
+        return None
+
+    def occupancy_tier(self, occupancy_rate: float) -> int:
+        for tier, upper in enumerate(self.tier_thresholds, 1):
+            if occupancy_rate <= upper:
+                return tier
+        return len(self.tier_thresholds) + 1
+
+
+def price_rule(base_price: float, minimum_price: float, loyalty_discount: float, max_discount: float) -> PriceRule:
+    return PriceRule(
+        base_price=base_price,
+        minimum_price=minimum_price,
+        loyalty_discount=loyalty_discount,
+        max_discount=max_discount,
+        # Same expression NegotiatorAgent always used
+        max_offer=base_price * (1 - max_discount - loyalty_discount)
+    )
+
+
+def _number(value) -> float:
+    """JSON number as given (50 stays an int, so messages read "$50/night")"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Invalid pricing rules: {value!r} is not a number")
+    return value
+
+
+def compile_rules(raw: Dict, version: int = 0) -> PricingRules:
+    """
+    Validate a rules document and precompute the decision table
+
+    Raises ValueError for missing tables, non-numeric values, a minimum
+    above its base price or an add-on the negotiator offers missing from
+    value_adds.
+    """
+    try:
+        aliases = dict(raw.get("room_aliases", {}))
+        base = {room: _number(price) for room, price in raw["base_prices"].items()}
+        minimum = {room: _number(price) for room, price in raw["minimum_prices"].items()}
+        value_adds = {name: _number(value) for name, value in raw["value_adds"].items()}
+        loyalty = {status.lower(): _number(discount) for status, discount in raw["loyalty_discounts"].items()}
+        thresholds = tuple(_number(bound) for bound in raw["tier_thresholds"])
+        caps = {int(tier): _number(cap) for tier, cap in raw["tier_max_discounts"].items()}
+        tier_rates = {int(tier): _number(rate) for tier, rate in raw.get("tier_rate_multipliers", {}).items()}
+        weekend = _number(raw.get("weekend_multiplier", 1.0))
+        weekend_nights = {int(day) for day in raw.get("weekend_nights", ())}
+        seasons = {int(month): _number(rate) for month, rate in raw.get("season_multipliers", {}).items()}
+        stay_lengths = {int(nights): str(status).lower()
+                        for nights, status in raw.get("length_of_stay_statuses", {}).items()}
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid pricing rules: {e!r}") from e
+
+    for room, price in base.items():
+        if room not in minimum:
+            raise ValueError(f"Invalid pricing rules: no minimum price for {room}")
+        if minimum[room] > price:
+            raise ValueError(f"Invalid pricing rules: {room} minimum above its base price")
+    missing = sorted(set(LOW_OCCUPANCY_ADD_ONS + QUIET_SEASON_ADD_ONS) - set(value_adds))
+    if missing:
+        raise ValueError(f"Invalid pricing rules: value_adds has no {', '.join(missing)}")
+    if list(thresholds) != sorted(thresholds):
+        raise ValueError("Invalid pricing rules: tier_thresholds must be increasing")
+    if not weekend_nights <= set(range(7)) or not set(seasons) <= set(range(1, 13)):
+        raise ValueError("Invalid pricing rules: weekend_nights are 0-6 (Monday 0), season months 1-12")
+    for status in stay_lengths.values():
+        if status not in loyalty:
+            raise ValueError(f"Invalid pricing rules: length-of-stay status {status} has no loyalty discount")
+
+    for alias, room in aliases.items():
+        if room in base:
+            base[alias], minimum[alias] = base[room], minimum[room]
+
+    tiers = sorted(set(TIERS) | set(caps))
+    table = {}
+    for room, base_price in base.items():
+        for tier in tiers:
+            max_discount = caps.get(tier, 0.0)
+            for status, loyalty_discount in [(NO_LOYALTY, 0.0), *loyalty.items()]:
+                table[(room, tier, status)] = price_rule(base_price, minimum[room], loyalty_discount, max_discount)
+
+    return PricingRules(
+        base_prices=base,
+        minimum_prices=minimum,
+        value_adds=value_adds,
+        loyalty_discounts=loyalty,
+        tier_thresholds=thresholds,
+        tier_max_discounts=caps,
+        table=table,
+        tier_multipliers=tuple(tier_rates.get(tier, 1.0) for tier in range(1, len(thresholds) + 2)),
+        weekday_multipliers=tuple(weekend if day in weekend_nights else 1.0 for day in range(7)),
+        month_multipliers=tuple(seasons.get(month, 1.0) for month in range(1, 13)),
+        stay_length_statuses=tuple(sorted(stay_lengths.items(), reverse=True)),
+        version=version,
+        loaded_at=time.time()
+    )
+
+
+class PricingRulesSource:
+    """
+    Current PricingRules for one file, re-compiled when the file changes
+
+    Like OccupancySource: get() returns the cached rules without touching
+    the disk until check_interval_s has passed, then one stat() decides
+    whether to reload.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval_s: Optional[float] = None):
+        self.path = path or os.environ.get("AI_PRICING_RULES_FILE", DEFAULT_RULES_FILE)
+        self.check_interval_s = float(check_interval_s if check_interval_s is not None
+                                      else os.environ.get("AI_PRICING_RULES_CHECK_S", 1.0))
+        self.reloads = 0
+        self.errors: List[str] = []  # last few reload failures, for /ready
+        self._rules = compile_rules(DEFAULT_RULES)
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> PricingRules:
+        """Current rules snapshot; hold on to it for the whole negotiation"""
+        if time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._rules
+
+    def invalidate(self):
+        """Re-check the file on the next get(), e.g. right after editing it"""
+        self._next_check = 0.0
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return  # another thread just checked
+            self._next_check = now + self.check_interval_s
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return
+                with open(self.path, encoding="utf-8") as f:
+                    rules = compile_rules(json.load(f), version=self.reloads + 1)
+            except OSError:
+                return
+            except ValueError as e:  # includes json.JSONDecodeError
+                self._signature = signature  # don't retry until the file changes again
+                self.errors = (self.errors + [f"{time.strftime('%H:%M:%S')} {e}"])[-5:]
+                return
+            self._rules, self._signature = rules, signature
+            self.reloads += 1
+
+    def stats(self) -> Dict:
+        rules = self._rules
+        return {
+            "path": self.path,
+            "version": rules.version,
+            "loaded_at": rules.loaded_at,
+            "rooms": sorted(rules.base_prices),
+            "table_rows": len(rules.table),
+            "errors": list(self.errors)
+        }
+
+
+pricing_rules_source = PricingRulesSource()
@@ -3,13 +3,41 @@ Sentiment Analysis & Crisis Manager
 Detects guest emotion and adapts response strategy
 """
 
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
 from langchain_community.vectorstores import Chroma
 
+from keyword_engine import KeywordMatcher
+
+# Regular inflections a lexicon word also matches as ("thank" -> "thanks")
+_INFLECTIONS = ["", "s", "es", "d", "ed", "ing"]
+
+SEVERITY_ORDER = ["critical", "severe", "moderate", "minor"]
+
+
+@dataclass
+class SentimentReport:
+    """Everything analyze() finds in one pass, with the terms that decided it"""
+    sentiment: str
+    score: float
+    is_complaint: bool
+    severity: str
+    matched_positive: List[str] = field(default_factory=list)
+    matched_negative: List[str] = field(default_factory=list)
+    matched_negations: List[str] = field(default_factory=list)
+    matched_complaint: List[str] = field(default_factory=list)
+    matched_severity: List[str] = field(default_factory=list)
+    exclamation_count: int = 0
+    question_marks: int = 0
+    backend: str = "lexicon"  # "model", or "lexicon_fallback" when the model was busy
+
 
 class SentimentAnalyzer:
-    def __init__(self, db: Chroma):
+    def __init__(self, db: Chroma, model=None):
         self.db = db
+        # Optional model backend (sentiment_model.MicroBatcher); scores the
+        # polarity, while complaints and severity stay with the lexicon
+        self.model = model
         
         # Sentiment keywords
         self.positive_words = {
@@ -49,37 +77,86 @@ class SentimentAnalyzer:
             "moderate": ["dirty", "issue", "problem", "noise", "not ready", "dissatisfied", "unsatisfied"],
             "minor": ["small", "minor", "light", "forgot"]
         }
+        
+        self.complaint_phrases = [
+            "broken", "doesn't work", "not working", "issue", "problem",
+            "dirty", "rude", "disappointed", "angry", "complaint",
+            "refund", "compensation", "fix", "manager",
+            # Additional complaint indicators
+            "not satisfied", "dissatisfied", "unsatisfied", "unhappy",
+            "dissapointed", "dissappointed", "disapointed",  # Misspellings
+            "poor service", "bad service", "terrible", "horrible", "awful",
+            "unacceptable", "ridiculous", "worst", "never again",
+            "want to speak", "speak to manager", "very disappointed",
+            "not happy", "upset", "frustrated", "annoyed"
+        ]
+        
+        self._compile_lexicon()
     
-    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
+    def _compile_lexicon(self):
         """
-        Analyze sentiment of user text
-        Returns: (sentiment, score)
-        sentiment: "positive", "negative", "neutral", "angry"
-        score: -2 to +2
+        One word-boundary matcher over every lexicon term ("bad" no longer
+        fires inside "Badulla"). Each term is its own class, named
+        "<kind>:<term>", so a single scan yields every matched term.
+        """
+        lexicon: Dict[str, List[str]] = {}
+        
+        def add(kind: str, terms):
+            for term in terms:
+                if " " in term:
+                    keywords = [term]
+                else:
+                    keywords = [term + suffix for suffix in _INFLECTIONS]
+                lexicon[f"{kind}:{term}"] = keywords
+        
+        add("negation", self.negation_phrases)
+        add("negative", self.negative_words)
+        add("positive", self.positive_words)
+        add("complaint", self.complaint_phrases)
+        for severity in SEVERITY_ORDER:
+            add(f"severity.{severity}", self.issue_severity_keywords[severity])
+        
+        self._lexicon = KeywordMatcher(lexicon)
+        self._complaint_mask = 0
+        for term in self.complaint_phrases:
+            self._complaint_mask |= self._lexicon.bit(f"complaint:{term}")
+    
+    def _scan(self, text: str) -> Dict[str, List[str]]:
+        """Matched lexicon terms by kind ("negative", "complaint", "severity.critical"...)"""
+        matched: Dict[str, List[str]] = {}
+        for name in self._lexicon.names(self._lexicon.scan_mask(text)):
+            kind, _, term = name.partition(":")
+            matched.setdefault(kind, []).append(term)
+        return matched
+    
+    @staticmethod
+    def _severity(matched: Dict[str, List[str]]) -> Tuple[str, List[str]]:
+        """Highest severity level with a matched term, and its terms"""
+        for level in SEVERITY_ORDER:
+            terms = matched.get(f"severity.{level}")
+            if terms:
+                return level, terms
+        return "minor", []
+    
+    def analyze(self, text: str) -> SentimentReport:
+        """
+        Sentiment, score, complaint flag and severity from a single scan of
+        the text, plus the matched terms behind each of them
         """
-        text_lower = text.lower()
-        score = 0
-        
-        # FIRST: Check for negation phrases (these override individual word sentiment)
-        negation_found = False
-        for phrase in self.negation_phrases:
-            if phrase in text_lower:
-                score -= 1.5  # Strong negative signal
-                negation_found = True
-        
-        # Count negative words first
-        for word, value in self.negative_words.items():
-            if word in text_lower:
-                score += value
-        
-        # Only count positive words if no negation is present
-        if not negation_found:
-            for word, value in self.positive_words.items():
-                if word in text_lower:
-                    score += value
+        matched = self._scan(text)
+        
+        negations = matched.get("negation", [])
+        negatives = matched.get("negative", [])
+        positives = matched.get("positive", [])
+        
+        # Negation phrases override individual word sentiment
+        score = -1.5 * len(negations)
+        score += sum(self.negative_words[word] for word in negatives)
+        if not negations:
+            score += sum(self.positive_words[word] for word in positives)
         
         # Detect intensity markers
-        if "!" in text or "!!" in text or "!!!" in text:
+        if "!" in text:
             if score < 0:
                 score *= 1.3  # Amplify negative
             else:
@@ -88,43 +165,67 @@ class SentimentAnalyzer:
         if "?" in text and score < 0:
             score *= 0.7  # Reduce intensity if questioning
         
-        # Determine sentiment based on score
+        backend = "lexicon"
+        if self.model is not None:
+            model_score = self.model.score(text)
+            if model_score is None:
+                backend = "lexicon_fallback"
+            else:
+                score, backend = model_score, "model"
+        
+        severity, severity_terms = self._severity(matched)
+        
+        complaint_terms = matched.get("complaint", [])
+        return SentimentReport(
+            sentiment=self._label(score),
+            score=self._clamp(score),
+            is_complaint=bool(complaint_terms),
+            severity=severity,
+            matched_positive=positives,
+            matched_negative=negatives,
+            matched_negations=negations,
+            matched_complaint=complaint_terms,
+            matched_severity=severity_terms,
+            exclamation_count=text.count("!"),
+            question_marks=text.count("?"),
+            backend=backend
+        )
+    
+    @staticmethod
+    def _label(score: float) -> str:
         if score >= 1:
-            return ("positive", min(score, 2.0))
+            return "positive"
         elif score <= -1.5:
-            return ("angry", max(score, -2.0))
+            return "angry"
         elif score < -0.5:
-            return ("negative", score)
-        else:
-            return ("neutral", score)
+            return "negative"
+        return "neutral"
+    
+    @staticmethod
+    def _clamp(score: float) -> float:
+        if score >= 1:
+            return min(score, 2.0)
+        elif score <= -1.5:
+            return max(score, -2.0)
+        return score
+    
+    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
+        """
+        Analyze sentiment of user text
+        Returns: (sentiment, score)
+        sentiment: "positive", "negative", "neutral", "angry"
+        score: -2 to +2
+        """
+        report = self.analyze(text)
+        return (report.sentiment, report.score)
     
     def detect_issue_severity(self, text: str) -> str:
-        """Detect severity of reported issue"""
-        text_lower = text.lower()
-        
-        for severity, keywords in self.issue_severity_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return severity
-        
-        return "minor"
+        """Detect severity of reported issue (lexicon only: no sentiment model call)"""
+        return self._severity(self._scan(text))[0]
     
     def is_complaint(self, text: str) -> bool:
-        """Check if text is a complaint"""
-        complaint_phrases = [
-            "broken", "doesn't work", "not working", "issue", "problem",
-            "dirty", "rude", "disappointed", "angry", "complaint",
-            "refund", "compensation", "fix", "manager",
-            # Additional complaint indicators
-            "not satisfied", "dissatisfied", "unsatisfied", "unhappy",
-            "dissapointed", "dissappointed", "disapointed",  # Misspellings
-            "poor service", "bad service", "terrible", "horrible", "awful",
-            "unacceptable", "ridiculous", "worst", "never again",
-            "want to speak", "speak to manager", "very disappointed",
-            "not happy", "upset", "frustrated", "annoyed"
-        ]
-        text_lower = text.lower()
-        return any(phrase in text_lower for phrase in complaint_phrases)
+        """Check if text is a complaint (lexicon only: no sentiment model call)"""
+        return bool(self._lexicon.scan_mask(text) & self._complaint_mask)
     
     def generate_system_prompt(self, sentiment: str, is_complaint: bool, severity: str) -> str:
         """Generate contextual system prompt based on sentiment
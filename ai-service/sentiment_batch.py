@@ -0,0 +1,266 @@
+"""
+Batch Sentiment - vectorized scoring for review backfills
+Scores many texts with the SentimentAnalyzer lexicon at once, for
+/api/sentiment/batch and for backfilling the Express server's Review
+collection offline:
+
+    mongoexport -d <db> -c reviews --type=json > reviews.jsonl
+    python sentiment_batch.py reviews.jsonl -o review_scores.jsonl
+
+Each text is scanned once by the analyzer's compiled matcher; the scan
+masks of a chunk are unpacked into a (texts x lexicon terms) 0/1 matrix and
+one matrix product against the lexicon weights gives every score. Results
+are identical to SentimentAnalyzer.analyze() with the lexicon backend (an
+optional sentiment_model is not consulted here). Chunks are spread over a
+process pool.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from sentiment_agent import SEVERITY_ORDER, SentimentAnalyzer
+
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_TEXT_FIELDS = ("title", "comment")
+
+# Feature columns of the lexicon weight matrix
+_NEGATIONS, _NEGATIVE, _POSITIVE, _COMPLAINTS = range(4)
+_SEVERITY = 4  # one column per SEVERITY_ORDER level from here on
+
+
+class BatchSentimentScorer:
+    """
+    Lexicon-matrix sentiment scorer over a SentimentAnalyzer
+
+    The analyzer's matcher gives every lexicon term its own bit, so a text's
+    scan mask is one row of the term matrix. Presence, not counts: analyze()
+    scores each matched term once, and batch scores must agree with it.
+    """
+
+    def __init__(self, analyzer: Optional[SentimentAnalyzer] = None):
+        self.analyzer = analyzer or SentimentAnalyzer(None)
+        self._matcher = self.analyzer._lexicon
+        terms = self._matcher.classes
+        # Bit 0 of a mask is the matcher's reserved phrase flag
+        self._mask_bytes = (len(terms) + 1 + 7) // 8
+
+        self.weights = np.zeros((len(terms), _SEVERITY + len(SEVERITY_ORDER)))
+        for column, name in enumerate(terms):
+            kind, _, term = name.partition(":")
+            if kind == "negation":
+                self.weights[column, _NEGATIONS] = 1
+            elif kind == "negative":
+                self.weights[column, _NEGATIVE] = self.analyzer.negative_words[term]
+            elif kind == "positive":
+                self.weights[column, _POSITIVE] = self.analyzer.positive_words[term]
+            elif kind == "complaint":
+                self.weights[column, _COMPLAINTS] = 1
+            else:  # "severity.<level>"
+                level = kind.partition(".")[2]
+                self.weights[column, _SEVERITY + SEVERITY_ORDER.index(level)] = 1
+
+    def term_matrix(self, texts: List[str]) -> np.ndarray:
+        """(len(texts) x lexicon terms) 0/1 matrix of matched terms"""
+        scan_mask, size = self._matcher.scan_mask, self._mask_bytes
+        packed = b"".join(scan_mask(text).to_bytes(size, "little") for text in texts)
+        bits = np.unpackbits(
+            np.frombuffer(packed, dtype=np.uint8).reshape(len(texts), size),
+            axis=1, bitorder="little"
+        )
+        return bits[:, 1:len(self._matcher.classes) + 1]
+
+    def score(self, texts: List[str]) -> List[Dict]:
+        """/api/sentiment results (sentiment, score, is_complaint, severity) per text"""
+        if not texts:
+            return []
+        features = self.term_matrix(texts) @ self.weights
+
+        # Same arithmetic, in the same order, as SentimentAnalyzer.analyze()
+        negated = features[:, _NEGATIONS] > 0
+        score = -1.5 * features[:, _NEGATIONS] + features[:, _NEGATIVE]
+        score = score + np.where(negated, 0.0, features[:, _POSITIVE])
+        exclaims = np.fromiter(("!" in text for text in texts), dtype=bool, count=len(texts))
+        questions = np.fromiter(("?" in text for text in texts), dtype=bool, count=len(texts))
+        score = np.where(exclaims, score * np.where(score < 0, 1.3, 1.2), score)
+        score = np.where(questions & (score < 0), score * 0.7, score)
+
+        labels = np.select(
+            [score >= 1, score <= -1.5, score < -0.5],
+            ["positive", "angry", "negative"], "neutral"
+        )
+        clamped = np.where(score >= 1, np.minimum(score, 2.0),
+                           np.where(score <= -1.5, np.maximum(score, -2.0), score))
+
+        # First matched level in SEVERITY_ORDER, "minor" when none matched
+        severity_hits = features[:, _SEVERITY:] > 0
+        first = np.where(severity_hits.any(axis=1), severity_hits.argmax(axis=1),
+                         SEVERITY_ORDER.index("minor"))
+        severities = np.asarray(SEVERITY_ORDER)[first]
+        complaints = features[:, _COMPLAINTS] > 0
+
+        return [
+            {"sentiment": label, "score": value, "is_complaint": complaint, "severity": severity}
+            for label, value, complaint, severity in zip(
+                labels.tolist(), clamped.tolist(), complaints.tolist(), severities.tolist()
+            )
+        ]
+
+
+# ============================================================================
+# PROCESS POOL
+# ============================================================================
+
+_worker_scorer: Optional[BatchSentimentScorer] = None
+
+
+def _init_worker():
+    global _worker_scorer
+    _worker_scorer = BatchSentimentScorer()
+
+
+def _score_chunk(texts: List[str]) -> List[Dict]:
+    return _worker_scorer.score(texts)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_stream(
+    chunks: Iterable[List[str]],
+    workers: Optional[int] = None
+) -> Iterator[List[Dict]]:
+    """
+    Score chunks of texts in a process pool, yielding results in input order
+
+    At most two chunks per worker are in flight, so an arbitrarily long input
+    is never held in memory. workers=1 scores in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        scorer = BatchSentimentScorer()
+        for chunk in chunks:
+            yield scorer.score(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_texts(
+    texts: List[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[Dict]:
+    """Batch results for texts, spread across workers when there is more than one chunk"""
+    if len(texts) <= chunk_size:
+        workers = 1
+    results = []
+    for chunk_results in score_stream(_chunks(texts, chunk_size), workers):
+        results.extend(chunk_results)
+    return results
+
+
+# ============================================================================
+# JSONL BACKFILL CLI
+# ============================================================================
+
+def review_text(record: Dict, text_fields: Iterable[str]) -> str:
+    """Review fields joined into one text ("title. comment")"""
+    return ". ".join(str(record[name]) for name in text_fields if record.get(name))
+
+
+def backfill(
+    source,
+    sink,
+    text_fields: Iterable[str] = DEFAULT_TEXT_FIELDS,
+    id_field: str = "_id",
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Tuple[int, int]:
+    """
+    Score a JSONL stream of reviews into a JSONL stream of
+    {id_field, sentiment, score, is_complaint, severity} lines
+
+    Returns (scored, skipped); blank and malformed lines are skipped.
+    """
+    text_fields = tuple(text_fields)
+    ids: deque = deque()
+    skipped = 0
+
+    def texts():
+        nonlocal skipped
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                print(f"[WARNING] line {line_number}: not valid JSON, skipped", file=sys.stderr)
+                continue
+            ids.append(record.get(id_field))
+            yield review_text(record, text_fields)
+
+    scored = 0
+    for results in score_stream(_chunks(texts(), chunk_size), workers):
+        for result in results:
+            sink.write(json.dumps({id_field: ids.popleft(), **result}) + "\n")
+        scored += len(results)
+    return scored, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill sentiment scores for JSONL reviews")
+    parser.add_argument("input", help="Reviews as JSONL (mongoexport output), '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Scores as JSONL, '-' for stdout")
+    parser.add_argument("--text-fields", default=",".join(DEFAULT_TEXT_FIELDS),
+                        help="Comma-separated review fields to score (default: title,comment)")
+    parser.add_argument("--id-field", default="_id", help="Field copied to each output line")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        scored, skipped = backfill(
+            source, sink,
+            text_fields=[name.strip() for name in args.text_fields.split(",") if name.strip()],
+            id_field=args.id_field,
+            workers=args.workers,
+            chunk_size=args.chunk_size
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(f"Scored {scored} reviews in {time.perf_counter() - start:.2f}s"
+          f" ({skipped} skipped)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
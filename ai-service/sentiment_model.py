@@ -0,0 +1,287 @@
+"""
+Sentiment Model - optional transformer sentiment backend with micro-batching
+The keyword lexicon misses sarcasm, misspellings outside its list and
+negations it has no phrase for. A small CPU model (e.g. a quantized
+DistilBERT SST-2 exported to ONNX) catches those, at a few milliseconds
+per forward pass.
+
+Backends, selected with AI_SENTIMENT_BACKEND:
+- "lexicon": keyword scoring only (default)
+- "onnx": ONNX Runtime model from AI_SENTIMENT_MODEL_PATH, a directory
+  with model.onnx (or model_quantized.onnx), tokenizer.json and, optionally,
+  config.json for the label names
+- "package.module:factory": any callable returning an object with
+  predict_batch(texts) -> scores, or register a name with
+  register_sentiment_backend()
+
+The model sits behind a MicroBatcher: concurrent callers (/api/chat turns,
+/api/sentiment requests) are collected for up to AI_SENTIMENT_BATCH_WAIT_MS
+and scored in one forward pass. When AI_SENTIMENT_QUEUE_MAX texts are
+already waiting, or the result is not back within
+AI_SENTIMENT_MODEL_TIMEOUT_MS, the caller keeps its lexicon score instead.
+"""
+
+import importlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_BACKEND = "lexicon"
+
+SentimentModelFactory = Callable[..., object]
+
+_backends: Dict[str, SentimentModelFactory] = {}
+
+
+def register_sentiment_backend(name: str, factory: SentimentModelFactory):
+    """Register a named backend; factory(**options) must return a model with predict_batch()"""
+    _backends[name] = factory
+
+
+def available_backends() -> List[str]:
+    return sorted([DEFAULT_BACKEND, *_backends])
+
+
+def create_sentiment_model(backend: str = None, **options) -> Optional["MicroBatcher"]:
+    """
+    Build the model backend for SentimentAnalyzer.model
+
+    Args:
+        backend: "lexicon", a registered backend name or "module:callable";
+                 defaults to $AI_SENTIMENT_BACKEND, then "lexicon"
+        options: passed through to the backend factory
+
+    Returns None for the lexicon backend, otherwise the model wrapped in a
+    MicroBatcher (limits from env).
+    """
+    backend = backend or os.environ.get("AI_SENTIMENT_BACKEND", DEFAULT_BACKEND)
+    if backend == DEFAULT_BACKEND:
+        return None
+    return MicroBatcher(_build_backend(backend, **options))
+
+
+def _build_backend(backend: str, **options):
+    if backend in _backends:
+        return _backends[backend](**options)
+
+    if ":" in backend:
+        module_name, attr = backend.split(":", 1)
+        model = getattr(importlib.import_module(module_name), attr)(**options)
+        if not callable(getattr(model, "predict_batch", None)):
+            raise TypeError(f"{backend} did not return a model with predict_batch()")
+        return model
+
+    raise ValueError(
+        f"Unknown sentiment backend '{backend}'. "
+        f"Available: {', '.join(available_backends())} or 'module:factory'"
+    )
+
+
+# ============================================================================
+# ONNX BACKEND
+# ============================================================================
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class OnnxSentimentModel:
+    """
+    Sequence-classification model run with ONNX Runtime on CPU
+
+    Works with binary (negative/positive) and three-way (negative/neutral/
+    positive) heads. The score is 2 * (P(positive) - P(negative)), on the
+    same -2..+2 scale as the lexicon.
+    """
+
+    def __init__(self, model_path: str, max_length: int = 128, threads: Optional[int] = None):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx sentiment backend needs onnxruntime and tokenizers: "
+                "pip install onnxruntime tokenizers (or set AI_SENTIMENT_BACKEND=lexicon)"
+            ) from e
+
+        model_file = next(
+            (os.path.join(model_path, name) for name in ("model_quantized.onnx", "model.onnx")
+             if os.path.exists(os.path.join(model_path, name))),
+            None
+        )
+        if model_file is None:
+            raise FileNotFoundError(f"No model.onnx or model_quantized.onnx in {model_path}")
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_file, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        labels = ["negative", "positive"]
+        config_file = os.path.join(model_path, "config.json")
+        if os.path.exists(config_file):
+            with open(config_file, encoding="utf-8") as f:
+                id2label = json.load(f).get("id2label", {})
+            if id2label:
+                labels = [id2label[key].lower() for key in sorted(id2label, key=int)]
+        self.negative = labels.index("negative")
+        self.positive = labels.index("positive")
+
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        """Sentiment score (-2..+2) for each text, in one forward pass"""
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        probabilities = _softmax(logits)
+        return (2.0 * (probabilities[:, self.positive] - probabilities[:, self.negative])).tolist()
+
+
+def _onnx_backend(model_path: str = None, **options):
+    path = model_path or os.environ.get("AI_SENTIMENT_MODEL_PATH")
+    if not path:
+        raise ValueError("The onnx sentiment backend needs AI_SENTIMENT_MODEL_PATH")
+    return OnnxSentimentModel(path, **options)
+
+
+register_sentiment_backend("onnx", _onnx_backend)
+
+
+# ============================================================================
+# MICRO-BATCHER
+# ============================================================================
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class MicroBatcher:
+    """
+    Collects concurrent score() calls into batches for one model
+
+    A single worker thread takes the first waiting text, keeps collecting for
+    max_wait_ms or until max_batch texts are in, and runs them through
+    predict_batch() together. The queue is bounded: score() returns None
+    instead of waiting when it is full or the result is late, so callers
+    never block on a saturated model.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        timeout_ms: Optional[float] = None
+    ):
+        self.model = model
+        self.max_batch = int(max_batch if max_batch is not None
+                             else _env_number("AI_SENTIMENT_BATCH_MAX_SIZE", 32))
+        self.max_wait_s = (max_wait_ms if max_wait_ms is not None
+                           else _env_number("AI_SENTIMENT_BATCH_WAIT_MS", 2)) / 1000
+        self.timeout_s = (timeout_ms if timeout_ms is not None
+                          else _env_number("AI_SENTIMENT_MODEL_TIMEOUT_MS", 250)) / 1000
+        self.max_queue = int(max_queue if max_queue is not None
+                             else _env_number("AI_SENTIMENT_QUEUE_MAX", 64))
+        self.counts = {"scored": 0, "batches": 0, "saturated": 0, "timeouts": 0, "errors": 0}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Optional[Future]:
+        """Queue text for the next batch; None when the queue is full"""
+        future = Future()
+        try:
+            self._queue.put_nowait((text, future))
+        except queue.Full:
+            self._count("saturated")
+            return None
+        return future
+
+    def score(self, text: str) -> Optional[float]:
+        """Model score for text, or None to fall back (saturated, late or failed)"""
+        future = self.submit(text)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeout:
+            self._count("timeouts")
+            return None
+        except Exception:
+            return None
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def _next_batch(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            # Whatever queued up during the last forward pass joins at once
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [text for text, _ in batch]
+            try:
+                scores = self.model.predict_batch(texts)
+            except Exception as e:
+                self._count("errors", len(batch))
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), value in zip(batch, scores):
+                future.set_result(float(value))
+            with self._lock:
+                self.counts["scored"] += len(batch)
+                self.counts["batches"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self.counts)
+        counts["mean_batch"] = round(counts["scored"] / counts["batches"], 2) if counts["batches"] else 0.0
+        counts["queued"] = self._queue.qsize()
+        return {
+            "model": type(self.model).__name__,
+            **counts,
+            "limits": {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_s * 1000,
+                "max_queue": self.max_queue,
+                "timeout_ms": self.timeout_s * 1000
+            }
+        }
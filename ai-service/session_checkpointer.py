@@ -0,0 +1,290 @@
+"""
+Session Checkpointers - pluggable persistence for LangGraph conversation state
+Lets multi-turn negotiations survive restarts and be shared by several
+uvicorn worker processes.
+
+Backends:
+- "sqlite": SQLite file in WAL mode (default). Every worker process on the
+  host opens the same file; WAL lets readers run alongside the single writer
+  and busy_timeout serializes concurrent commits instead of failing them.
+- "memory": in-process MemorySaver (single worker, lost on restart)
+- "package.module:factory": any callable returning a BaseCheckpointSaver,
+  or register a name with register_checkpointer_backend()
+
+Selected with the AI_CHECKPOINTER environment variable. Whatever the backend,
+create_checkpointer() wraps it in a BoundedCheckpointer so the number of
+sessions, their idle time and their stored bytes stay within budget.
+"""
+
+import importlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SQLITE_PATH = os.path.join(BASE_DIR, "sessions.sqlite")
+DEFAULT_BACKEND = "sqlite"
+
+CheckpointerFactory = Callable[..., BaseCheckpointSaver]
+
+_backends: Dict[str, CheckpointerFactory] = {}
+
+
+def register_checkpointer_backend(name: str, factory: CheckpointerFactory):
+    """Register a named backend; factory(**options) must return a BaseCheckpointSaver"""
+    _backends[name] = factory
+
+
+def available_backends() -> List[str]:
+    return sorted(_backends)
+
+
+def create_checkpointer(backend: str = None, bounded: bool = True, **options) -> BaseCheckpointSaver:
+    """
+    Build the checkpointer for the workflow
+
+    Args:
+        backend: registered backend name or "module:callable";
+                 defaults to $AI_CHECKPOINTER, then "sqlite"
+        bounded: wrap the backend in a BoundedCheckpointer (limits from env)
+        options: passed through to the backend factory
+    """
+    saver = _build_backend(backend or os.environ.get("AI_CHECKPOINTER", DEFAULT_BACKEND), **options)
+    return BoundedCheckpointer(saver) if bounded else saver
+
+
+def _build_backend(backend: str, **options) -> BaseCheckpointSaver:
+    if backend in _backends:
+        return _backends[backend](**options)
+
+    if ":" in backend:
+        module_name, attr = backend.split(":", 1)
+        factory = getattr(importlib.import_module(module_name), attr)
+        checkpointer = factory(**options)
+        if not isinstance(checkpointer, BaseCheckpointSaver):
+            raise TypeError(f"{backend} did not return a BaseCheckpointSaver")
+        return checkpointer
+
+    raise ValueError(
+        f"Unknown checkpointer backend '{backend}'. "
+        f"Available: {', '.join(available_backends())} or 'module:factory'"
+    )
+
+
+# ============================================================================
+# BOUNDED SESSION STORE (LRU + idle TTL + byte budget)
+# ============================================================================
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass
+class SessionUsage:
+    """Bookkeeping for one thread_id"""
+    last_access: float  # wall clock, comparable with checkpoint timestamps
+    bytes: int = 0      # serialized bytes written for this session
+
+
+class BoundedCheckpointer(BaseCheckpointSaver):
+    """
+    Wraps any checkpointer and keeps its sessions within budget
+
+    - max_sessions: least-recently-used threads are evicted beyond this count
+    - idle_ttl_s: threads idle for longer than this are evicted
+    - max_bytes: LRU threads are evicted while stored bytes exceed this
+
+    Sessions are kept in an OrderedDict in access order, so every check only
+    looks at the front of the queue: O(1) amortized per checkpoint write.
+    Bytes are the serialized channel values each write adds, which is what
+    append-only savers (MemorySaver, SqliteSaver) actually retain.
+
+    Bookkeeping is per process. When several workers share a store, a thread
+    is only evicted after its latest checkpoint confirms it is idle
+    everywhere, so one worker never drops a session another is serving.
+    """
+
+    def __init__(
+        self,
+        inner: BaseCheckpointSaver,
+        max_sessions: Optional[int] = None,
+        idle_ttl_s: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.max_sessions = int(max_sessions if max_sessions is not None
+                                else _env_number("AI_MAX_SESSIONS", 5000))
+        self.idle_ttl_s = float(idle_ttl_s if idle_ttl_s is not None
+                                else _env_number("AI_SESSION_TTL_S", 12 * 3600))
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else _env_number("AI_SESSION_MAX_BYTES", 256 * 1024 * 1024))
+        self.evictions = {"lru": 0, "ttl": 0, "bytes": 0}
+        self._sessions: "OrderedDict[str, SessionUsage]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    # --- BaseCheckpointSaver API -------------------------------------------
+
+    def get_tuple(self, config):
+        result = self.inner.get_tuple(config)
+        if result is not None:
+            self._record(config["configurable"]["thread_id"], 0)
+        return result
+
+    def list(self, *args, **kwargs):
+        return self.inner.list(*args, **kwargs)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = self.inner.put(config, checkpoint, metadata, new_versions)
+        values = checkpoint.get("channel_values", {})
+        written = sum(
+            len(self.serde.dumps_typed(values[channel])[1])
+            for channel in new_versions if channel in values
+        )
+        self._record(config["configurable"]["thread_id"], written)
+        self._enforce_limits()
+        return next_config
+
+    def put_writes(self, *args, **kwargs):
+        return self.inner.put_writes(*args, **kwargs)
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    def delete_thread(self, thread_id: str):
+        self.inner.delete_thread(thread_id)
+        with self._lock:
+            usage = self._sessions.pop(thread_id, None)
+            if usage:
+                self._total_bytes -= usage.bytes
+
+    # --- Bookkeeping --------------------------------------------------------
+
+    def _record(self, thread_id: str, written: int):
+        with self._lock:
+            usage = self._sessions.get(thread_id)
+            if usage is None:
+                usage = self._sessions[thread_id] = SessionUsage(last_access=time.time())
+            else:
+                usage.last_access = time.time()
+                self._sessions.move_to_end(thread_id)
+            usage.bytes += written
+            self._total_bytes += written
+
+    def _next_victim(self, now: float) -> Optional[Tuple[str, str]]:
+        """Pick the eviction candidate at the LRU end, if any limit is exceeded"""
+        if not self._sessions:
+            return None
+        thread_id, usage = next(iter(self._sessions.items()))
+        if now - usage.last_access > self.idle_ttl_s:
+            return thread_id, "ttl"
+        if len(self._sessions) > self.max_sessions:
+            return thread_id, "lru"
+        if self._total_bytes > self.max_bytes and len(self._sessions) > 1:
+            return thread_id, "bytes"
+        return None
+
+    def _last_write_time(self, thread_id: str) -> float:
+        """Timestamp of the thread's latest checkpoint in the shared store"""
+        found = self.inner.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        if found is None:
+            return 0.0
+        return datetime.fromisoformat(found.checkpoint["ts"]).timestamp()
+
+    def _enforce_limits(self):
+        # Each candidate is either evicted or refreshed to the MRU end, so
+        # this loop visits every session at most once
+        for _ in range(len(self._sessions)):
+            now = time.time()
+            with self._lock:
+                victim = self._next_victim(now)
+                if victim is None:
+                    return
+                thread_id, reason = victim
+                usage = self._sessions[thread_id]
+            
+            last_write = self._last_write_time(thread_id)
+            if last_write > usage.last_access:
+                # Another worker touched it since we did: not idle, keep it
+                with self._lock:
+                    if thread_id in self._sessions:
+                        usage.last_access = last_write
+                        self._sessions.move_to_end(thread_id)
+                continue
+            
+            self.delete_thread(thread_id)
+            with self._lock:
+                self.evictions[reason] += 1
+
+    def stats(self) -> Dict:
+        """Live counts and limits for the admin endpoint"""
+        now = time.time()
+        with self._lock:
+            oldest = next(iter(self._sessions.values()), None)
+            return {
+                "backend": type(self.inner).__name__,
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "oldest_idle_s": round(now - oldest.last_access, 1) if oldest else 0.0,
+                "limits": {
+                    "max_sessions": self.max_sessions,
+                    "idle_ttl_s": self.idle_ttl_s,
+                    "max_bytes": self.max_bytes
+                },
+                "evictions": dict(self.evictions)
+            }
+
+
+# ============================================================================
+# BUILT-IN BACKENDS
+# ============================================================================
+
+def _memory_backend(**_) -> BaseCheckpointSaver:
+    return MemorySaver()
+
+
+def open_sqlite_connection(path: str, busy_timeout_ms: int = 30000) -> sqlite3.Connection:
+    """
+    Open a connection tuned for several processes sharing one session file
+
+    - journal_mode=WAL: readers never block the writer (and vice versa)
+    - synchronous=NORMAL: fsync at WAL checkpoints only; safe with WAL
+    - busy_timeout: wait for another worker's commit instead of raising
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout_ms / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    return conn
+
+
+def _sqlite_backend(path: str = None, busy_timeout_ms: int = 30000, **_) -> BaseCheckpointSaver:
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "The sqlite checkpointer needs langgraph-checkpoint-sqlite: "
+            "pip install langgraph-checkpoint-sqlite (or set AI_CHECKPOINTER=memory)"
+        ) from e
+
+    path = path or os.environ.get("AI_SESSION_DB", DEFAULT_SQLITE_PATH)
+    saver = SqliteSaver(open_sqlite_connection(path, busy_timeout_ms))
+    saver.setup()
+    return saver
+
+
+register_checkpointer_backend("memory", _memory_backend)
+register_checkpointer_backend("sqlite", _sqlite_backend)
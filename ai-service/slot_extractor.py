@@ -0,0 +1,259 @@
+"""
+Slot Extractor - room type, price, stay dates and party size in one scan
+NegotiatorAgent used to find the room with substring checks and the price
+with up to three regexes, and nothing read dates or party size at all, so
+"$1,200", "80 USD", "LKR 15000" or "Dec 20-23 for 2 people" led to another
+"what price did you have in mind?" round-trip.
+
+One precompiled alternation is run over the message once with finditer();
+each alternative is wrapped in a named group, so match.lastgroup says which
+slot a hit fills. detect_intent_node extracts the slots once per turn and
+the negotiation and booking handlers read them from the state.
+
+Prices are normalized to USD (LKR at AI_LKR_PER_USD rupees per dollar).
+When a message has several prices, a price quoted after "at", "is",
+"instead of"... is taken as the reference and the other one as the offer
+("too expensive at $500, can you do $400?" -> 400).
+"""
+
+import os
+import re
+from datetime import date, timedelta
+from typing import List, Optional, Tuple, TypedDict
+
+LKR_PER_USD = float(os.environ.get("AI_LKR_PER_USD", "300"))
+
+# USD per unit of each currency
+USD_RATES = {"USD": 1.0, "LKR": 1 / LKR_PER_USD, "EUR": 1.08, "GBP": 1.27}
+
+ROOM_TYPES = {"family": "family", "suite": "family", "deluxe": "deluxe",
+              "standard": "standard", "basic": "standard"}
+
+
+class Slots(TypedDict):
+    """Structured details of one guest message (None where not mentioned)"""
+    room_type: Optional[str]    # negotiator key: "standard", "deluxe", "family"
+    price: Optional[float]      # the guest's offer per night, USD (stay totals divided by nights)
+    price_max: Optional[float]  # upper end of a range ("$60-70"), USD
+    total: Optional[float]      # the offer when quoted for the whole stay, USD
+    amount: Optional[float]     # the offer as written, before conversion
+    currency: Optional[str]     # "USD", "LKR", "EUR", "GBP"
+    check_in: Optional[str]     # ISO dates
+    check_out: Optional[str]
+    nights: Optional[int]
+    guests: Optional[int]
+
+
+_MONTHS = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+           "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+_NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                 "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+_CURRENCIES = {"$": "USD", "us$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD",
+               "bucks": "USD", "lkr": "LKR", "rs": "LKR", "rs.": "LKR", "rupee": "LKR",
+               "rupees": "LKR", "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+               "£": "GBP", "gbp": "GBP", "pound": "GBP", "pounds": "GBP"}
+
+_NUM = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?k?|\d+(?:\.\d+)?k?"
+_WORD_COUNT = r"one|two|three|four|five|six|seven|eight|nine|ten"
+_MONTH = (r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?")
+_ORD = r"(?:st|nd|rd|th)?"
+_UNTIL = r"\s*(?:-|–|to|until|till)\s*"
+_CUR_PRE = r"\$|€|£|(?<![a-z])(?:us\$|usd|lkr|rs\.?|eur|gbp)"
+_CUR_POST = r"usd|dollars?|bucks|lkr|rupees?|rs|eur|euros?|gbp|pounds?"
+_NOT_MONEY = (r"(?!\s*(?:nights?|days?|weeks?|people|persons?|guests?|adults?|kids?|children"
+              rf"|pax|of\s+us|{_MONTH})\b){_ORD}")
+_NIGHTS = r"[\s-]*nights?\b"
+_WEEKS = r"[\s-]*weeks?\b"
+_PEOPLE = r"\s+(?:people|persons?|guests?|adults?|pax|of\s+us)\b"
+_CHILDREN = r"\s+(?:kids?|children|child)\b"
+
+# Matches start only at the beginning of a word, and the alternatives are
+# split by their first character (digit, or a letter some alternative starts
+# with), so most positions fail on a single check. Counts come in digit and word (_w) forms; the count itself
+# is the <kind>_n group. Dates come before prices ("dec 20" is not $20), and
+# "family of 4" before the room type.
+_SLOTS = re.compile(rf"""
+  (?<![a-z0-9])
+  (?:
+    (?=\d)
+    (?: (?P<iso>(?P<iso_date>\d{{4}}-\d{{2}}-\d{{2}}))
+      | (?P<day_month>(?P<dm_day>\d{{1,2}}){_ORD}(?:{_UNTIL}(?P<dm_day2>\d{{1,2}}){_ORD})?
+            \s+(?:of\s+)?(?P<dm_month>{_MONTH})\b\.?(?:,?\s+(?P<dm_year>\d{{4}}))?)
+      | (?P<nights>(?P<nights_n>\d{{1,2}}){_NIGHTS})
+      | (?P<weeks>(?P<weeks_n>\d){_WEEKS})
+      | (?P<people>(?P<people_n>\d{{1,2}}){_PEOPLE})
+      | (?P<children>(?P<children_n>\d{{1,2}}){_CHILDREN})
+      | (?P<price_post>(?P<amt_b>{_NUM})(?:\s*(?:-|–|to)\s*(?P<amt_b2>{_NUM}))?\s*(?P<cur_b>{_CUR_POST})\b)
+      | (?P<per_night>(?P<amt_c>{_NUM})\s*(?:per|/|a)\s*night)
+    )
+  | (?=[abcdefgjlmnoprstu$€£])  # first letters of the alternatives below
+    (?: (?P<month_day>(?P<md_month>{_MONTH})\.?\s+(?P<md_day>\d{{1,2}}){_ORD}\b
+            (?:{_UNTIL}(?P<md_day2>\d{{1,2}}){_ORD}\b(?!\s*(?:{_MONTH})))?(?:,?\s+(?P<md_year>\d{{4}}))?)
+      | (?P<relative>(?:today|tonight|tomorrow)\b)
+      | (?P<nights_w>(?P<nights_w_n>{_WORD_COUNT}){_NIGHTS})
+      | (?P<weeks_w>(?P<weeks_w_n>a|one|two){_WEEKS})
+      | (?P<party>family\s+of\s+(?P<party_n>\d{{1,2}}|{_WORD_COUNT})\b)
+      | (?P<people_w>(?P<people_w_n>{_WORD_COUNT}){_PEOPLE})
+      | (?P<children_w>(?P<children_w_n>{_WORD_COUNT}){_CHILDREN})
+      | (?P<couple>(?:couple|my\s+(?:wife|husband|partner|girlfriend|boyfriend))\b)
+      | (?P<solo>(?:just\s+me|solo|by\s+myself)\b)
+      | (?P<room>(?:family|suite|deluxe|standard|basic)\b)
+      | (?P<price_pre>(?P<cur_a>{_CUR_PRE})\s*(?P<amt_a>{_NUM})
+            (?:\s*(?:-|–|to)\s*(?:{_CUR_PRE})?\s*(?P<amt_a2>{_NUM}))?)
+      | (?P<offer>(?:for|pay|offer|do|budget(?:\s+is|\s+of)?|around|about)\s+(?P<amt_d>{_NUM})\b{_NOT_MONEY}
+            (?:\s*(?P<cur_d>{_CUR_POST})\b)?)
+    )
+  )
+""", re.IGNORECASE | re.VERBOSE)
+
+# Just before a price: it is what something costs, not what the guest offers
+_REFERENCE = re.compile(r"(?:\bat|\bis|\bcosts?|\bwas|\binstead\s+of|\bnot|\bfrom|\bthan)\s*$")
+# Just after a price: it is for the whole stay, not per night ("$300 total",
+# "for the week", "for 10 nights total", "for all 3 nights", "for a 3-night stay")
+_TOTAL = re.compile(rf"""\s*(?:
+    for\s+(?:the\s+|all\s+|our\s+|a\s+)?(?:\d{{1,2}}|{_WORD_COUNT})[\s-]*(?:nights?|days?|weeks?)
+      (?:\s+(?:stay|in\s+total|total|altogether))?
+  | (?:per\s+|a\s+|in\s+)?(?:total|altogether|(?:for\s+)?(?:the|a|our)\s+(?:whole\s+)?(?P<unit>week|stay))
+)\b""", re.VERBOSE)
+
+
+def _number(text: str) -> float:
+    text = text.replace(",", "").lower()
+    if text.endswith("k"):
+        return float(text[:-1]) * 1000
+    return float(text)
+
+
+def _count(text: str) -> int:
+    return _NUMBER_WORDS.get(text.lower()) or int(text)
+
+
+def _date(year: Optional[str], month: str, day: str, today: date) -> Optional[date]:
+    """Calendar date; without a year, the next occurrence from today"""
+    try:
+        value = date(int(year) if year else today.year, _MONTHS[month[:3].lower()], int(day))
+    except ValueError:
+        return None
+    if not year and value < today:
+        try:
+            value = value.replace(year=today.year + 1)
+        except ValueError:  # 29 Feb
+            return None
+    return value
+
+
+def _usd(amount: float, currency: str) -> float:
+    return round(amount * USD_RATES[currency], 2)
+
+
+def extract_slots(text: str, today: Optional[date] = None) -> Slots:
+    """All slots of a message in one scan"""
+    today = today or date.today()
+    room_type = None
+    prices: List[Tuple[float, Optional[float], str, bool, bool]] = []  # amount, upper, currency, reference, total
+    dates: List[date] = []
+    nights = None
+    adults = children = party = None
+
+    lowered = text.lower()
+    for match in _SLOTS.finditer(lowered):
+        kind = match.lastgroup
+        if kind == "room":
+            room_type = room_type or ROOM_TYPES[match.group()]
+        elif kind in ("price_pre", "price_post", "per_night", "offer"):
+            if kind == "price_pre":
+                amount, upper, currency = match.group("amt_a"), match.group("amt_a2"), _CURRENCIES[match.group("cur_a")]
+            elif kind == "price_post":
+                amount, upper, currency = match.group("amt_b"), match.group("amt_b2"), _CURRENCIES[match.group("cur_b")]
+            elif kind == "per_night":
+                amount, upper, currency = match.group("amt_c"), None, "USD"
+            else:
+                amount, upper, currency = match.group("amt_d"), None, _CURRENCIES.get(match.group("cur_d"), "USD")
+            reference = _REFERENCE.search(lowered, max(0, match.start() - 12), match.start()) is not None
+            total = None if kind == "per_night" else _TOTAL.match(lowered, match.end())
+            if total and total.group("unit") == "week" and nights is None:
+                nights = 7
+            prices.append((_number(amount), _number(upper) if upper else None, currency, reference, bool(total)))
+        elif kind == "iso":
+            try:
+                dates.append(date.fromisoformat(match.group("iso_date")))
+            except ValueError:
+                pass
+        elif kind in ("day_month", "month_day"):
+            prefix = "dm" if kind == "day_month" else "md"
+            year, month = match.group(f"{prefix}_year"), match.group(f"{prefix}_month")
+            for day in (match.group(f"{prefix}_day"), match.group(f"{prefix}_day2")):
+                value = _date(year, month, day, today) if day else None
+                if value:
+                    dates.append(value)
+        elif kind == "relative":
+            dates.append(today + timedelta(days=1) if match.group() == "tomorrow" else today)
+        elif kind in ("nights", "nights_w"):
+            nights = _count(match.group(kind + "_n"))
+        elif kind in ("weeks", "weeks_w"):
+            nights = 7 * _count(match.group(kind + "_n"))
+        elif kind in ("people", "people_w"):
+            adults = (adults or 0) + _count(match.group(kind + "_n"))
+        elif kind in ("children", "children_w"):
+            children = (children or 0) + _count(match.group(kind + "_n"))
+        elif kind == "party":
+            party = _count(match.group("party_n"))
+        elif kind == "couple":
+            party = party or 2
+        elif kind == "solo":
+            party = party or 1
+
+    slots: Slots = {"room_type": room_type, "price": None, "price_max": None, "total": None, "amount": None,
+                    "currency": None, "check_in": None, "check_out": None, "nights": nights,
+                    "guests": None}
+
+    if dates:
+        check_in = dates[0]
+        check_out = next((value for value in dates[1:] if value > check_in), None)
+        if check_out is None and nights:
+            check_out = check_in + timedelta(days=nights)
+        slots["check_in"] = check_in.isoformat()
+        if check_out is not None:
+            slots["check_out"] = check_out.isoformat()
+            slots["nights"] = (check_out - check_in).days
+
+    if prices:
+        offers = [price for price in prices if not price[3]] or prices
+        amount, upper, currency, _, total = offers[-1]
+        # A price for the whole stay becomes a nightly one when the nights are known
+        per = slots["nights"] if total and slots["nights"] else 1
+        slots.update(amount=amount, currency=currency, price=_usd(amount / per, currency),
+                     price_max=_usd(upper / per, currency) if upper and upper > amount else None,
+                     total=_usd(amount, currency) if total else None)
+
+    if adults is not None or children is not None:
+        slots["guests"] = (adults or 0) + (children or 0)
+    else:
+        slots["guests"] = party
+    return slots
+
+
+def booking_summary(slots: Optional[Slots]) -> str:
+    """One line for prompts and templates ("deluxe room, 2025-12-20 to 2025-12-23 (3 nights), 2 guests")"""
+    if not slots:
+        return ""
+    parts = []
+    if slots.get("room_type"):
+        parts.append(f"{slots['room_type']} room")
+    if slots.get("check_in"):
+        stay = slots["check_in"]
+        if slots.get("check_out"):
+            stay += f" to {slots['check_out']} ({slots['nights']} nights)"
+        parts.append(stay)
+    elif slots.get("nights"):
+        parts.append(f"{slots['nights']} nights")
+    if slots.get("guests"):
+        parts.append(f"{slots['guests']} guests")
+    if slots.get("total") is not None and slots.get("nights"):
+        parts.append(f"${slots['total']:g} total (${slots['price']:g}/night) budget")
+    elif slots.get("total") is not None:
+        parts.append(f"${slots['total']:g} total budget")
+    elif slots.get("price") is not None:
+        parts.append(f"${slots['price']:g}/night budget")
+    return ", ".join(parts)
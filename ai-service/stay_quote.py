@@ -0,0 +1,168 @@
+"""
+Stay Quote - night-by-night price of a stay from its dates
+negotiate_price() answers an offer with one flat per-night price, and the
+"extended" and "long_stay" discounts only apply when the caller passes that
+loyalty status by hand. A quote starts from the dates instead: every night
+of the stay is priced on its own, and the stay-length status is derived
+from the number of nights.
+
+Per night (index 0 = check-in night):
+    occupancy  calendar bookings or the forecast, whichever is higher
+               (as in negotiate_price), else the current hotel-wide rate
+    rate       base price x tier multiplier x weekend multiplier
+               x season multiplier (pricing_rules.json quote tables)
+    price      rate less the guest's loyalty discount plus the discount of
+               the stay-length status, never below the minimum price
+
+All nights are priced as array operations over the stay, so a 30-night
+quote costs about the same as a one-night quote. The quote is the asking
+price; negotiations still start from the base price.
+"""
+
+import os
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+from negotiator_agent import NegotiatorAgent
+from occupancy_calendar import DateLike, stay_dates
+from pricing_rules import NO_LOYALTY
+
+MAX_QUOTE_NIGHTS = int(os.environ.get("AI_QUOTE_MAX_NIGHTS", 365))
+
+OCCUPANCY_BASES = ("current", "stay_dates", "forecast", "hotel_bookings")
+CURRENT, STAY_DATES, FORECAST, HOTEL_BOOKINGS = range(len(OCCUPANCY_BASES))
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def _iso_day(ordinal: int) -> str:
+    """ISO date of an ordinal; cached, as datetime64 -> str costs more than the pricing per night"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _nightly_occupancy(negotiator: NegotiatorAgent, room_type: str, check_in: date,
+                       check_out: date, nights: int):
+    """(occupancy, basis code) per night for the cottage"""
+    occupancy = np.full(nights, np.nan)
+    basis = np.full(nights, CURRENT, dtype=np.int8)
+
+    calendar = negotiator.calendar.get()
+    booked = calendar.nightly(check_in, check_out, room_type) if calendar is not None else None
+    if booked is not None:
+        occupancy = booked
+        basis[~np.isnan(booked)] = STAY_DATES
+
+    # The forecast wins where it is higher, or where the calendar has no data
+    forecast = negotiator.forecast.get()
+    expected = forecast.nightly(check_in, check_out, room_type) if forecast is not None else None
+    if expected is not None:
+        higher = (expected > occupancy) | (np.isnan(occupancy) & ~np.isnan(expected))
+        occupancy = np.where(higher, expected, occupancy)
+        basis[higher] = FORECAST
+
+    missing = np.isnan(occupancy)
+    if missing.any():
+        occupancy[missing] = negotiator.get_occupancy_rate()
+    return occupancy, basis
+
+
+def quote_stay(
+    negotiator: NegotiatorAgent,
+    room_type: str,
+    check_in: DateLike,
+    check_out: Optional[DateLike] = None,
+    loyalty_status: str = NO_LOYALTY,
+    hotel_id: Optional[str] = None
+) -> Dict:
+    """
+    Price every night of a stay (check_out defaults to the night after check_in)
+
+    With a hotel_id, base and minimum prices come from the hotel catalog
+    and each night's occupancy from the property's bookings (the current
+    hotel-wide rate for nights the bookings export doesn't cover).
+
+    Returns the stay, the discounts applied, "nightly" (columns with one
+    entry per night: date, weekend, occupancy rate, basis and tier, rate
+    before discounts, price) and the total. Raises ValueError for an
+    unknown room type or hotel or a check_out not after check_in.
+    """
+    # One rules snapshot for the whole quote (see pricing_rules.py)
+    rules = negotiator.rules.get()
+    stay = stay_dates(check_in, check_out)
+    if stay is None:
+        raise ValueError("check_out must be after check_in")
+    first, last = stay[0].toordinal(), stay[1].toordinal()
+    nights = last - first
+
+    if hotel_id is not None:
+        catalog = negotiator.catalog.get()
+        prices = catalog.lookup(hotel_id, room_type) if catalog is not None else None
+        if prices is None:
+            raise ValueError(f"Unknown hotel or room type: {hotel_id}, {room_type}")
+        base_price, minimum_price = prices
+        occupancy = catalog.nightly_occupancy(hotel_id, stay[0], stay[1])
+        if occupancy is None:
+            occupancy = np.full(nights, np.nan)
+        basis = np.where(np.isnan(occupancy), CURRENT, HOTEL_BOOKINGS).astype(np.int8)
+        if (basis == CURRENT).any():
+            occupancy[basis == CURRENT] = negotiator.get_occupancy_rate()
+    else:
+        if room_type not in rules.base_prices:
+            raise ValueError("Invalid room type. We have Standard, Deluxe, and Family rooms.")
+        base_price, minimum_price = rules.base_prices[room_type], rules.minimum_prices[room_type]
+        occupancy, basis = _nightly_occupancy(negotiator, room_type, stay[0], stay[1], nights)
+
+    # Tier per night: first tier whose upper bound is >= the occupancy (PricingRules.occupancy_tier)
+    tier = np.searchsorted(np.asarray(rules.tier_thresholds), occupancy, side="left") + 1
+    ordinals = np.arange(first, last)
+    days = (ordinals - _EPOCH).astype("datetime64[D]")
+    weekday = (ordinals - 1) % 7  # ordinal 1 (0001-01-01) was a Monday
+    month = days.astype("datetime64[M]").astype(np.int64) % 12
+    weekday_multipliers = np.asarray(rules.weekday_multipliers)
+    rate = (base_price * np.asarray(rules.tier_multipliers)[tier - 1]
+            * weekday_multipliers[weekday] * np.asarray(rules.month_multipliers)[month])
+    rate = np.round(rate, 2)
+
+    # The stay earns its length-of-stay status; a guest claiming one gets it from the dates instead
+    stay_status = rules.stay_length_status(nights)
+    stay_statuses = {status for _, status in rules.stay_length_statuses}
+    status = loyalty_status.lower()
+    loyalty_discount = 0.0 if status in stay_statuses else rules.loyalty_discount(status)
+    stay_discount = rules.loyalty_discount(stay_status) if stay_status else 0.0
+    discount = loyalty_discount + stay_discount
+    price = np.maximum(np.round(rate * (1 - discount), 2), minimum_price)
+
+    weekend = weekday_multipliers[weekday] != 1.0
+    total = round(float(price.sum()), 2)
+    result = {
+        "room_type": room_type,
+        "check_in": stay[0].isoformat(),
+        "check_out": stay[1].isoformat(),
+        "nights": nights,
+        "base_price": base_price,
+        "minimum_price": minimum_price,
+        "loyalty_status": loyalty_status,
+        "loyalty_discount": loyalty_discount,
+        "length_of_stay_status": stay_status,
+        "length_of_stay_discount": stay_discount,
+        # Columnar, like the pricing grid: one list per field, one entry per night
+        "nightly": {
+            "date": [_iso_day(ordinal) for ordinal in ordinals.tolist()],
+            "weekend": weekend.tolist(),
+            "occupancy_rate": occupancy.tolist(),
+            "occupancy_basis": [OCCUPANCY_BASES[code] for code in basis.tolist()],
+            "occupancy_tier": tier.tolist(),
+            "rate": rate.tolist(),
+            "price": price.tolist()
+        },
+        "total": total,
+        "average_price": round(total / nights, 2),
+        "rules_version": rules.version
+    }
+    if hotel_id is not None:
+        result["hotel_id"] = hotel_id
+    return result
@@ -15,6 +15,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from negotiator_agent import NegotiatorAgent
 from sentiment_agent import SentimentAnalyzer
 from graphrag_engine import KnowledgeGraph, format_graph_context
+from keyword_engine import streamlit_matcher
 
 # Page configuration
 st.set_page_config(
@@ -321,21 +322,19 @@ def initialize_backend():
 
 def detect_intent(user_input: str) -> str:
     """Detect user intent"""
-    user_lower = user_input.lower()
+    found = streamlit_matcher.scan(user_input)
     
     # Negotiation intent
-    if any(word in user_lower for word in ["price", "cost", "expensive", "negotiate", "discount", "$"]):
-        if any(word in user_lower for word in ["room", "suite", "standard", "deluxe", "presidential"]):
-            return "negotiation"
+    if "price" in found and "room" in found:
+        return "negotiation"
     
     # Complaint intent
     if st.session_state.sentiment_analyzer.is_complaint(user_input):
         return "complaint"
     
     # Recommendation intent
-    if any(word in user_lower for word in ["restaurant", "dinner", "lunch", "eat", "itinerary", "recommend"]):
-        if any(word in user_lower for word in ["near", "romantic", "vegan"]):
-            return "recommendation"
+    if "recommendation" in found and "recommendation_context" in found:
+        return "recommendation"
     
     return "general_info"
 
@@ -382,9 +381,9 @@ Guest's Offer: ${guest_offer}
 def handle_complaint(user_input: str) -> str:
     """Handle guest complaints"""
     
-    sentiment, score = st.session_state.sentiment_analyzer.analyze_sentiment(user_input)
-    is_complaint = st.session_state.sentiment_analyzer.is_complaint(user_input)
-    severity = st.session_state.sentiment_analyzer.detect_issue_severity(user_input)
+    report = st.session_state.sentiment_analyzer.analyze(user_input)
+    sentiment, score = report.sentiment, report.score
+    is_complaint, severity = report.is_complaint, report.severity
     
     system_prompt = st.session_state.sentiment_analyzer.generate_system_prompt(
         sentiment, is_complaint, severity